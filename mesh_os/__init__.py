@@ -5,9 +5,12 @@ This package provides a high-level interface for managing agent memories with se
 
 Key Components:
     - MeshOS: Main client class for interacting with the memory system
+    - AsyncMeshOS: Async client for running memory operations concurrently
     - Agent: Represents an agent in the system
     - Memory: Represents a stored memory with content and metadata
     - MemoryEdge: Represents a connection between two memories
+    - GraphQLError, AuthError, ContentTooLongError: Raised for failed queries,
+      rejected admin secrets and contents too long to store in one batch
 
 Type System:
     - DataType: Primary classification of memories (ACTIVITY, KNOWLEDGE, etc.)
@@ -33,21 +36,39 @@ Example:
     ... )
 """
 
-from typing import List, Dict, Optional, Union, Any
+from typing import TYPE_CHECKING, Any, List
 
-from mesh_os.core.client import Agent, Memory, MemoryEdge, MeshOS
-from mesh_os.core.taxonomy import (
-    ActivitySubtype,
-    DataType,
-    DecisionSubtype,
-    EdgeMetadata,
-    EdgeType,
-    KnowledgeSubtype,
-    MediaSubtype,
-    MemoryMetadata,
-    RelevanceTag,
-    VersionInfo
-)
+from mesh_os import core
+
+if TYPE_CHECKING:
+    from mesh_os.core.async_client import AsyncMeshOS
+    from mesh_os.core.client import (Agent, AuthError, ContentTooLongError, GraphQLError, Memory,
+                                     MemoryEdge, MeshOS)
+    from mesh_os.core.taxonomy import (
+        ActivitySubtype,
+        DataType,
+        DecisionSubtype,
+        EdgeMetadata,
+        EdgeType,
+        KnowledgeSubtype,
+        MediaSubtype,
+        MemoryMetadata,
+        RelevanceTag,
+        VersionInfo
+    )
+
+# Public names are loaded by mesh_os.core on first access (PEP 562), so
+# `import mesh_os` does not pay for openai, requests and pydantic until
+# they are needed.
+def __getattr__(name: str) -> Any:
+    if name in core._LAZY_IMPORTS:
+        value = getattr(core, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(core._LAZY_IMPORTS))
 
 __version__ = "0.1.9"
 
@@ -58,6 +79,12 @@ __all__: List[str] = [
     "Memory",
     "MemoryEdge",
     "MeshOS",
+    "AsyncMeshOS",
+    
+    # Errors
+    "AuthError",
+    "ContentTooLongError",
+    "GraphQLError",
     
     # Taxonomy models
     "DataType",
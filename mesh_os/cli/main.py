@@ -1,33 +1,92 @@
 """
 CLI interface for MeshOS.
 """
+import asyncio
+import functools
 import os
+import random
+import re
+import shlex
 import shutil
+import sys
 from pathlib import Path
-from typing import Optional, Dict, Any, Tuple
+from typing import Optional, Dict, Any, List, Tuple, Union
 import subprocess
 import time
-import json
 from uuid import UUID
 
 import click
-from dotenv import load_dotenv, find_dotenv
-from rich.console import Console
-from rich.panel import Panel
-from rich.prompt import Prompt
-from rich import print as rprint
+import orjson
 
-from mesh_os.core.client import MeshOS, InvalidSlugError
+from mesh_os.core.client import ContentTooLongError, MeshOS, InvalidSlugError
 from mesh_os.core.taxonomy import (
     DataType, EdgeType, MemoryMetadata, EdgeMetadata,
     ActivitySubtype, KnowledgeSubtype, DecisionSubtype, MediaSubtype
 )
 
-console = Console()
+class _LazyConsole:
+    """Proxy that creates the rich Console on first use to keep CLI startup fast."""
+
+    _console = None
+
+    def __getattr__(self, name: str) -> Any:
+        if _LazyConsole._console is None:
+            from rich.console import Console
+            _LazyConsole._console = Console()
+        return getattr(_LazyConsole._console, name)
+
+console = _LazyConsole()
+
+# Matches "key=value" and "key._op=value" filter arguments
+_FILTER_RE = re.compile(r'^(?P<key>[^=]+?)(?:\._(?P<op>\w+))?=(?P<value>.*)\Z', re.S)
+
+# Matches an existing OPENAI_API_KEY line in a .env file
+_OPENAI_KEY_RE = re.compile(r'^OPENAI_API_KEY=.*$', re.M)
+
+# Clients cached by (url, admin secret, OpenAI key) so repeated calls share one connection pool
+_clients: Dict[Tuple[str, str, str], MeshOS] = {}
+
+def _json_loads(data: Union[str, bytes]) -> Any:
+    """Parse JSON."""
+    return orjson.loads(data)
+
+def _json_dumps(obj: Any, indent: bool = False) -> str:
+    """Serialize JSON, optionally indented for display."""
+    return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0).decode()
+
+@functools.lru_cache(maxsize=256)
+def _parse_value(value: str) -> Any:
+    """Parse a filter value as JSON, falling back to the raw string."""
+    try:
+        return _json_loads(value)
+    except orjson.JSONDecodeError:
+        return value
+
+# Nibble value of each hex digit byte; every other byte maps to 0xFF
+_HEX = bytes(
+    int(chr(byte), 16) if chr(byte) in "0123456789abcdefABCDEF" else 0xFF
+    for byte in range(256)
+)
+
+def _is_canonical_uuid(value: str) -> bool:
+    """Check for the hyphenated 36-character form without building a UUID."""
+    if len(value) != 36:
+        return False
+    try:
+        raw = value.encode("ascii")
+    except UnicodeEncodeError:
+        return False
+    if not raw[8] == raw[13] == raw[18] == raw[23] == 0x2D:
+        return False
+    digits = raw.translate(_HEX, b"-")
+    return len(digits) == 32 and digits.find(b"\xff") == -1
 
 def validate_uuid(ctx, param, value: str) -> str:
     """Validate UUID format."""
+    if isinstance(value, str) and _is_canonical_uuid(value):
+        return value
     try:
+        # Other spellings UUID() accepts (braces, urn:uuid:, no hyphens)
         UUID(value)
         return value
     except ValueError:
@@ -38,13 +97,26 @@ def validate_metadata(metadata_str: Optional[str]) -> Optional[Dict[str, Any]]:
     if not metadata_str:
         return None
     try:
-        metadata = json.loads(metadata_str)
+        metadata = _json_loads(metadata_str)
         if not isinstance(metadata, dict):
             raise click.BadParameter("Metadata must be a JSON object")
         return metadata
-    except json.JSONDecodeError:
+    except orjson.JSONDecodeError:
         raise click.BadParameter("Invalid JSON format")
 
+# Valid taxonomy values, built once so validation is a set lookup
+_VALID_SUBTYPES: Dict[str, frozenset] = {
+    data_type.value: frozenset(subtype.value for subtype in subtype_enum)
+    for data_type, subtype_enum in (
+        (DataType.ACTIVITY, ActivitySubtype),
+        (DataType.KNOWLEDGE, KnowledgeSubtype),
+        (DataType.DECISION, DecisionSubtype),
+        (DataType.MEDIA, MediaSubtype)
+    )
+}
+_EDGE_TYPE_VALUES = tuple(edge_type.value for edge_type in EdgeType)
+_VALID_EDGE_TYPES = frozenset(_EDGE_TYPE_VALUES)
+
 def validate_memory_metadata(metadata: Dict[str, Any]) -> Dict[str, Any]:
     """Validate memory metadata against our taxonomy."""
     if "type" not in metadata:
@@ -52,17 +124,13 @@ def validate_memory_metadata(metadata: Dict[str, Any]) -> Dict[str, Any]:
     if "subtype" not in metadata:
         raise click.BadParameter("Memory metadata must include 'subtype' field")
     
+    valid_subtypes = _VALID_SUBTYPES.get(metadata["type"])
+    if valid_subtypes is None:
+        raise click.BadParameter(f"{metadata['type']!r} is not a valid DataType")
+    if metadata["subtype"] not in valid_subtypes:
+        raise click.BadParameter(f"{metadata['subtype']!r} is not a valid subtype of {metadata['type']}")
+    
     try:
-        data_type = DataType(metadata["type"])
-        subtype_map = {
-            DataType.ACTIVITY: ActivitySubtype,
-            DataType.KNOWLEDGE: KnowledgeSubtype,
-            DataType.DECISION: DecisionSubtype,
-            DataType.MEDIA: MediaSubtype
-        }
-        subtype_enum = subtype_map[data_type]
-        subtype = subtype_enum(metadata["subtype"])
-        
         # Create MemoryMetadata to validate the full structure
         MemoryMetadata(**metadata)
         return metadata
@@ -71,14 +139,11 @@ def validate_memory_metadata(metadata: Dict[str, Any]) -> Dict[str, Any]:
 
 def validate_edge_type(ctx, param, value: str) -> str:
     """Validate edge relationship type."""
-    try:
-        EdgeType(value)
-        return value
-    except ValueError:
-        valid_types = [e.value for e in EdgeType]
+    if value not in _VALID_EDGE_TYPES:
         raise click.BadParameter(
-            f"Invalid relationship type. Must be one of: {', '.join(valid_types)}"
+            f"Invalid relationship type. Must be one of: {', '.join(_EDGE_TYPE_VALUES)}"
         )
+    return value
 
 def validate_weight(ctx, param, value: float) -> float:
     """Validate edge weight."""
@@ -86,13 +151,33 @@ def validate_weight(ctx, param, value: float) -> float:
         raise click.BadParameter("Weight must be between 0.0 and 1.0")
     return value
 
+# Resolved .env path per working directory, and the mtime each file was last loaded at
+_env_files: Dict[str, str] = {}
+_env_mtimes: Dict[str, float] = {}
+
 def load_env():
     """Load environment variables from .env file in current directory."""
-    env_file = find_dotenv(usecwd=True)
-    if env_file:
+    from dotenv import find_dotenv, load_dotenv
+    
+    cwd = os.getcwd()
+    env_file = _env_files.get(cwd)
+    if not env_file:
+        env_file = find_dotenv(usecwd=True)
+        if not env_file:
+            return False
+        _env_files[cwd] = env_file
+    
+    try:
+        mtime = os.stat(env_file).st_mtime
+    except OSError:
+        # File was removed since it was found; search again next time
+        _env_files.pop(cwd, None)
+        return False
+    
+    if _env_mtimes.get(env_file) != mtime:
         load_dotenv(env_file)
-        return True
-    return False
+        _env_mtimes[env_file] = mtime
+    return True
 
 def get_client():
     """Get a configured MeshOS client."""
@@ -110,17 +195,23 @@ def get_client():
         load_env()
         openai_api_key = os.getenv("OPENAI_API_KEY")
     
-    return MeshOS(
-        url=hasura_url,
-        api_key=hasura_admin_secret,
-        openai_api_key=openai_api_key
-    )
+    key = (hasura_url, hasura_admin_secret, openai_api_key)
+    if key not in _clients:
+        _clients[key] = MeshOS(
+            url=hasura_url,
+            api_key=hasura_admin_secret,
+            openai_api_key=openai_api_key
+        )
+    return _clients[key]
 
 def setup_openai_key(env_file: Path) -> bool:
     """
     Guide user through OpenAI API key setup.
     Returns True if key was configured successfully.
     """
+    from rich.panel import Panel
+    from rich.prompt import Prompt
+    
     console.print(Panel(
         "[yellow]⚠️  OpenAI API key required[/]\n\n"
         "MeshOS uses OpenAI's API for generating embeddings.\n"
@@ -140,12 +231,10 @@ def setup_openai_key(env_file: Path) -> bool:
         env_content = env_file.read_text() if env_file.exists() else ""
         
         # Replace or add OPENAI_API_KEY
-        if "OPENAI_API_KEY=" in env_content:
-            env_content = "\n".join(
-                line if not line.startswith("OPENAI_API_KEY=") else f"OPENAI_API_KEY={api_key}"
-                for line in env_content.splitlines()
-            )
-        else:
+        env_content, replaced = _OPENAI_KEY_RE.subn(
+            lambda _: f"OPENAI_API_KEY={api_key}", env_content
+        )
+        if not replaced:
             env_content += f"\n# OpenAI Configuration\nOPENAI_API_KEY={api_key}\n"
         
         # Write updated content
@@ -161,6 +250,40 @@ def setup_openai_key(env_file: Path) -> bool:
     )
     return False
 
+@functools.lru_cache(maxsize=None)
+def _template_manifest(src: Path) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    """List the directories and files under a template directory, relative to it.
+    
+    Templates only change with the installed package, so the walk is done once
+    per process.
+    """
+    dirs, files = [], []
+    pending = [""]
+    while pending:
+        rel = pending.pop()
+        with os.scandir(src / rel) as entries:
+            for entry in entries:
+                path = os.path.join(rel, entry.name)
+                if entry.is_dir(follow_symlinks=False):
+                    dirs.append(path)
+                    pending.append(path)
+                else:
+                    files.append(path)
+    return tuple(sorted(dirs)), tuple(sorted(files))
+
+def _copy_tree(src: Path, dst: Path) -> None:
+    """Copy a template directory tree of regular files.
+    
+    Unlike shutil.copytree this skips permission and timestamp copying, and
+    shutil.copyfile uses the kernel's zero-copy path (sendfile) where available.
+    """
+    dirs, files = _template_manifest(src)
+    os.makedirs(dst, exist_ok=True)
+    for rel in dirs:
+        os.makedirs(dst / rel, exist_ok=True)
+    for rel in files:
+        shutil.copyfile(src / rel, dst / rel)
+
 # Get the package root directory
 PACKAGE_ROOT = Path(__file__).parent.parent
 TEMPLATES_DIR = PACKAGE_ROOT / "templates"
@@ -301,6 +424,88 @@ def remember(content: str, agent_id: Optional[str] = None, metadata: Optional[st
         console.print(f"[red]Error:[/] {str(e)}")
         raise click.ClickException(str(e))
 
+def _batch_records(file, fmt: str):
+    """Yield (position, record) pairs from a JSONL or msgpack batch file."""
+    if fmt == "msgpack":
+        try:
+            import msgpack
+        except ImportError:
+            raise click.ClickException(
+                "msgpack input requires the msgpack package: pip install msgpack"
+            )
+        try:
+            yield from enumerate(msgpack.Unpacker(file, raw=False), start=1)
+        except ValueError:
+            raise click.BadParameter("Invalid msgpack data")
+        return
+    for line_number, line in enumerate(file, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield line_number, _json_loads(line)
+        except orjson.JSONDecodeError:
+            raise click.BadParameter(f"Invalid JSON on line {line_number}")
+
+@memory.command("remember-batch")
+@click.argument("file", type=click.File("rb"))
+@click.option("--agent-id", "-a", required=True, callback=validate_uuid, help="Agent ID to associate with the memories")
+@click.option("--metadata", "-m", help="Metadata as JSON, applied to every memory")
+@click.option("--format", "fmt", type=click.Choice(["jsonl", "msgpack"]), default=None,
+              help="Input format (default: msgpack for .msgpack/.mpk files, otherwise jsonl)")
+def remember_batch(file, agent_id: str, metadata: Optional[str] = None, fmt: Optional[str] = None):
+    """
+    Store many memories from a JSONL or msgpack file.
+
+    Each record is either a string or an object with a "content" field.
+    JSONL files hold one JSON record per line; msgpack files hold a stream
+    of packed records and need the msgpack extra. Embeddings are created in
+    batches rather than one request per memory. Records are not chunked, so
+    the whole file is rejected if one is too long to embed.
+
+    Examples:
+        mesh-os memory remember-batch notes.jsonl -a agent-id
+        mesh-os memory remember-batch notes.msgpack -a agent-id
+    """
+    if fmt is None:
+        fmt = "msgpack" if file.name.endswith((".msgpack", ".mpk")) else "jsonl"
+    label = "line" if fmt == "jsonl" else "record"
+    try:
+        contents = []
+        positions = []
+        for position, record in _batch_records(file, fmt):
+            if isinstance(record, dict):
+                record = record.get("content")
+            if not isinstance(record, str):
+                raise click.BadParameter(f"Missing content on {label} {position}")
+            contents.append(record)
+            positions.append(position)
+
+        if not contents:
+            console.print("[yellow]No memories found in file[/]")
+            return
+
+        client = get_client()
+        metadata_dict = validate_metadata(metadata)
+        if metadata_dict:
+            metadata_dict = validate_memory_metadata(metadata_dict)
+        memories = client.remember_many(contents, agent_id, metadata_dict)
+        console.print(f"[green]✓[/] Stored {len(memories)} memories")
+    except ContentTooLongError as e:
+        message = (
+            f"Content on {label} {positions[e.index]} is too long to embed ({e.tokens} tokens, "
+            f"limit {MeshOS.EMBEDDING_MAX_TOKENS}); store it with 'mesh-os memory remember', "
+            "which splits it into chunks. Nothing was stored."
+        )
+        console.print(f"[red]Error:[/] {message}")
+        raise click.ClickException(message)
+    except click.BadParameter as e:
+        console.print(f"[red]Error:[/] {str(e)}")
+        raise
+    except Exception as e:
+        console.print(f"[red]Error:[/] {str(e)}")
+        raise click.ClickException(str(e))
+
 @memory.command()
 @click.argument("query")
 @click.option("--agent-id", "-a", callback=validate_uuid, help="Filter memories by agent ID")
@@ -309,47 +514,47 @@ def remember(content: str, agent_id: Optional[str] = None, metadata: Optional[st
 @click.option("--filter", "-f", multiple=True, help="Add metadata filters in format key=value or key.operator=value")
 def recall(query: str, agent_id: Optional[str] = None, limit: int = 5, threshold: float = 0.7, filter: Tuple[str, ...] = ()):
     """Search for similar memories with optional filters."""
+    from rich.console import Group
+    from rich.panel import Panel
     try:
         client = get_client()
         filters = {}
         
         for f in filter:
-            if "=" not in f:
+            match = _FILTER_RE.match(f)
+            if not match:
                 raise click.BadParameter(f"Invalid filter format: {f}")
             
-            key, value = f.split("=", 1)
-            
-            if "._" in key:
-                base_key, operator = key.split("._", 1)
-                try:
-                    parsed_value = json.loads(value)
-                except json.JSONDecodeError:
-                    parsed_value = value
-                filters[base_key] = {f"_{operator}": parsed_value}
+            key, operator, value = match.group("key", "op", "value")
+            parsed_value = _parse_value(value)
+            if operator:
+                filters[key] = {f"_{operator}": parsed_value}
             else:
-                try:
-                    parsed_value = json.loads(value)
-                except json.JSONDecodeError:
-                    parsed_value = value
                 filters[key] = parsed_value
         
-        memories = client.recall(query, agent_id, limit, threshold, filters)
+        memories = client.recall(
+            query, agent_id, limit, threshold,
+            metadata_filter=filters or None
+        )
         if not memories:
             console.print("[yellow]No matching memories found[/]")
             return
         
         console.print(f"\n[green]Found {len(memories)} matching memories:[/]\n")
-        for memory in memories:
-            metadata_str = json.dumps(memory.metadata.model_dump(), indent=2)
-            console.print(Panel(
+        panels = [
+            Panel(
                 f"{memory.content}\n\n"
                 f"[blue]Agent:[/] {memory.agent_id or 'None'}\n"
                 f"[blue]Created:[/] {memory.created_at}\n"
                 f"[blue]Updated:[/] {memory.updated_at}\n"
-                f"[blue]Metadata:[/] {metadata_str}",
+                f"[blue]Metadata:[/] {_json_dumps(memory.metadata.model_dump(), indent=True)}",
                 title=f"Memory {memory.id}",
                 border_style="blue"
-            ))
+            )
+            for memory in memories
+        ]
+        # Render all results in one pass and a single write
+        console.print(Group(*panels))
     except Exception as e:
         console.print(f"[red]Error:[/] {str(e)}")
 
@@ -443,6 +648,8 @@ def connections(memory_id: str, relationship: Optional[str] = None, depth: int =
         mesh-os memory connections memory-id -r version_of
         mesh-os memory connections memory-id -d 2
     """
+    from rich.console import Group
+    from rich.panel import Panel
     try:
         client = get_client()
         edges = client.get_connected_memories(memory_id, relationship, depth)
@@ -452,8 +659,8 @@ def connections(memory_id: str, relationship: Optional[str] = None, depth: int =
             return
         
         console.print(f"\n[green]Found {len(edges)} connections:[/]\n")
-        for edge in edges:
-            console.print(Panel(
+        panels = [
+            Panel(
                 f"[blue]Source:[/] {edge['source_id']}\n"
                 f"[blue]Target:[/] {edge['target_id']}\n"
                 f"[blue]Relationship:[/] {edge['relationship']}\n"
@@ -461,14 +668,54 @@ def connections(memory_id: str, relationship: Optional[str] = None, depth: int =
                 f"[blue]Depth:[/] {edge['depth']}",
                 title="Memory Connection",
                 border_style="blue"
-            ))
+            )
+            for edge in edges
+        ]
+        console.print(Group(*panels))
     except Exception as e:
         console.print(f"[red]Error:[/] {str(e)}")
 
+@cli.command()
+def repl():
+    """
+    Run commands read from stdin, one per line, in a single process.
+
+    Each line holds the arguments you would pass to mesh-os. Interpreter
+    startup and the Hasura connection are shared by every line, so scripts
+    issuing many commands should pipe them here rather than spawning one
+    mesh-os process per command. Blank lines and lines starting with # are
+    skipped; a failing line is reported and the rest still run.
+
+    Examples:
+        printf 'memory remember "First note" -a agent-id\\n' | mesh-os repl
+    """
+    failures = 0
+    for line in sys.stdin:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        try:
+            args = shlex.split(line)
+            if args[0] == "repl":
+                raise click.UsageError("repl cannot be nested")
+            cli.main(args=args, prog_name="mesh-os", standalone_mode=False)
+        except click.ClickException as e:
+            e.show()
+            failures += 1
+        except click.Abort:
+            raise
+        except ValueError as e:
+            # Unbalanced quotes
+            console.print(f"[red]Error:[/] {str(e)}")
+            failures += 1
+    if failures:
+        raise click.ClickException(f"{failures} command(s) failed")
+
 @cli.command()
 @click.argument("project_name")
 def create(project_name: str):
     """Create a new MeshOS project."""
+    from rich.panel import Panel
     project_dir = Path.cwd() / project_name
     
     if project_dir.exists():
@@ -491,17 +738,17 @@ def create(project_name: str):
     
     # Copy templates
     with console.status("[bold]Setting up project files...", spinner="dots"):
-        shutil.copytree(TEMPLATES_DIR / "hasura", project_dir / "hasura")
-        shutil.copy(TEMPLATES_DIR / "docker-compose.yml", project_dir)
+        _copy_tree(TEMPLATES_DIR / "hasura", project_dir / "hasura")
+        shutil.copyfile(TEMPLATES_DIR / "docker-compose.yml", project_dir / "docker-compose.yml")
         
         # Create example script
         examples_dir = project_dir / "examples"
         examples_dir.mkdir()
-        shutil.copy(TEMPLATES_DIR / "examples/simple_example.py", examples_dir / "example.py")
+        shutil.copyfile(TEMPLATES_DIR / "examples/simple_example.py", examples_dir / "example.py")
         
         # Create .env file
         env_file = project_dir / ".env"
-        shutil.copy(TEMPLATES_DIR / ".env.example", env_file)
+        shutil.copyfile(TEMPLATES_DIR / ".env.example", env_file)
     
     console.print("\n[green]✓[/] Project files created")
     
@@ -519,9 +766,471 @@ def create(project_name: str):
         border_style="green"
     ))
 
+# Hasura metadata operations applied by `up` and `up:remote`
+_ADD_SOURCE_OP = {
+    "type": "pg_add_source",
+    "args": {
+        "name": "default",
+        "configuration": {
+            "connection_info": {
+                "database_url": {
+                    "from_env": "HASURA_GRAPHQL_DATABASE_URL"
+                },
+                "isolation_level": "read-committed",
+                "use_prepared_statements": True
+            }
+        },
+        "replace_configuration": True
+    }
+}
+
+_TRACK_OPS = [
+    {
+        "type": "pg_track_table",
+        "args": {
+            "source": "default",
+            "schema": "public",
+            "name": "agents"
+        }
+    },
+    {
+        "type": "pg_track_table",
+        "args": {
+            "source": "default",
+            "schema": "public",
+            "name": "memories"
+        }
+    },
+    {
+        "type": "pg_track_table",
+        "args": {
+            "source": "default",
+            "schema": "public",
+            "name": "memory_edges"
+        }
+    },
+    {
+        "type": "pg_track_table",
+        "args": {
+            "source": "default",
+            "schema": "public",
+            "name": "memories_with_similarity"
+        }
+    },
+    {
+        "type": "pg_track_table",
+        "args": {
+            "source": "default",
+            "schema": "public",
+            "name": "search_results_with_similarity"
+        }
+    },
+    {
+        "type": "pg_track_table",
+        "args": {
+            "source": "default",
+            "schema": "public",
+            "name": "entities"
+        }
+    },
+    {
+        "type": "pg_track_table",
+        "args": {
+            "source": "default",
+            "schema": "public",
+            "name": "entity_memory_links"
+        }
+    },
+    {
+        "type": "pg_track_table",
+        "args": {
+            "source": "default",
+            "schema": "public",
+            "name": "workflows"
+        }
+    },
+    {
+        "type": "pg_track_table",
+        "args": {
+            "source": "default",
+            "schema": "public",
+            "name": "content_embeddings"
+        }
+    },
+    {
+        "type": "pg_track_function",
+        "args": {
+            "function": {
+                "schema": "public",
+                "name": "search_memories"
+            },
+            "source": "default",
+            "configuration": {
+                "exposed_as": "query",
+                "arguments": [
+                    {
+                        "name": "args",
+                        "type": "search_memories_args!"
+                    }
+                ]
+            },
+            "comment": "Function for semantic search of memories with similarity scores"
+        }
+    },
+    {
+        "type": "pg_track_function",
+        "args": {
+            "function": {
+                "schema": "public",
+                "name": "search_memories_exact"
+            },
+            "source": "default",
+            "configuration": {
+                "exposed_as": "query",
+                "arguments": [
+                    {
+                        "name": "args",
+                        "type": "search_memories_exact_args!"
+                    }
+                ]
+            },
+            "comment": "Exact semantic search of memories for selective filters"
+        }
+    },
+    {
+        "type": "pg_track_function",
+        "args": {
+            "function": {
+                "schema": "public",
+                "name": "search_memories_and_entities"
+            },
+            "source": "default",
+            "configuration": {
+                "exposed_as": "query"
+            },
+            "comment": "Function for combined semantic search of memories and entities"
+        }
+    },
+    {
+        "type": "pg_create_array_relationship",
+        "args": {
+            "table": {
+                "schema": "public",
+                "name": "agents"
+            },
+            "name": "memories",
+            "source": "default",
+            "using": {
+                "foreign_key_constraint_on": {
+                    "column": "agent_id",
+                    "table": {
+                        "schema": "public",
+                        "name": "memories"
+                    }
+                }
+            }
+        }
+    },
+    {
+        "type": "pg_create_object_relationship",
+        "args": {
+            "table": {
+                "schema": "public",
+                "name": "memories"
+            },
+            "name": "agent",
+            "source": "default",
+            "using": {
+                "foreign_key_constraint_on": "agent_id"
+            }
+        }
+    },
+    {
+        "type": "pg_create_array_relationship",
+        "args": {
+            "table": {
+                "schema": "public",
+                "name": "memories"
+            },
+            "name": "incoming_edges",
+            "source": "default",
+            "using": {
+                "foreign_key_constraint_on": {
+                    "column": "target_memory",
+                    "table": {
+                        "schema": "public",
+                        "name": "memory_edges"
+                    }
+                }
+            }
+        }
+    },
+    {
+        "type": "pg_create_array_relationship",
+        "args": {
+            "table": {
+                "schema": "public",
+                "name": "memories"
+            },
+            "name": "outgoing_edges",
+            "source": "default",
+            "using": {
+                "foreign_key_constraint_on": {
+                    "column": "source_memory",
+                    "table": {
+                        "schema": "public",
+                        "name": "memory_edges"
+                    }
+                }
+            }
+        }
+    },
+    {
+        "type": "pg_create_array_relationship",
+        "args": {
+            "table": {
+                "schema": "public",
+                "name": "memories"
+            },
+            "name": "entity_links",
+            "source": "default",
+            "using": {
+                "foreign_key_constraint_on": {
+                    "column": "memory_id",
+                    "table": {
+                        "schema": "public",
+                        "name": "entity_memory_links"
+                    }
+                }
+            }
+        }
+    },
+    {
+        "type": "pg_create_array_relationship",
+        "args": {
+            "table": {
+                "schema": "public",
+                "name": "entities"
+            },
+            "name": "memory_links",
+            "source": "default",
+            "using": {
+                "foreign_key_constraint_on": {
+                    "column": "entity_id",
+                    "table": {
+                        "schema": "public",
+                        "name": "entity_memory_links"
+                    }
+                }
+            }
+        }
+    },
+    {
+        "type": "pg_create_object_relationship",
+        "args": {
+            "table": {
+                "schema": "public",
+                "name": "entity_memory_links"
+            },
+            "name": "entity",
+            "source": "default",
+            "using": {
+                "foreign_key_constraint_on": "entity_id"
+            }
+        }
+    },
+    {
+        "type": "pg_create_object_relationship",
+        "args": {
+            "table": {
+                "schema": "public",
+                "name": "entity_memory_links"
+            },
+            "name": "memory",
+            "source": "default",
+            "using": {
+                "foreign_key_constraint_on": "memory_id"
+            }
+        }
+    },
+    {
+        "type": "pg_create_object_relationship",
+        "args": {
+            "table": {
+                "schema": "public",
+                "name": "memory_edges"
+            },
+            "name": "source",
+            "source": "default",
+            "using": {
+                "foreign_key_constraint_on": "source_memory"
+            }
+        }
+    },
+    {
+        "type": "pg_create_object_relationship",
+        "args": {
+            "table": {
+                "schema": "public",
+                "name": "memory_edges"
+            },
+            "name": "target",
+            "source": "default",
+            "using": {
+                "foreign_key_constraint_on": "target_memory"
+            }
+        }
+    },
+    {
+        "type": "pg_create_object_relationship",
+        "args": {
+            "table": {
+                "schema": "public",
+                "name": "memories_with_similarity"
+            },
+            "name": "agent",
+            "source": "default",
+            "using": {
+                "manual_configuration": {
+                    "remote_table": {
+                        "schema": "public",
+                        "name": "agents"
+                    },
+                    "column_mapping": {
+                        "agent_id": "id"
+                    }
+                }
+            }
+        }
+    }
+]
+
+def _metadata_bulk_payload(clean: bool = False) -> Dict[str, Any]:
+    """Build one Hasura `bulk` request that sets up all MeshOS metadata."""
+    ops = [{"type": "clear_metadata", "args": {}}] if clean else []
+    ops.append(_ADD_SOURCE_OP)
+    ops.extend(_TRACK_OPS)
+    ops.append({"type": "reload_metadata", "args": {"reload_remote_schemas": True}})
+    return {"type": "bulk", "args": ops}
+
+@functools.lru_cache(maxsize=2)
+def _metadata_bulk_body(clean: bool = False) -> str:
+    """Serialized metadata bulk request; the payload is static, so it is built once."""
+    return _json_dumps(_metadata_bulk_payload(clean))
+
+def _apply_metadata(base_url: str, admin_secret: str, clean: bool = False) -> Optional[str]:
+    """POST the metadata bulk request to Hasura. Returns an error message on failure."""
+    result = subprocess.run(
+        ["curl", "-s", "-X", "POST",
+         "-H", "Content-Type: application/json",
+         "-H", f"X-Hasura-Admin-Secret: {admin_secret}",
+         "-d", "@-",
+         base_url],
+        input=_metadata_bulk_body(clean),
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        return result.stderr or f"curl exited with status {result.returncode}"
+    try:
+        response = _json_loads(result.stdout)
+    except orjson.JSONDecodeError:
+        return f"Could not parse response: {result.stdout}"
+    if isinstance(response, dict) and "error" in response:
+        return _json_dumps(response, indent=True)
+    return None
+
+@functools.lru_cache(maxsize=1)
+def _docker_path() -> str:
+    """Resolve the docker executable once per process."""
+    return shutil.which("docker") or "docker"
+
+def _compose(args: List[str], **kwargs) -> subprocess.CompletedProcess:
+    """Run a `docker compose` subcommand."""
+    return subprocess.run([_docker_path(), "compose", *args], **kwargs)
+
+def _migration_order(migration_dir: Path) -> Tuple[int, str]:
+    """Sort key for migration directories by numeric prefix, so 10_ follows 9_."""
+    prefix = migration_dir.name.split("_", 1)[0]
+    return (int(prefix) if prefix.isdigit() else 0, migration_dir.name)
+
+def _migration_dirs(migrations_dir: Path, reverse: bool = False) -> List[Path]:
+    """Migration directories in the order they should be applied (or rolled back)."""
+    return sorted((d for d in migrations_dir.iterdir() if d.is_dir()), key=_migration_order, reverse=reverse)
+
+class _Deadline:
+    """A timeout with jittered exponential backoff between attempts."""
+
+    def __init__(self, seconds: float, base_delay: float = 0.05, max_delay: float = 1.0):
+        self.expires_at = time.monotonic() + seconds
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.attempt = 0
+
+    def remaining(self) -> float:
+        """Seconds left before the deadline, never negative."""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def next_delay(self) -> float:
+        """Delay before the next attempt, capped by the time remaining."""
+        delay = min(self.max_delay, self.base_delay * 2 ** self.attempt)
+        self.attempt += 1
+        return min(delay * random.uniform(0.5, 1.0), self.remaining())
+
+def _ready_timeout(env_var: str, default: float = 30.0) -> float:
+    """Read a readiness timeout in seconds from the environment."""
+    try:
+        return float(os.getenv(env_var, default))
+    except ValueError:
+        return default
+
+async def _poll_until_ready(probe, timeout: float) -> bool:
+    """Run an async probe with backoff until it succeeds or the deadline passes."""
+    deadline = _Deadline(timeout)
+    while True:
+        try:
+            if await probe():
+                return True
+        except Exception:
+            pass
+        if not deadline.remaining():
+            return False
+        await asyncio.sleep(deadline.next_delay())
+
+async def _wait_postgres() -> bool:
+    """Wait until PostgreSQL accepts connections."""
+    async def probe() -> bool:
+        proc = await asyncio.create_subprocess_exec(
+            _docker_path(), "compose", "exec", "-T", "postgres", "pg_isready", "-U", "postgres",
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.DEVNULL
+        )
+        return await proc.wait() == 0
+    return await _poll_until_ready(probe, _ready_timeout("MESH_OS_PG_READY_TIMEOUT"))
+
+async def _wait_hasura() -> bool:
+    """Wait until Hasura's health endpoint responds."""
+    async def probe() -> bool:
+        proc = await asyncio.create_subprocess_exec(
+            "curl", "-s", "-o", "/dev/null", "-w", "%{http_code}",
+            "-H", f"X-Hasura-Admin-Secret: {os.getenv('HASURA_ADMIN_SECRET', 'meshos')}",
+            "http://localhost:8080/healthz",
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL
+        )
+        stdout, _ = await proc.communicate()
+        return stdout.decode().strip() == "200"
+    return await _poll_until_ready(probe, _ready_timeout("MESH_OS_HASURA_READY_TIMEOUT"))
+
+async def _wait_for_services() -> Tuple[bool, bool]:
+    """Probe PostgreSQL and Hasura concurrently."""
+    postgres_ready, hasura_ready = await asyncio.gather(_wait_postgres(), _wait_hasura())
+    return postgres_ready, hasura_ready
+
 @cli.command()
 def up():
     """Start MeshOS services."""
+    from rich.panel import Panel
     if not Path("docker-compose.yml").exists():
         console.print("[red]Error:[/] docker-compose.yml not found. Are you in a MeshOS project directory?")
         return
@@ -537,10 +1246,13 @@ def up():
     
     with console.status("[bold]Starting MeshOS services...", spinner="dots"):
         # First, ensure everything is stopped and volumes are clean
-        subprocess.run(["docker", "compose", "down", "-v"], capture_output=True)
+        _compose(["down", "-v"], capture_output=True)
         
-        # Start all services and capture output
-        result = subprocess.run(["docker", "compose", "up", "-d"], capture_output=True, text=True)
+        # Start all services and block until their healthchecks pass
+        result = _compose(["up", "-d", "--wait"], capture_output=True, text=True)
+        if result.returncode != 0 and "unknown flag" in result.stderr:
+            # Older Compose releases lack --wait; the readiness probes below cover it
+            result = _compose(["up", "-d"], capture_output=True, text=True)
         if result.returncode != 0:
             console.print("[red]Error starting services:[/]")
             console.print(result.stderr)
@@ -548,79 +1260,51 @@ def up():
     
     # Verify containers are actually running
     with console.status("[bold]Verifying services are running...", spinner="dots"):
-        result = subprocess.run(["docker", "compose", "ps", "--format", "json"], capture_output=True, text=True)
+        # Check if both services are running
+        result = _compose(
+            ["ps", "--services", "--filter", "status=running"],
+            capture_output=True,
+            text=True
+        )
         if result.returncode != 0:
             console.print("[red]Error checking service status:[/]")
             console.print(result.stderr)
             return
-        
-        # Check if both services are running
-        running_services = subprocess.run(
-            ["docker", "compose", "ps", "--services", "--filter", "status=running"],
-            capture_output=True,
-            text=True
-        ).stdout.strip().split('\n')
+        running_services = set(result.stdout.splitlines())
         
         expected_services = {'postgres', 'hasura'}
-        missing_services = expected_services - set(running_services)
+        missing_services = expected_services - running_services
         
         if missing_services:
             console.print(f"[red]Error:[/] The following services failed to start: {', '.join(missing_services)}")
-            console.print("\nContainer logs:")
-            for service in missing_services:
-                console.print(f"\n[bold blue]{service} logs:[/]")
-                subprocess.run(["docker", "compose", "logs", service])
+            console.print(f"\n[bold blue]Container logs ({', '.join(sorted(missing_services))}):[/]")
+            _compose(["logs", *sorted(missing_services)])
             return
     
-    # Wait for services to be ready with better feedback
+    # Confirm readiness; this returns on the first probe when --wait already saw healthy
+    # containers and falls back to polling for projects without healthchecks
     console.print("\n[yellow]Waiting for services to be ready...[/]")
     
-    # Wait for PostgreSQL with timeout
-    with console.status("[bold]Waiting for PostgreSQL...", spinner="dots"):
-        postgres_ready = False
-        for i in range(30):  # Try for 30 seconds
-            try:
-                result = subprocess.run(
-                    ["docker", "compose", "exec", "-T", "postgres", "pg_isready", "-U", "postgres"],
-                    capture_output=True
-                )
-                if result.returncode == 0:
-                    postgres_ready = True
-                    break
-            except Exception as e:
-                pass
-            time.sleep(1)
-        
-        if not postgres_ready:
-            console.print("[red]Error:[/] PostgreSQL failed to become ready in time")
-            console.print("\nPostgreSQL logs:")
-            subprocess.run(["docker", "compose", "logs", "postgres"])
-            return
+    with console.status("[bold]Waiting for PostgreSQL and Hasura...", spinner="dots"):
+        postgres_ready, hasura_ready = asyncio.run(_wait_for_services())
     
-    # Wait for Hasura with timeout
-    with console.status("[bold]Waiting for Hasura...", spinner="dots"):
-        hasura_ready = False
-        for i in range(30):  # Try for 30 seconds
-            try:
-                result = subprocess.run(
-                    ["curl", "-s", "-o", "/dev/null", "-w", "%{http_code}", 
-                     "-H", f"X-Hasura-Admin-Secret: {os.getenv('HASURA_ADMIN_SECRET', 'meshos')}", 
-                     "http://localhost:8080/healthz"],
-                    capture_output=True,
-                    text=True
-                )
-                if result.stdout.strip() == "200":
-                    hasura_ready = True
-                    break
-            except Exception as e:
-                pass
-            time.sleep(1)
-        
-        if not hasura_ready:
-            console.print("[red]Error:[/] Hasura failed to become ready in time")
-            console.print("\nHasura logs:")
-            subprocess.run(["docker", "compose", "logs", "hasura"])
-            return
+    if not postgres_ready:
+        console.print(
+            "[red]Error:[/] PostgreSQL failed to become ready in time "
+            "(set MESH_OS_PG_READY_TIMEOUT to wait longer)"
+        )
+        console.print("\nPostgreSQL logs:")
+        _compose(["logs", "postgres"])
+        return
+    
+    if not hasura_ready:
+        console.print(
+            "[red]Error:[/] Hasura failed to become ready in time "
+            "(set MESH_OS_HASURA_READY_TIMEOUT to wait longer)"
+        )
+        console.print("\nHasura logs:")
+        _compose(["logs", "hasura"])
+        return
     
     # Run database migrations
     console.print("\n[yellow]Running database migrations...[/]")
@@ -633,14 +1317,14 @@ def up():
                 return
             
             # Get all migration directories in order
-            migration_dirs = sorted([d for d in migrations_dir.iterdir() if d.is_dir()])
+            migration_dirs = _migration_dirs(migrations_dir)
             if not migration_dirs:
                 console.print("[red]Error:[/] No migration directories found in", migrations_dir)
                 return
             
             # First create the hdb_catalog schema if it doesn't exist
-            schema_result = subprocess.run(
-                ["docker", "compose", "exec", "-T", "postgres", "psql", "-U", "postgres", "-d", "mesh_os", "-c", 
+            schema_result = _compose(
+                ["exec", "-T", "postgres", "psql", "-U", "postgres", "-d", "mesh_os", "-c", 
                  "CREATE SCHEMA IF NOT EXISTS hdb_catalog;"],
                 check=True,
                 capture_output=True,
@@ -662,15 +1346,15 @@ def up():
                 console.print("[blue]Migration SQL preview:[/]")
                 console.print(migration_file.read_text())
                 
-                # Run the migration
-                result = subprocess.run(
-                    ["docker", "compose", "exec", "-T", "postgres", "psql", "-U", "postgres", "-d", "mesh_os", 
-                     "-v", "ON_ERROR_STOP=1", "-a"],
-                    input=migration_file.read_text(),
-                    shell=False,
-                    capture_output=True,
-                    text=True
-                )
+                # Run the migration; psql reads the file as its stdin, so nothing is buffered in Python
+                with migration_file.open("rb") as sql_file:
+                    result = _compose(
+                        ["exec", "-T", "postgres", "psql", "-U", "postgres", "-d", "mesh_os", 
+                         "-v", "ON_ERROR_STOP=1", "-a"],
+                        stdin=sql_file,
+                        capture_output=True,
+                        text=True
+                    )
                 
                 # Always show the output for debugging
                 if result.stdout:
@@ -686,8 +1370,8 @@ def up():
                     return
             
             # Verify the search_memories function was created with the latest version
-            verify_result = subprocess.run(
-                ["docker", "compose", "exec", "-T", "postgres", "psql", "-U", "postgres", "-d", "mesh_os", "-c",
+            verify_result = _compose(
+                ["exec", "-T", "postgres", "psql", "-U", "postgres", "-d", "mesh_os", "-c",
                  "SELECT proname, proargnames FROM pg_proc WHERE proname = 'search_memories';"],
                 capture_output=True,
                 text=True
@@ -698,8 +1382,8 @@ def up():
                 console.print("[blue]Attempting to verify what went wrong...[/]")
                 
                 # Check if the function exists with different parameters
-                check_func = subprocess.run(
-                    ["docker", "compose", "exec", "-T", "postgres", "psql", "-U", "postgres", "-d", "mesh_os", "-c",
+                check_func = _compose(
+                    ["exec", "-T", "postgres", "psql", "-U", "postgres", "-d", "mesh_os", "-c",
                      "\\df search_memories"],
                     capture_output=True,
                     text=True
@@ -715,388 +1399,14 @@ def up():
         with console.status("[bold]Applying Hasura metadata...", spinner="dots"):
             metadata_dir = Path("hasura/metadata")
             if metadata_dir.exists():
-                # Clear existing metadata
-                result = subprocess.run(
-                    ["curl", "-s", "-X", "POST", 
-                     "-H", "Content-Type: application/json",
-                     "-H", f"X-Hasura-Admin-Secret: {os.getenv('HASURA_ADMIN_SECRET', 'meshos')}",
-                     "-d", '{"type":"clear_metadata","args":{}}',
-                     "http://localhost:8080/v1/metadata"],
-                    capture_output=True,
-                    text=True
-                )
-                if result.returncode != 0:
-                    console.print("[red]Error clearing metadata:[/]", result.stderr)
-                    return
-
-                # Create the default source
-                source_payload = {
-                    "type": "pg_add_source",
-                    "args": {
-                        "name": "default",
-                        "configuration": {
-                            "connection_info": {
-                                "database_url": {
-                                    "from_env": "HASURA_GRAPHQL_DATABASE_URL"
-                                },
-                                "isolation_level": "read-committed",
-                                "use_prepared_statements": True
-                            }
-                        }
-                    }
-                }
-                
-                result = subprocess.run(
-                    ["curl", "-s", "-X", "POST",
-                     "-H", "Content-Type: application/json",
-                     "-H", f"X-Hasura-Admin-Secret: {os.getenv('HASURA_ADMIN_SECRET', 'meshos')}",
-                     "-d", json.dumps(source_payload),
-                     "http://localhost:8080/v1/metadata"],
-                    capture_output=True,
-                    text=True
-                )
-                
-                # Print the response for debugging
-                if result.stdout:
-                    try:
-                        response = json.loads(result.stdout)
-                        if "error" in response and "already exists" not in response.get("error", ""):
-                            console.print("[red]Error creating source:[/]", json.dumps(response, indent=2))
-                            return
-                    except json.JSONDecodeError:
-                        console.print("[red]Error parsing response:[/]", result.stdout)
-                        return
-                
-                # Track specific tables and set up relationships
-                track_tables_payload = {
-                    "type": "bulk",
-                    "args": [
-                        {
-                            "type": "pg_track_table",
-                            "args": {
-                                "source": "default",
-                                "schema": "public",
-                                "name": "agents"
-                            }
-                        },
-                        {
-                            "type": "pg_track_table",
-                            "args": {
-                                "source": "default",
-                                "schema": "public",
-                                "name": "memories"
-                            }
-                        },
-                        {
-                            "type": "pg_track_table",
-                            "args": {
-                                "source": "default",
-                                "schema": "public",
-                                "name": "memory_edges"
-                            }
-                        },
-                        {
-                            "type": "pg_track_table",
-                            "args": {
-                                "source": "default",
-                                "schema": "public",
-                                "name": "memories_with_similarity"
-                            }
-                        },
-                        {
-                            "type": "pg_track_table",
-                            "args": {
-                                "source": "default",
-                                "schema": "public",
-                                "name": "search_results_with_similarity"
-                            }
-                        },
-                        {
-                            "type": "pg_track_table",
-                            "args": {
-                                "source": "default",
-                                "schema": "public",
-                                "name": "entities"
-                            }
-                        },
-                        {
-                            "type": "pg_track_table",
-                            "args": {
-                                "source": "default",
-                                "schema": "public",
-                                "name": "entity_memory_links"
-                            }
-                        },
-                        {
-                            "type": "pg_track_table",
-                            "args": {
-                                "source": "default",
-                                "schema": "public",
-                                "name": "workflows"
-                            }
-                        },
-                        {
-                            "type": "pg_track_function",
-                            "args": {
-                                "function": {
-                                    "schema": "public",
-                                    "name": "search_memories"
-                                },
-                                "source": "default",
-                                "configuration": {
-                                    "exposed_as": "query",
-                                    "arguments": [
-                                        {
-                                            "name": "args",
-                                            "type": "search_memories_args!"
-                                        }
-                                    ]
-                                },
-                                "comment": "Function for semantic search of memories with similarity scores"
-                            }
-                        },
-                        {
-                            "type": "pg_track_function",
-                            "args": {
-                                "function": {
-                                    "schema": "public",
-                                    "name": "search_memories_and_entities"
-                                },
-                                "source": "default",
-                                "configuration": {
-                                    "exposed_as": "query"
-                                },
-                                "comment": "Function for combined semantic search of memories and entities"
-                            }
-                        },
-                        {
-                            "type": "pg_create_array_relationship",
-                            "args": {
-                                "table": {
-                                    "schema": "public",
-                                    "name": "agents"
-                                },
-                                "name": "memories",
-                                "source": "default",
-                                "using": {
-                                    "foreign_key_constraint_on": {
-                                        "column": "agent_id",
-                                        "table": {
-                                            "schema": "public",
-                                            "name": "memories"
-                                        }
-                                    }
-                                }
-                            }
-                        },
-                        {
-                            "type": "pg_create_object_relationship",
-                            "args": {
-                                "table": {
-                                    "schema": "public",
-                                    "name": "memories"
-                                },
-                                "name": "agent",
-                                "source": "default",
-                                "using": {
-                                    "foreign_key_constraint_on": "agent_id"
-                                }
-                            }
-                        },
-                        {
-                            "type": "pg_create_array_relationship",
-                            "args": {
-                                "table": {
-                                    "schema": "public",
-                                    "name": "memories"
-                                },
-                                "name": "incoming_edges",
-                                "source": "default",
-                                "using": {
-                                    "foreign_key_constraint_on": {
-                                        "column": "target_memory",
-                                        "table": {
-                                            "schema": "public",
-                                            "name": "memory_edges"
-                                        }
-                                    }
-                                }
-                            }
-                        },
-                        {
-                            "type": "pg_create_array_relationship",
-                            "args": {
-                                "table": {
-                                    "schema": "public",
-                                    "name": "memories"
-                                },
-                                "name": "outgoing_edges",
-                                "source": "default",
-                                "using": {
-                                    "foreign_key_constraint_on": {
-                                        "column": "source_memory",
-                                        "table": {
-                                            "schema": "public",
-                                            "name": "memory_edges"
-                                        }
-                                    }
-                                }
-                            }
-                        },
-                        {
-                            "type": "pg_create_array_relationship",
-                            "args": {
-                                "table": {
-                                    "schema": "public",
-                                    "name": "memories"
-                                },
-                                "name": "entity_links",
-                                "source": "default",
-                                "using": {
-                                    "foreign_key_constraint_on": {
-                                        "column": "memory_id",
-                                        "table": {
-                                            "schema": "public",
-                                            "name": "entity_memory_links"
-                                        }
-                                    }
-                                }
-                            }
-                        },
-                        {
-                            "type": "pg_create_array_relationship",
-                            "args": {
-                                "table": {
-                                    "schema": "public",
-                                    "name": "entities"
-                                },
-                                "name": "memory_links",
-                                "source": "default",
-                                "using": {
-                                    "foreign_key_constraint_on": {
-                                        "column": "entity_id",
-                                        "table": {
-                                            "schema": "public",
-                                            "name": "entity_memory_links"
-                                        }
-                                    }
-                                }
-                            }
-                        },
-                        {
-                            "type": "pg_create_object_relationship",
-                            "args": {
-                                "table": {
-                                    "schema": "public",
-                                    "name": "entity_memory_links"
-                                },
-                                "name": "entity",
-                                "source": "default",
-                                "using": {
-                                    "foreign_key_constraint_on": "entity_id"
-                                }
-                            }
-                        },
-                        {
-                            "type": "pg_create_object_relationship",
-                            "args": {
-                                "table": {
-                                    "schema": "public",
-                                    "name": "entity_memory_links"
-                                },
-                                "name": "memory",
-                                "source": "default",
-                                "using": {
-                                    "foreign_key_constraint_on": "memory_id"
-                                }
-                            }
-                        },
-                        {
-                            "type": "pg_create_object_relationship",
-                            "args": {
-                                "table": {
-                                    "schema": "public",
-                                    "name": "memory_edges"
-                                },
-                                "name": "source",
-                                "source": "default",
-                                "using": {
-                                    "foreign_key_constraint_on": "source_memory"
-                                }
-                            }
-                        },
-                        {
-                            "type": "pg_create_object_relationship",
-                            "args": {
-                                "table": {
-                                    "schema": "public",
-                                    "name": "memory_edges"
-                                },
-                                "name": "target",
-                                "source": "default",
-                                "using": {
-                                    "foreign_key_constraint_on": "target_memory"
-                                }
-                            }
-                        },
-                        {
-                            "type": "pg_create_object_relationship",
-                            "args": {
-                                "table": {
-                                    "schema": "public",
-                                    "name": "memories_with_similarity"
-                                },
-                                "name": "agent",
-                                "source": "default",
-                                "using": {
-                                    "manual_configuration": {
-                                        "remote_table": {
-                                            "schema": "public",
-                                            "name": "agents"
-                                        },
-                                        "column_mapping": {
-                                            "agent_id": "id"
-                                        }
-                                    }
-                                }
-                            }
-                        }
-                    ]
-                }
-                
-                result = subprocess.run(
-                    ["curl", "-s", "-X", "POST",
-                     "-H", "Content-Type: application/json",
-                     "-H", f"X-Hasura-Admin-Secret: {os.getenv('HASURA_ADMIN_SECRET', 'meshos')}",
-                     "-d", json.dumps(track_tables_payload),
-                     "http://localhost:8080/v1/metadata"],
-                    capture_output=True,
-                    text=True
-                )
-                
-                # Print the response for debugging
-                if result.stdout:
-                    try:
-                        response = json.loads(result.stdout)
-                        if "error" in response and not all(e in response.get("error", "") for e in ["already exists", "already tracked"]):
-                            console.print("[red]Error tracking tables:[/]", json.dumps(response, indent=2))
-                            return
-                    except json.JSONDecodeError:
-                        console.print("[red]Error parsing response:[/]", result.stdout)
-                        return
-                
-                # Reload metadata
-                result = subprocess.run(
-                    ["curl", "-s", "-X", "POST",
-                     "-H", "Content-Type: application/json",
-                     "-H", f"X-Hasura-Admin-Secret: {os.getenv('HASURA_ADMIN_SECRET', 'meshos')}",
-                     "-d", '{"type":"reload_metadata","args":{"reload_remote_schemas":true}}',
-                     "http://localhost:8080/v1/metadata"],
-                    capture_output=True,
-                    text=True
+                # Clear, add the source, track tables and reload in a single request
+                error = _apply_metadata(
+                    "http://localhost:8080/v1/metadata",
+                    os.getenv('HASURA_ADMIN_SECRET', 'meshos'),
+                    clean=True
                 )
-                if result.returncode != 0:
-                    console.print("[red]Error reloading metadata:[/]", result.stderr)
+                if error:
+                    console.print("[red]Error applying metadata:[/]", error)
                     return
                 
                 console.print("[green]✓[/] Hasura metadata applied successfully")
@@ -1124,6 +1434,7 @@ def up():
 @cli.command()
 def down():
     """Roll back MeshOS services and migrations."""
+    from rich.panel import Panel
     if not Path("docker-compose.yml").exists():
         console.print("[red]Error:[/] docker-compose.yml not found. Are you in a MeshOS project directory?")
         return
@@ -1137,7 +1448,7 @@ def down():
             migrations_dir = Path("hasura/migrations/default")
             if migrations_dir.exists():
                 # Get all migration directories in reverse order
-                migration_dirs = sorted([d for d in migrations_dir.iterdir() if d.is_dir()], reverse=True)
+                migration_dirs = _migration_dirs(migrations_dir, reverse=True)
                 
                 for migration_dir in migration_dirs:
                     down_file = migration_dir / "down.sql"
@@ -1149,15 +1460,15 @@ def down():
                     console.print("[blue]Rollback SQL preview:[/]")
                     console.print(down_file.read_text())
                     
-                    # Run the rollback
-                    result = subprocess.run(
-                        ["docker", "compose", "exec", "-T", "postgres", "psql", "-U", "postgres", "-d", "mesh_os", 
-                         "-v", "ON_ERROR_STOP=1", "-a"],
-                        input=down_file.read_text(),
-                        shell=False,
-                        capture_output=True,
-                        text=True
-                    )
+                    # Run the rollback; psql reads the file as its stdin, so nothing is buffered in Python
+                    with down_file.open("rb") as sql_file:
+                        result = _compose(
+                            ["exec", "-T", "postgres", "psql", "-U", "postgres", "-d", "mesh_os", 
+                             "-v", "ON_ERROR_STOP=1", "-a"],
+                            stdin=sql_file,
+                            capture_output=True,
+                            text=True
+                        )
                     
                     # Always show the output for debugging
                     if result.stdout:
@@ -1176,7 +1487,7 @@ def down():
         
         # Stop all services
         with console.status("[bold]Stopping services...", spinner="dots"):
-            subprocess.run(["docker", "compose", "down", "-v"], capture_output=True)
+            _compose(["down", "-v"], capture_output=True)
         
         console.print(Panel(
             "[green]✓[/] Services stopped and migrations rolled back successfully!",
@@ -1195,6 +1506,7 @@ def down():
 @click.option("--clean", is_flag=True, help="Clear existing metadata before deploying")
 def remote_up(url: str, admin_secret: str, clean: bool):
     """Deploy metadata and migrations to an external Hasura instance."""
+    from rich.panel import Panel
     if not Path("hasura/metadata").exists():
         console.print("[red]Error:[/] No Hasura metadata directory found. Are you in a MeshOS project directory?")
         return
@@ -1216,405 +1528,24 @@ def remote_up(url: str, admin_secret: str, clean: bool):
             )
             
             try:
-                response = json.loads(result.stdout)
+                response = _json_loads(result.stdout)
                 if "version" in response:
                     console.print(f"[green]✓[/] Connected to Hasura version: {response['version']}")
                 else:
                     console.print("[red]Error:[/] Invalid response from Hasura instance")
                     console.print(f"Response: {result.stdout}")
                     return
-            except json.JSONDecodeError:
+            except orjson.JSONDecodeError:
                 console.print("[red]Error:[/] Could not connect to Hasura instance")
                 console.print(f"Response: {result.stdout}")
                 if result.stderr:
                     console.print(f"Error details: {result.stderr}")
                 return
 
-        # Clear existing metadata if requested
-        if clean:
-            with console.status("[bold]Clearing existing metadata...", spinner="dots"):
-                result = subprocess.run(
-                    ["curl", "-s", "-X", "POST",
-                     "-H", "Content-Type: application/json",
-                     "-H", f"X-Hasura-Admin-Secret: {admin_secret}",
-                     "-d", '{"type":"clear_metadata","args":{}}',
-                     base_url],
-                    capture_output=True,
-                    text=True
-                )
-                if result.returncode != 0:
-                    console.print("[red]Error clearing metadata:[/]", result.stderr)
-                    return
-
-        # Create the default source
-        with console.status("[bold]Setting up database source...", spinner="dots"):
-            source_payload = {
-                "type": "pg_add_source",
-                "args": {
-                    "name": "default",
-                    "configuration": {
-                        "connection_info": {
-                            "database_url": {
-                                "from_env": "HASURA_GRAPHQL_DATABASE_URL"
-                            },
-                            "isolation_level": "read-committed",
-                            "use_prepared_statements": True
-                        }
-                    }
-                }
-            }
-
-            result = subprocess.run(
-                ["curl", "-s", "-X", "POST",
-                 "-H", "Content-Type: application/json",
-                 "-H", f"X-Hasura-Admin-Secret: {admin_secret}",
-                 "-d", json.dumps(source_payload),
-                 base_url],
-                capture_output=True,
-                text=True
-            )
-
-            if result.stdout:
-                try:
-                    response = json.loads(result.stdout)
-                    if "error" in response and "already exists" not in response.get("error", ""):
-                        console.print("[red]Error creating source:[/]", json.dumps(response, indent=2))
-                        return
-                except json.JSONDecodeError:
-                    console.print("[red]Error parsing response:[/]", result.stdout)
-                    return
-
-        # Track tables and set up relationships
-        with console.status("[bold]Setting up tables and relationships...", spinner="dots"):
-            track_tables_payload = {
-                "type": "bulk",
-                "args": [
-                    {
-                        "type": "pg_track_table",
-                        "args": {
-                            "source": "default",
-                            "schema": "public",
-                            "name": "agents"
-                        }
-                    },
-                    {
-                        "type": "pg_track_table",
-                        "args": {
-                            "source": "default",
-                            "schema": "public",
-                            "name": "memories"
-                        }
-                    },
-                    {
-                        "type": "pg_track_table",
-                        "args": {
-                            "source": "default",
-                            "schema": "public",
-                            "name": "memory_edges"
-                        }
-                    },
-                    {
-                        "type": "pg_track_table",
-                        "args": {
-                            "source": "default",
-                            "schema": "public",
-                            "name": "memories_with_similarity"
-                        }
-                    },
-                    {
-                        "type": "pg_track_table",
-                        "args": {
-                            "source": "default",
-                            "schema": "public",
-                            "name": "search_results_with_similarity"
-                        }
-                    },
-                    {
-                        "type": "pg_track_table",
-                        "args": {
-                            "source": "default",
-                            "schema": "public",
-                            "name": "entities"
-                        }
-                    },
-                    {
-                        "type": "pg_track_table",
-                        "args": {
-                            "source": "default",
-                            "schema": "public",
-                            "name": "entity_memory_links"
-                        }
-                    },
-                    {
-                        "type": "pg_track_table",
-                        "args": {
-                            "source": "default",
-                            "schema": "public",
-                            "name": "workflows"
-                        }
-                    },
-                    {
-                        "type": "pg_track_function",
-                        "args": {
-                            "function": {
-                                "schema": "public",
-                                "name": "search_memories"
-                            },
-                            "source": "default",
-                            "configuration": {
-                                "exposed_as": "query",
-                                "arguments": [
-                                    {
-                                        "name": "args",
-                                        "type": "search_memories_args!"
-                                    }
-                                ]
-                            },
-                            "comment": "Function for semantic search of memories with similarity scores"
-                        }
-                    },
-                    {
-                        "type": "pg_track_function",
-                        "args": {
-                            "function": {
-                                "schema": "public",
-                                "name": "search_memories_and_entities"
-                            },
-                            "source": "default",
-                            "configuration": {
-                                "exposed_as": "query"
-                            },
-                            "comment": "Function for combined semantic search of memories and entities"
-                        }
-                    },
-                    {
-                        "type": "pg_create_array_relationship",
-                        "args": {
-                            "table": {
-                                "schema": "public",
-                                "name": "agents"
-                            },
-                            "name": "memories",
-                            "source": "default",
-                            "using": {
-                                "foreign_key_constraint_on": {
-                                    "column": "agent_id",
-                                    "table": {
-                                        "schema": "public",
-                                        "name": "memories"
-                                    }
-                                }
-                            }
-                        }
-                    },
-                    {
-                        "type": "pg_create_object_relationship",
-                        "args": {
-                            "table": {
-                                "schema": "public",
-                                "name": "memories"
-                            },
-                            "name": "agent",
-                            "source": "default",
-                            "using": {
-                                "foreign_key_constraint_on": "agent_id"
-                            }
-                        }
-                    },
-                    {
-                        "type": "pg_create_array_relationship",
-                        "args": {
-                            "table": {
-                                "schema": "public",
-                                "name": "memories"
-                            },
-                            "name": "incoming_edges",
-                            "source": "default",
-                            "using": {
-                                "foreign_key_constraint_on": {
-                                    "column": "target_memory",
-                                    "table": {
-                                        "schema": "public",
-                                        "name": "memory_edges"
-                                    }
-                                }
-                            }
-                        }
-                    },
-                    {
-                        "type": "pg_create_array_relationship",
-                        "args": {
-                            "table": {
-                                "schema": "public",
-                                "name": "memories"
-                            },
-                            "name": "outgoing_edges",
-                            "source": "default",
-                            "using": {
-                                "foreign_key_constraint_on": {
-                                    "column": "source_memory",
-                                    "table": {
-                                        "schema": "public",
-                                        "name": "memory_edges"
-                                    }
-                                }
-                            }
-                        }
-                    },
-                    {
-                        "type": "pg_create_array_relationship",
-                        "args": {
-                            "table": {
-                                "schema": "public",
-                                "name": "memories"
-                            },
-                            "name": "entity_links",
-                            "source": "default",
-                            "using": {
-                                "foreign_key_constraint_on": {
-                                    "column": "memory_id",
-                                    "table": {
-                                        "schema": "public",
-                                        "name": "entity_memory_links"
-                                    }
-                                }
-                            }
-                        }
-                    },
-                    {
-                        "type": "pg_create_array_relationship",
-                        "args": {
-                            "table": {
-                                "schema": "public",
-                                "name": "entities"
-                            },
-                            "name": "memory_links",
-                            "source": "default",
-                            "using": {
-                                "foreign_key_constraint_on": {
-                                    "column": "entity_id",
-                                    "table": {
-                                        "schema": "public",
-                                        "name": "entity_memory_links"
-                                    }
-                                }
-                            }
-                        }
-                    },
-                    {
-                        "type": "pg_create_object_relationship",
-                        "args": {
-                            "table": {
-                                "schema": "public",
-                                "name": "entity_memory_links"
-                            },
-                            "name": "entity",
-                            "source": "default",
-                            "using": {
-                                "foreign_key_constraint_on": "entity_id"
-                            }
-                        }
-                    },
-                    {
-                        "type": "pg_create_object_relationship",
-                        "args": {
-                            "table": {
-                                "schema": "public",
-                                "name": "entity_memory_links"
-                            },
-                            "name": "memory",
-                            "source": "default",
-                            "using": {
-                                "foreign_key_constraint_on": "memory_id"
-                            }
-                        }
-                    },
-                    {
-                        "type": "pg_create_object_relationship",
-                        "args": {
-                            "table": {
-                                "schema": "public",
-                                "name": "memory_edges"
-                            },
-                            "name": "source",
-                            "source": "default",
-                            "using": {
-                                "foreign_key_constraint_on": "source_memory"
-                            }
-                        }
-                    },
-                    {
-                        "type": "pg_create_object_relationship",
-                        "args": {
-                            "table": {
-                                "schema": "public",
-                                "name": "memory_edges"
-                            },
-                            "name": "target",
-                            "source": "default",
-                            "using": {
-                                "foreign_key_constraint_on": "target_memory"
-                            }
-                        }
-                    },
-                    {
-                        "type": "pg_create_object_relationship",
-                        "args": {
-                            "table": {
-                                "schema": "public",
-                                "name": "memories_with_similarity"
-                            },
-                            "name": "agent",
-                            "source": "default",
-                            "using": {
-                                "manual_configuration": {
-                                    "remote_table": {
-                                        "schema": "public",
-                                        "name": "agents"
-                                    },
-                                    "column_mapping": {
-                                        "agent_id": "id"
-                                    }
-                                }
-                            }
-                        }
-                    }
-                ]
-            }
-
-            result = subprocess.run(
-                ["curl", "-s", "-X", "POST",
-                 "-H", "Content-Type: application/json",
-                 "-H", f"X-Hasura-Admin-Secret: {admin_secret}",
-                 "-d", json.dumps(track_tables_payload),
-                 base_url],
-                capture_output=True,
-                text=True
-            )
-
-            if result.stdout:
-                try:
-                    response = json.loads(result.stdout)
-                    if "error" in response and not all(e in response.get("error", "") for e in ["already exists", "already tracked"]):
-                        console.print("[red]Error tracking tables:[/]", json.dumps(response, indent=2))
-                        return
-                except json.JSONDecodeError:
-                    console.print("[red]Error parsing response:[/]", result.stdout)
-                    return
-
-        # Reload metadata
-        with console.status("[bold]Reloading metadata...", spinner="dots"):
-            result = subprocess.run(
-                ["curl", "-s", "-X", "POST",
-                 "-H", "Content-Type: application/json",
-                 "-H", f"X-Hasura-Admin-Secret: {admin_secret}",
-                 "-d", '{"type":"reload_metadata","args":{"reload_remote_schemas":true}}',
-                 base_url],
-                capture_output=True,
-                text=True
-            )
-            if result.returncode != 0:
-                console.print("[red]Error reloading metadata:[/]", result.stderr)
+        with console.status("[bold]Applying metadata...", spinner="dots"):
+            error = _apply_metadata(base_url, admin_secret, clean=clean)
+            if error:
+                console.print("[red]Error applying metadata:[/]", error)
                 return
 
         console.print(Panel(
@@ -2,11 +2,51 @@
 Core functionality for MeshOS.
 """
 
-from mesh_os.core.client import Agent, Memory, MemoryEdge, MeshOS
-from mesh_os.core.taxonomy import (ActivitySubtype, DataType, DecisionSubtype,
-                                  EdgeMetadata, EdgeType, KnowledgeSubtype,
-                                  MediaSubtype, MemoryMetadata, RelevanceTag,
-                                  VersionInfo)
+import importlib
+from typing import TYPE_CHECKING, Any, List
+
+if TYPE_CHECKING:
+    from mesh_os.core.async_client import AsyncMeshOS
+    from mesh_os.core.client import (Agent, AuthError, ContentTooLongError, GraphQLError, Memory,
+                                     MemoryEdge, MeshOS)
+    from mesh_os.core.taxonomy import (ActivitySubtype, DataType, DecisionSubtype,
+                                      EdgeMetadata, EdgeType, KnowledgeSubtype,
+                                      MediaSubtype, MemoryMetadata, RelevanceTag,
+                                      VersionInfo)
+
+# Public names are imported on first access (PEP 562) so `import mesh_os.core`
+# does not pay for openai, requests and pydantic until they are needed. The
+# top-level mesh_os package re-exports these names through this table.
+_LAZY_IMPORTS = {
+    "Agent": "mesh_os.core.client",
+    "Memory": "mesh_os.core.client",
+    "MemoryEdge": "mesh_os.core.client",
+    "MeshOS": "mesh_os.core.client",
+    "AsyncMeshOS": "mesh_os.core.async_client",
+    "AuthError": "mesh_os.core.client",
+    "ContentTooLongError": "mesh_os.core.client",
+    "GraphQLError": "mesh_os.core.client",
+    "ActivitySubtype": "mesh_os.core.taxonomy",
+    "DataType": "mesh_os.core.taxonomy",
+    "DecisionSubtype": "mesh_os.core.taxonomy",
+    "EdgeMetadata": "mesh_os.core.taxonomy",
+    "EdgeType": "mesh_os.core.taxonomy",
+    "KnowledgeSubtype": "mesh_os.core.taxonomy",
+    "MediaSubtype": "mesh_os.core.taxonomy",
+    "MemoryMetadata": "mesh_os.core.taxonomy",
+    "RelevanceTag": "mesh_os.core.taxonomy",
+    "VersionInfo": "mesh_os.core.taxonomy",
+}
+
+def __getattr__(name: str) -> Any:
+    if name in _LAZY_IMPORTS:
+        value = getattr(importlib.import_module(_LAZY_IMPORTS[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(_LAZY_IMPORTS))
 
 __all__ = [
     # Client classes
@@ -14,6 +54,12 @@ __all__ = [
     "Memory",
     "MemoryEdge",
     "MeshOS",
+    "AsyncMeshOS",
+    
+    # Errors
+    "AuthError",
+    "ContentTooLongError",
+    "GraphQLError",
     
     # Taxonomy models
     "DataType",
@@ -0,0 +1,204 @@
+"""
+Asynchronous client for MeshOS.
+"""
+import asyncio
+import gzip
+import os
+from array import array
+from typing import Dict, List, Optional, Union
+
+import httpx
+import openai
+import orjson
+
+from mesh_os.core.client import (
+    _AUTH_ERROR_MESSAGE,
+    _GZIP_HEADERS,
+    FORGET_MUTATION,
+    REMEMBER_MUTATION,
+    SEARCH_MEMORIES_QUERY,
+    SEARCH_MEMORIES_QUERY_WITHOUT_EMBEDDING,
+    AuthError,
+    GraphQLError,
+    Memory,
+    _decode_embedding,
+    _graphql_body,
+    _memory_from_row,
+    _search_args,
+    _vector_literal,
+)
+from mesh_os.core.taxonomy import DataType, KnowledgeSubtype, MemoryMetadata
+
+
+class AsyncMeshOS:
+    """Async MeshOS client for running many memory operations concurrently.
+
+    Covers the hot paths of MeshOS (remember, recall, forget). Embedding and
+    GraphQL requests are awaited, so independent calls can be overlapped with
+    asyncio.gather or remember_many().
+    """
+
+    GZIP_MIN_BYTES = 4096  # Smallest request body compressed when compress_requests is set
+    OPENAI_TIMEOUT = 30.0  # Seconds per OpenAI request
+    OPENAI_MAX_RETRIES = 5  # Retries with exponential backoff for rate limits, timeouts and connection errors
+
+    def __init__(
+        self,
+        url: str = "http://localhost:8080",
+        api_key: str = "meshos",
+        openai_api_key: Optional[str] = None,
+        max_concurrency: int = 32,
+        http2: bool = False,
+        compress_requests: bool = False
+    ):
+        """Initialize the async MeshOS client.
+
+        Set http2 to multiplex concurrent requests over one connection; it
+        requires the http2 extra (h2). compress_requests behaves as in MeshOS.
+        """
+        self.url = f"{url}/v1/graphql"
+        self.headers = {
+            "Content-Type": "application/json",
+            "Accept-Encoding": "gzip",
+            "x-hasura-admin-secret": api_key
+        }
+        self.compress_requests = compress_requests
+
+        openai_api_key = openai_api_key or os.getenv("OPENAI_API_KEY")
+        if not openai_api_key:
+            raise ValueError("OpenAI API key is required")
+
+        self.openai = openai.AsyncOpenAI(
+            api_key=openai_api_key,
+            timeout=self.OPENAI_TIMEOUT,
+            max_retries=self.OPENAI_MAX_RETRIES
+        )
+        self._http = httpx.AsyncClient(
+            headers=self.headers,
+            http2=http2,
+            limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+            timeout=30
+        )
+        self.max_concurrency = max_concurrency
+
+    async def aclose(self) -> None:
+        """Close the underlying HTTP connections."""
+        await self._http.aclose()
+        await self.openai.close()
+
+    async def __aenter__(self) -> "AsyncMeshOS":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def _execute_query(self, query: str, variables: Optional[Dict] = None) -> Dict:
+        """Execute a GraphQL query."""
+        body = _graphql_body(query, variables)
+        headers = None
+        if self.compress_requests and len(body) >= self.GZIP_MIN_BYTES:
+            body = gzip.compress(body, compresslevel=1)
+            headers = _GZIP_HEADERS
+        response = await self._http.post(self.url, content=body, headers=headers)
+        if response.status_code == 401:
+            raise AuthError(_AUTH_ERROR_MESSAGE, response=response)
+        response.raise_for_status()
+        result = orjson.loads(response.content)
+
+        if "errors" in result:
+            error_msg = result["errors"][0]["message"]
+            raise GraphQLError(error_msg)
+
+        return result
+
+    async def _create_embedding(self, text: str) -> array:
+        """Create a float32 embedding for the given text."""
+        response = await self.openai.embeddings.create(
+            model="text-embedding-3-small",
+            input=text,
+            encoding_format="base64"
+        )
+        return _decode_embedding(response.data[0].embedding)
+
+    async def remember(
+        self,
+        content: str,
+        agent_id: str,
+        metadata: Optional[Union[Dict, MemoryMetadata]] = None,
+        expires_at: Optional[str] = None
+    ) -> Memory:
+        """Store a new memory.
+
+        Unlike MeshOS.remember(), content is stored as a single memory and is
+        not chunked.
+        """
+        if isinstance(metadata, dict):
+            metadata = MemoryMetadata(**metadata)
+        elif metadata is None:
+            metadata = MemoryMetadata(
+                type=DataType.KNOWLEDGE,
+                subtype=KnowledgeSubtype.DATASET,
+                tags=[],
+                version=1
+            )
+
+        embedding = await self._create_embedding(content)
+        result = await self._execute_query(REMEMBER_MUTATION, {
+            "content": content,
+            "agent_id": agent_id,
+            "metadata": metadata.model_dump(),
+            "embedding": _vector_literal(embedding),
+            "expires_at": expires_at
+        })
+        return _memory_from_row(result["data"]["insert_memories_one"], embedding)
+
+    async def remember_many(self, items: List[Dict]) -> List[Memory]:
+        """Store many memories concurrently.
+
+        Args:
+            items: Keyword arguments for remember(), one dict per memory
+
+        Returns:
+            List[Memory]: The stored memories, in the same order as items
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def remember_one(item: Dict) -> Memory:
+            async with semaphore:
+                return await self.remember(**item)
+
+        return list(await asyncio.gather(*(remember_one(item) for item in items)))
+
+    async def recall(
+        self,
+        query: str,
+        agent_id: Optional[str] = None,
+        limit: int = 5,
+        threshold: float = 0.7,
+        metadata_filter: Optional[Dict] = None,
+        created_at_filter: Optional[Dict] = None,
+        expires_at_filter: Optional[Dict] = None,
+        include_embedding: bool = False
+    ) -> List[Memory]:
+        """Search memories by semantic similarity.
+
+        Runs a single search at the given threshold; the adaptive threshold and
+        semantic expansion of MeshOS.recall() are not applied. Embeddings are
+        only returned when include_embedding is True.
+        """
+        embedding = await self._create_embedding(query)
+        args = {
+            **_search_args(agent_id, limit, metadata_filter, created_at_filter, expires_at_filter),
+            "query_embedding": _vector_literal(embedding),
+            "match_threshold": threshold
+        }
+
+        search_query = SEARCH_MEMORIES_QUERY if include_embedding else SEARCH_MEMORIES_QUERY_WITHOUT_EMBEDDING
+        result = await self._execute_query(search_query, {"args": args})
+
+        return [Memory(**m) for m in result["data"]["search_memories"]]
+
+    async def forget(self, memory_id: str) -> bool:
+        """Delete a specific memory."""
+        result = await self._execute_query(FORGET_MUTATION, {"id": memory_id})
+        return bool(result["data"]["delete_memories_by_pk"])
@@ -1,22 +1,351 @@
 """
 Core functionality for MeshOS.
 """
-import json
+import base64
+import functools
+import gzip
+import hashlib
 import os
 import re
+import sys
+import threading
+import time
+from array import array
+from collections import OrderedDict
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Dict, List, Optional, Union
+from typing import Dict, Iterable, List, Optional, Union
 
 import openai
+import orjson
 import requests
-from rich.console import Console
-from rich.panel import Panel
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import tiktoken
+except ImportError:  # Token counts are estimated without tiktoken
+    tiktoken = None
 
 from mesh_os.core.taxonomy import (DataType, EdgeMetadata, EdgeType, MemoryMetadata,
                                   RelevanceTag, VersionInfo, KnowledgeSubtype)
 
-console = Console()
+def _as_float32(values: Iterable[float]) -> array:
+    """Pack embedding values into a compact float32 array."""
+    return array("f", values)
+
+def _decode_embedding(value: Union[str, Iterable[float]]) -> array:
+    """Decode an embedding from the OpenAI API into a float32 array.
+    
+    Embeddings requested with encoding_format="base64" arrive as the raw
+    little-endian float32 buffer; plain float lists are packed as-is.
+    """
+    if isinstance(value, str):
+        embedding = array("f")
+        embedding.frombytes(base64.b64decode(value))
+        if sys.byteorder == "big":
+            embedding.byteswap()
+        return embedding
+    return _as_float32(value)
+
+# 9 significant digits round-trip any float32 value exactly
+_format_float32 = "{:.9g}".format
+
+def _vector_literal(embedding: Iterable[float]) -> str:
+    """Format an embedding as a pgvector literal for GraphQL variables."""
+    return f"[{','.join(map(_format_float32, embedding))}]"
+
+@functools.lru_cache(maxsize=1)
+def _embedding_encoding():
+    """Tokenizer for the embedding model, loaded on first use."""
+    return tiktoken.encoding_for_model("text-embedding-3-small")
+
+def _graphql_body(query: str, variables: Optional[Dict]) -> bytes:
+    """Serialize a GraphQL request, reusing the pre-encoded query prefix."""
+    return _query_body_prefix(query) + orjson.dumps(variables or {}) + b"}"
+
+_GZIP_HEADERS = {"Content-Encoding": "gzip"}
+
+@functools.lru_cache(maxsize=64)
+def _query_body_prefix(query: str) -> bytes:
+    """Serialized request body up to the variables, encoded once per query."""
+    return b'{"query":' + orjson.dumps(query) + b',"variables":'
+
+REGISTER_AGENT_MUTATION = """
+mutation RegisterAgent($name: String!, $description: String!, $metadata: jsonb, $slug: String) {
+  insert_agents_one(object: {
+    name: $name,
+    description: $description,
+    metadata: $metadata,
+    status: "active",
+    slug: $slug
+  }) {
+    id
+    name
+    description
+    metadata
+    status
+    slug
+  }
+}
+"""
+
+GET_AGENT_BY_SLUG_QUERY = """
+query GetAgentBySlug($slug: String!) {
+  agents(where: {slug: {_eq: $slug}}, limit: 1) {
+    id
+    name
+    description
+    metadata
+    status
+    slug
+  }
+}
+"""
+
+UNREGISTER_AGENT_MUTATION = """
+mutation UnregisterAgent($id: uuid!) {
+  delete_agents_by_pk(id: $id) {
+    id
+  }
+}
+"""
+
+GET_AGENT_QUERY = """
+query GetAgent($id: uuid!) {
+  agents_by_pk(id: $id) {
+    id
+    name
+    description
+    metadata
+    status
+    slug
+  }
+}
+"""
+
+UPDATE_AGENT_STATUS_MUTATION = """
+mutation UpdateAgentStatus($id: uuid!, $status: String!) {
+  update_agents_by_pk(
+    pk_columns: {id: $id}, 
+    _set: {status: $status}
+  ) {
+    id
+    name
+    description
+    metadata
+    status
+    slug
+  }
+}
+"""
+
+REMEMBER_MUTATION = """
+mutation Remember($content: String!, $agent_id: uuid!, $metadata: jsonb, $embedding: halfvec!, $expires_at: timestamptz) {
+  insert_memories_one(object: {
+    content: $content,
+    agent_id: $agent_id,
+    metadata: $metadata,
+    embedding: $embedding,
+    expires_at: $expires_at
+  }) {
+    id
+    agent_id
+    content
+    metadata
+    created_at
+    updated_at
+    expires_at
+  }
+}
+"""
+
+BULK_REMEMBER_MUTATION = """
+mutation BulkRemember($objects: [memories_insert_input!]!) {
+  insert_memories(objects: $objects) {
+    returning {
+      id
+      agent_id
+      content
+      metadata
+      created_at
+      updated_at
+      expires_at
+    }
+  }
+}
+"""
+
+GET_CONTENT_EMBEDDINGS_QUERY = """
+query GetContentEmbeddings($hashes: [bytea!]!) {
+  content_embeddings(where: {content_hash: {_in: $hashes}}) {
+    content_hash
+    embedding
+  }
+}
+"""
+
+INSERT_CONTENT_EMBEDDINGS_MUTATION = """
+mutation InsertContentEmbeddings($objects: [content_embeddings_insert_input!]!) {
+  insert_content_embeddings(
+    objects: $objects,
+    on_conflict: {constraint: content_embeddings_pkey, update_columns: []}
+  ) {
+    affected_rows
+  }
+}
+"""
+
+SEARCH_MEMORIES_QUERY = """
+query SearchMemories(
+    $args: search_memories_args!
+) {
+    search_memories(
+        args: $args
+    ) {
+        id
+        agent_id
+        content
+        metadata
+        embedding
+        similarity
+        created_at
+        updated_at
+        expires_at
+    }
+}
+"""
+
+SEARCH_MEMORIES_EXACT_QUERY = """
+query SearchMemoriesExact(
+    $args: search_memories_exact_args!
+) {
+    search_memories: search_memories_exact(
+        args: $args
+    ) {
+        id
+        agent_id
+        content
+        metadata
+        embedding
+        similarity
+        created_at
+        updated_at
+        expires_at
+    }
+}
+"""
+
+COUNT_MEMORIES_QUERY = """
+query CountMemories($where: memories_bool_exp!, $limit: Int!) {
+  memories_aggregate(where: $where, limit: $limit) {
+    aggregate {
+      count
+    }
+  }
+}
+"""
+
+FORGET_MUTATION = """
+mutation Forget($id: uuid!) {
+  delete_memories_by_pk(id: $id) {
+    id
+  }
+}
+"""
+
+LINK_MEMORIES_MUTATION = """
+mutation LinkMemories(
+    $source_memory: uuid!,
+    $target_memory: uuid!,
+    $relationship: String!,
+    $weight: float8!,
+    $metadata: jsonb!
+) {
+    insert_memory_edges_one(object: {
+        source_memory: $source_memory,
+        target_memory: $target_memory,
+        relationship: $relationship,
+        weight: $weight,
+        metadata: $metadata
+    }) {
+        id
+        source_memory
+        target_memory
+        relationship
+        weight
+        created_at
+        metadata
+    }
+}
+"""
+
+UNLINK_MEMORIES_MUTATION = """
+mutation UnlinkMemories($where: memory_edges_bool_exp!) {
+    delete_memory_edges(where: $where) {
+        affected_rows
+    }
+}
+"""
+
+GET_MEMORY_QUERY = """
+query GetMemory($id: uuid!) {
+    memories_by_pk(id: $id) {
+        id
+        agent_id
+        content
+        metadata
+        embedding
+        created_at
+        updated_at
+    }
+}
+"""
+
+GET_CONNECTED_MEMORIES_QUERY = """
+query GetConnectedMemories(
+    $memory_id: uuid!,
+    $relationship: String,
+    $max_depth: Int!
+) {
+    get_connected_memories(
+        memory_id: $memory_id,
+        relationship_type: $relationship,
+        max_depth: $max_depth
+    ) {
+        source_id
+        target_id
+        relationship
+        weight
+        depth
+    }
+}
+"""
+
+def _search_args(
+    agent_id: Optional[str],
+    limit: int,
+    metadata_filter: Optional[Dict],
+    created_at_filter: Optional[Dict],
+    expires_at_filter: Optional[Dict]
+) -> Dict:
+    """Build the search_memories arguments shared by every pass of a recall."""
+    args = {"match_count": limit, "filter_agent_id": agent_id}
+    if metadata_filter:
+        args["metadata_filter"] = metadata_filter
+    if created_at_filter:
+        args["created_at_filter"] = created_at_filter
+    if expires_at_filter:
+        args["expires_at_filter"] = expires_at_filter
+    return args
+
+def _without_embedding(document: str) -> str:
+    """Drop the embedding field from a document's selection set."""
+    return re.sub(r"^[ \t]*embedding\n", "", document, flags=re.MULTILINE)
+
+# Variants for recalls that don't need the stored vectors back
+SEARCH_MEMORIES_QUERY_WITHOUT_EMBEDDING = _without_embedding(SEARCH_MEMORIES_QUERY)
+SEARCH_MEMORIES_EXACT_QUERY_WITHOUT_EMBEDDING = _without_embedding(SEARCH_MEMORIES_EXACT_QUERY)
 
 class InvalidSlugError(Exception):
     """Raised when an invalid slug is provided."""
@@ -39,9 +368,9 @@ class Memory:
     agent_id: str
     content: str
     metadata: MemoryMetadata
-    embedding: List[float]
     created_at: str
     updated_at: str
+    embedding: Optional[List[float]] = None  # Left out of recall() results unless include_embedding=True
     expires_at: Optional[str] = None
     similarity: Optional[float] = None  # Add similarity field
 
@@ -56,32 +385,103 @@ class MemoryEdge:
     created_at: str
     metadata: EdgeMetadata
 
+def _memory_from_row(row: Dict, embedding: array) -> Memory:
+    """Build a Memory from an inserted row and the embedding sent with it.
+    
+    Insert mutations don't echo the embedding back, so the client's copy is
+    attached instead.
+    """
+    row["embedding"] = embedding.tolist()
+    metadata = row["metadata"]
+    if isinstance(metadata, dict):
+        row["metadata"] = MemoryMetadata.model_validate(metadata)
+    return Memory(**row)
+
 class GraphQLError(Exception):
     """Raised when a GraphQL query fails."""
     pass
 
+class ContentTooLongError(ValueError):
+    """Raised when a content string is too long to embed as one memory.
+    
+    index is the content's position in the batch and tokens its token count.
+    """
+    def __init__(self, index: int, tokens: int, limit: int):
+        super().__init__(
+            f"Item {index + 1} has {tokens} tokens, over the {limit}-token embedding limit; "
+            "store it with remember(), which splits it into chunks"
+        )
+        self.index = index
+        self.tokens = tokens
+
+class AuthError(requests.HTTPError):
+    """Raised when Hasura rejects the admin secret (HTTP 401).
+    
+    Subclasses requests.HTTPError, so handlers written for raise_for_status()
+    still catch it; the rejected response is on .response.
+    """
+    pass
+
+_AUTH_ERROR_MESSAGE = "Unauthorized: Hasura rejected the admin secret"
+
 class MeshOS:
     """MeshOS client for interacting with the system."""
-    
+
     SLUG_PATTERN = re.compile(r'^[a-z][a-z0-9_-]*[a-z0-9]$')
-    
+    EMBEDDING_BATCH_SIZE = 2048  # Maximum inputs per embeddings request
+    EMBEDDING_BATCH_TOKENS = 300_000  # Maximum tokens per embeddings request
+    EMBEDDING_MAX_TOKENS = 8192  # Maximum tokens in one embedded text
+    BULK_INSERT_SIZE = 500  # Maximum memories per insert mutation
+    EMBEDDING_MODEL = "text-embedding-3-small"
+    EMBEDDING_CACHE_SIZE = 4096  # Embeddings kept in memory per client
+    RECALL_CACHE_SIZE = 256  # recall() results kept in memory per client
+    RECALL_CACHE_TTL = 60.0  # Seconds before a cached recall() result expires
+    PREFILTER_MAX_ROWS = 10_000  # Filtered recalls matching fewer memories use exact search
+    REQUEST_TIMEOUT = (3.05, 30)  # (connect, read) seconds for Hasura requests
+    REQUEST_RETRIES = 5  # Retries for Hasura connection errors and 429/503 responses
+    OPENAI_TIMEOUT = 30.0  # Seconds per OpenAI request
+    OPENAI_MAX_RETRIES = 5  # Retries with exponential backoff for rate limits, timeouts and connection errors
+    GZIP_MIN_BYTES = 4096  # Smallest request body compressed when compress_requests is set
+
     def __init__(
         self,
         url: str = "http://localhost:8080",
         api_key: str = "meshos",
-        openai_api_key: Optional[str] = None
+        openai_api_key: Optional[str] = None,
+        compress_requests: bool = False,
+        persist_embeddings: bool = False,
+        session: Optional[requests.Session] = None
     ):
-        """Initialize the MeshOS client."""
+        """Initialize the MeshOS client.
+        
+        Responses are always negotiated with gzip. Set compress_requests to
+        also gzip large request bodies; only enable it when Hasura sits
+        behind a proxy that decodes gzip request bodies.
+
+        Set persist_embeddings to share embeddings of stored content through
+        the content_embeddings table, so content ingested again, by this or
+        any other client, is not sent to the embeddings API a second time.
+
+        Pass session to send Hasura requests through your own requests.Session
+        (or any object with its post() and headers). It gets the client's
+        headers but keeps its own adapters, and close() leaves it open.
+        """
         self.url = f"{url}/v1/graphql"
         self.headers = {
             "Content-Type": "application/json",
+            "Accept-Encoding": "gzip",
             "x-hasura-admin-secret": api_key
         }
+        self.compress_requests = compress_requests
+        self.persist_embeddings = persist_embeddings
         
         # Set up OpenAI
         openai_api_key = openai_api_key or os.getenv("OPENAI_API_KEY")
         if not openai_api_key:
-            console.print(Panel(
+            # rich is only imported when there is a warning to show
+            from rich.console import Console
+            from rich.panel import Panel
+            Console().print(Panel(
                 "[yellow]⚠️  OpenAI API key not found![/]\n\n"
                 "Please set your OpenAI API key in the environment:\n"
                 "[green]OPENAI_API_KEY=your-key-here[/]\n\n"
@@ -91,20 +491,65 @@ class MeshOS:
             ))
             raise ValueError("OpenAI API key is required")
         
-        self.openai = openai.OpenAI(api_key=openai_api_key)
-    
+        self.openai = openai.OpenAI(
+            api_key=openai_api_key,
+            timeout=self.OPENAI_TIMEOUT,
+            max_retries=self.OPENAI_MAX_RETRIES
+        )
+
+        # Recently used embeddings keyed by a hash of the model and text
+        self._embedding_cache: "OrderedDict[bytes, array]" = OrderedDict()
+
+        # Recent recall() results, cleared whenever a mutation is executed
+        self._recall_cache: "OrderedDict[bytes, tuple]" = OrderedDict()
+
+        # Guards the caches, since one client may be shared across threads
+        self._cache_lock = threading.Lock()
+
+        # Reuse one HTTP session so keep-alive connections are shared across queries
+        self._owns_session = session is None
+        self._session = requests.Session() if session is None else session
+        self._session.headers.update(self.headers)
+        if self._owns_session:
+            adapter = HTTPAdapter(
+                pool_connections=16,
+                pool_maxsize=64,
+                max_retries=Retry(
+                    total=self.REQUEST_RETRIES,
+                    backoff_factor=0.2,
+                    # Mutations are not idempotent, so only retry when Hasura cannot have
+                    # run the request: connection failures and 429/503. Read errors and
+                    # other 5xx may arrive after an insert committed, and a replay would
+                    # duplicate it.
+                    read=0,
+                    status_forcelist=[429, 503],
+                    # GraphQL requests are all POSTs, which urllib3 won't retry by default
+                    allowed_methods=["POST"],
+                    # Hand the last error response to raise_for_status() once retries run out
+                    raise_on_status=False
+                )
+            )
+            self._session.mount("http://", adapter)
+            self._session.mount("https://", adapter)
+
+    def close(self) -> None:
+        """Close the underlying HTTP connections, unless the session was passed in."""
+        if self._owns_session:
+            self._session.close()
+
+    def __enter__(self) -> "MeshOS":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
     def _execute_query(self, query: str, variables: Optional[Dict] = None) -> Dict:
         """Execute a GraphQL query."""
-        response = requests.post(
-            self.url,
-            headers=self.headers,
-            json={
-                "query": query,
-                "variables": variables or {}
-            }
-        )
-        response.raise_for_status()
-        result = response.json()
+        if query.lstrip().startswith("mutation"):
+            # Any write may change search results
+            with self._cache_lock:
+                self._recall_cache.clear()
+        result = self._post(_graphql_body(query, variables))
         
         if "errors" in result:
             error_msg = result["errors"][0]["message"]
@@ -112,14 +557,197 @@ class MeshOS:
         
         return result
     
-    def _create_embedding(self, text: str) -> List[float]:
-        """Create an embedding for the given text."""
-        response = self.openai.embeddings.create(
-            model="text-embedding-3-small",
-            input=text
+    def _execute_batch(self, query: str, variables_list: List[Dict]) -> List[Dict]:
+        """Execute one read-only query once per variables dict in a single request.
+        
+        Hasura accepts a JSON array of operations and answers with an array of
+        results in the same order. A request-level failure (a malformed batch,
+        auth or permission errors) comes back as a single error object instead.
+        """
+        body = b"[" + b",".join(_graphql_body(query, variables) for variables in variables_list) + b"]"
+        results = self._post(body)
+        if isinstance(results, dict):
+            raise GraphQLError(results["errors"][0]["message"])
+        
+        for result in results:
+            if "errors" in result:
+                raise GraphQLError(result["errors"][0]["message"])
+        
+        return results
+    
+    def _post(self, body: bytes):
+        """POST a serialized GraphQL request body and parse the response."""
+        headers = None
+        if self.compress_requests and len(body) >= self.GZIP_MIN_BYTES:
+            body = gzip.compress(body, compresslevel=1)
+            headers = _GZIP_HEADERS
+        response = self._session.post(
+            self.url,
+            data=body,
+            headers=headers,
+            timeout=self.REQUEST_TIMEOUT
         )
-        return response.data[0].embedding
+        if response.status_code == 401:
+            raise AuthError(_AUTH_ERROR_MESSAGE, response=response)
+        response.raise_for_status()
+        return orjson.loads(response.content)
     
+    def _embedding_cache_key(self, text: str) -> bytes:
+        """Fixed-size cache key for an embedding of text."""
+        return hashlib.blake2b(
+            f"{self.EMBEDDING_MODEL}\0{text}".encode(), digest_size=16
+        ).digest()
+
+    def _cache_embedding(self, key: bytes, embedding: array) -> None:
+        """Store an embedding, evicting the least recently used entry when full."""
+        with self._cache_lock:
+            self._embedding_cache[key] = embedding
+            self._embedding_cache.move_to_end(key)
+            while len(self._embedding_cache) > self.EMBEDDING_CACHE_SIZE:
+                self._embedding_cache.popitem(last=False)
+
+    def _cached_embedding(self, key: bytes) -> Optional[array]:
+        """Return a cached embedding and mark it recently used, or None."""
+        with self._cache_lock:
+            cached = self._embedding_cache.get(key)
+            if cached is not None:
+                self._embedding_cache.move_to_end(key)
+            return cached
+
+    def _create_embedding(self, text: str) -> array:
+        """Create a float32 embedding for the given text, reusing cached results."""
+        key = self._embedding_cache_key(text)
+        cached = self._cached_embedding(key)
+        if cached is not None:
+            return cached
+        
+        response = self.openai.embeddings.create(
+            model=self.EMBEDDING_MODEL,
+            input=text,
+            encoding_format="base64"
+        )
+        embedding = _decode_embedding(response.data[0].embedding)
+        self._cache_embedding(key, embedding)
+        return embedding
+
+    def _count_tokens(self, text: str) -> int:
+        """Count embedding tokens, using tiktoken when it is installed.
+        
+        Without tiktoken the count is the UTF-8 byte length. Every byte-level
+        BPE token covers at least one byte, so this is an upper bound and
+        batches and chunks stay under the API limits in any script.
+        """
+        if tiktoken is not None:
+            return len(_embedding_encoding().encode(text))
+        return len(text.encode("utf-8"))
+
+    def _embedding_batches(self, texts: List[str]) -> List[List[str]]:
+        """Group texts into batches within the per-request input and token limits."""
+        batches = []
+        batch: List[str] = []
+        batch_tokens = 0
+        for text in texts:
+            tokens = self._count_tokens(text)
+            if batch and (
+                len(batch) >= self.EMBEDDING_BATCH_SIZE
+                or batch_tokens + tokens > self.EMBEDDING_BATCH_TOKENS
+            ):
+                batches.append(batch)
+                batch, batch_tokens = [], 0
+            batch.append(text)
+            batch_tokens += tokens
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def _create_embeddings(
+        self,
+        texts: List[str],
+        known: Optional[Dict[bytes, array]] = None
+    ) -> List[array]:
+        """Create embeddings for many texts using batched API requests.
+
+        Embeddings in known, keyed like the cache, are used as they are.
+        Cached and duplicate texts are embedded only once. The rest are
+        grouped into batches of up to EMBEDDING_BATCH_SIZE inputs and
+        EMBEDDING_BATCH_TOKENS tokens per request. If the API rejects a batch,
+        that batch falls back to one request per text.
+        """
+        keys = [self._embedding_cache_key(text) for text in texts]
+        found: Dict[bytes, array] = dict(known) if known else {}
+        missing: Dict[str, bytes] = {}
+        for key, text in zip(keys, texts):
+            if key in found:
+                continue
+            cached = self._cached_embedding(key)
+            if cached is not None:
+                found[key] = cached
+            else:
+                missing[text] = key
+
+        for batch in self._embedding_batches(list(missing)):
+            try:
+                response = self.openai.embeddings.create(
+                    model=self.EMBEDDING_MODEL,
+                    input=batch,
+                    encoding_format="base64"
+                )
+            except openai.BadRequestError:
+                for text in batch:
+                    found[missing[text]] = self._create_embedding(text)
+                continue
+            data = sorted(response.data, key=lambda d: d.index)
+            for text, d in zip(batch, data):
+                embedding = _decode_embedding(d.embedding)
+                found[missing[text]] = embedding
+                self._cache_embedding(missing[text], embedding)
+
+        return [found[key] for key in keys]
+
+    def _embed_for_storage(self, texts: List[str]) -> List[array]:
+        """Create embeddings for content that is about to be stored.
+
+        With persist_embeddings set, texts missing from the local cache are
+        looked up in content_embeddings with one query. Only texts found in
+        neither are embedded, and those embeddings are saved to the table.
+        Hits are held for this call rather than read back from the cache, so
+        ingests larger than EMBEDDING_CACHE_SIZE don't lose them to eviction.
+        """
+        if not self.persist_embeddings:
+            return self._create_embeddings(texts)
+
+        known: Dict[bytes, array] = {}
+        unknown: Dict[bytes, str] = {}
+        for text in texts:
+            key = self._embedding_cache_key(text)
+            cached = self._cached_embedding(key)
+            if cached is not None:
+                known[key] = cached
+            else:
+                unknown[key] = text
+
+        if unknown:
+            result = self._execute_query(GET_CONTENT_EMBEDDINGS_QUERY, {
+                "hashes": ["\\x" + key.hex() for key in unknown]
+            })
+            for row in result["data"]["content_embeddings"]:
+                key = bytes.fromhex(row["content_hash"][2:])
+                if unknown.pop(key, None) is not None:
+                    known[key] = _as_float32(orjson.loads(row["embedding"]))
+                    self._cache_embedding(key, known[key])
+
+        embeddings = self._create_embeddings(texts, known)
+
+        if unknown:
+            created = dict(zip(map(self._embedding_cache_key, texts), embeddings))
+            self._execute_query(INSERT_CONTENT_EMBEDDINGS_MUTATION, {
+                "objects": [
+                    {"content_hash": "\\x" + key.hex(), "embedding": _vector_literal(created[key])}
+                    for key in unknown
+                ]
+            })
+        return embeddings
+
     def _validate_slug(self, slug: str) -> bool:
         """Validate a slug string."""
         return bool(self.SLUG_PATTERN.match(slug))
@@ -134,11 +762,7 @@ class MeshOS:
         Returns:
             List of content chunks
         """
-        # Use OpenAI's tokenizer to count tokens
-        encoding = self.openai.tiktoken.encoding_for_model("text-embedding-3-small")
-        tokens = encoding.encode(content)
-        
-        if len(tokens) <= max_tokens:
+        if self._count_tokens(content) <= max_tokens:
             return [content]
         
         chunks = []
@@ -151,17 +775,17 @@ class MeshOS:
         for sentence in sentences:
             # Add period back if it was removed by split
             sentence = sentence + "." if sentence == sentences[-1] else sentence + ". "
-            sentence_tokens = encoding.encode(sentence)
+            sentence_tokens = self._count_tokens(sentence)
             
-            if current_length + len(sentence_tokens) > max_tokens:
+            if current_length + sentence_tokens > max_tokens:
                 # Current chunk is full, start a new one
                 if current_chunk:
                     chunks.append("".join(current_chunk))
                 current_chunk = [sentence]
-                current_length = len(sentence_tokens)
+                current_length = sentence_tokens
             else:
                 current_chunk.append(sentence)
-                current_length += len(sentence_tokens)
+                current_length += sentence_tokens
         
         # Add the last chunk if there is one
         if current_chunk:
@@ -203,25 +827,7 @@ class MeshOS:
             if existing:
                 return existing
         
-        query = """
-        mutation RegisterAgent($name: String!, $description: String!, $metadata: jsonb, $slug: String) {
-          insert_agents_one(object: {
-            name: $name,
-            description: $description,
-            metadata: $metadata,
-            status: "active",
-            slug: $slug
-          }) {
-            id
-            name
-            description
-            metadata
-            status
-            slug
-          }
-        }
-        """
-        result = self._execute_query(query, {
+        result = self._execute_query(REGISTER_AGENT_MUTATION, {
             "name": name,
             "description": description,
             "metadata": metadata or {},
@@ -238,49 +844,18 @@ class MeshOS:
                 "numbers, hyphens, and underscores"
             )
         
-        query = """
-        query GetAgentBySlug($slug: String!) {
-          agents(where: {slug: {_eq: $slug}}, limit: 1) {
-            id
-            name
-            description
-            metadata
-            status
-            slug
-          }
-        }
-        """
-        result = self._execute_query(query, {"slug": slug})
+        result = self._execute_query(GET_AGENT_BY_SLUG_QUERY, {"slug": slug})
         agents = result["data"]["agents"]
         return Agent(**agents[0]) if agents else None
 
     def unregister_agent(self, agent_id: str) -> bool:
         """Unregister an agent and remove all their memories."""
-        query = """
-        mutation UnregisterAgent($id: uuid!) {
-          delete_agents_by_pk(id: $id) {
-            id
-          }
-        }
-        """
-        result = self._execute_query(query, {"id": agent_id})
+        result = self._execute_query(UNREGISTER_AGENT_MUTATION, {"id": agent_id})
         return bool(result["data"]["delete_agents_by_pk"])
     
     def get_agent(self, agent_id: str) -> Optional[Agent]:
         """Get agent details by ID."""
-        query = """
-        query GetAgent($id: uuid!) {
-          agents_by_pk(id: $id) {
-            id
-            name
-            description
-            metadata
-            status
-            slug
-          }
-        }
-        """
-        result = self._execute_query(query, {"id": agent_id})
+        result = self._execute_query(GET_AGENT_QUERY, {"id": agent_id})
         agent_data = result["data"]["agents_by_pk"]
         return Agent(**agent_data) if agent_data else None
 
@@ -297,22 +872,7 @@ class MeshOS:
         Raises:
             GraphQLError: If the agent doesn't exist or the update fails
         """
-        query = """
-        mutation UpdateAgentStatus($id: uuid!, $status: String!) {
-          update_agents_by_pk(
-            pk_columns: {id: $id}, 
-            _set: {status: $status}
-          ) {
-            id
-            name
-            description
-            metadata
-            status
-            slug
-          }
-        }
-        """
-        result = self._execute_query(query, {
+        result = self._execute_query(UPDATE_AGENT_STATUS_MUTATION, {
             "id": agent_id,
             "status": status
         })
@@ -372,46 +932,23 @@ class MeshOS:
         # Chunk the content if needed
         chunks = self._chunk_content(content)
         
+        # Chunks are embedded in batched requests
+        embeddings = self._embed_for_storage(chunks)
+        
         if len(chunks) == 1:
             # Single chunk case - proceed as before
-            embedding = self._create_embedding(content)
-            embedding_str = f"[{','.join(str(x) for x in embedding)}]"
+            embedding = embeddings[0]
+            embedding_str = _vector_literal(embedding)
             metadata_dict = metadata.model_dump()
             
-            query = """
-            mutation Remember($content: String!, $agent_id: uuid!, $metadata: jsonb, $embedding: vector!, $expires_at: timestamptz) {
-              insert_memories_one(object: {
-                content: $content,
-                agent_id: $agent_id,
-                metadata: $metadata,
-                embedding: $embedding,
-                expires_at: $expires_at
-              }) {
-                id
-                agent_id
-                content
-                metadata
-                embedding
-                created_at
-                updated_at
-                expires_at
-              }
-            }
-            """
-            result = self._execute_query(query, {
+            result = self._execute_query(REMEMBER_MUTATION, {
                 "content": content,
                 "agent_id": agent_id,
                 "metadata": metadata_dict,
                 "embedding": embedding_str,
                 "expires_at": expires_at
             })
-            memory_data = result["data"]["insert_memories_one"]
-            
-            # Convert stored metadata back to MemoryMetadata if it's a dict
-            if isinstance(memory_data["metadata"], dict):
-                memory_data["metadata"] = MemoryMetadata(**memory_data["metadata"])
-            
-            return Memory(**memory_data)
+            return _memory_from_row(result["data"]["insert_memories_one"], embedding)
         else:
             # Multiple chunks case
             memories = []
@@ -428,45 +965,18 @@ class MeshOS:
                 if previous_memory:
                     chunk_metadata["previous_chunk"] = previous_memory.id
                 
-                # Create embedding for chunk
-                embedding = self._create_embedding(chunk)
-                embedding_str = f"[{','.join(str(x) for x in embedding)}]"
+                embedding = embeddings[i]
+                embedding_str = _vector_literal(embedding)
                 
                 # Store chunk
-                query = """
-                mutation Remember($content: String!, $agent_id: uuid!, $metadata: jsonb, $embedding: vector!, $expires_at: timestamptz) {
-                  insert_memories_one(object: {
-                    content: $content,
-                    agent_id: $agent_id,
-                    metadata: $metadata,
-                    embedding: $embedding,
-                    expires_at: $expires_at
-                  }) {
-                    id
-                    agent_id
-                    content
-                    metadata
-                    embedding
-                    created_at
-                    updated_at
-                    expires_at
-                  }
-                }
-                """
-                result = self._execute_query(query, {
+                result = self._execute_query(REMEMBER_MUTATION, {
                     "content": chunk,
                     "agent_id": agent_id,
                     "metadata": chunk_metadata,
                     "embedding": embedding_str,
                     "expires_at": expires_at
                 })
-                memory_data = result["data"]["insert_memories_one"]
-                
-                # Convert stored metadata back to MemoryMetadata
-                if isinstance(memory_data["metadata"], dict):
-                    memory_data["metadata"] = MemoryMetadata(**memory_data["metadata"])
-                
-                memory = Memory(**memory_data)
+                memory = _memory_from_row(result["data"]["insert_memories_one"], embedding)
                 memories.append(memory)
                 
                 # Link to previous chunk if it exists
@@ -488,9 +998,100 @@ class MeshOS:
                     )
                 
                 previous_memory = memory
-            
+
             return memories
 
+    def remember_many(
+        self,
+        contents: List[str],
+        agent_id: str,
+        metadata: Optional[Union[Dict, MemoryMetadata]] = None,
+        expires_at: Optional[str] = None
+    ) -> List[Memory]:
+        """Store many memories at once.
+
+        Each content string is stored as its own memory with the same
+        metadata, using bulk_remember(). Unlike remember(), contents are not
+        chunked, so each must fit in one embedding request.
+
+        Args:
+            contents: The text contents to store
+            agent_id: The ID of the agent creating the memories
+            metadata: Optional metadata applied to every memory
+            expires_at: Optional expiration timestamp in ISO 8601 format
+
+        Returns:
+            List[Memory]: The stored memories, in the same order as contents
+
+        Raises:
+            ContentTooLongError: If a content is over EMBEDDING_MAX_TOKENS
+        """
+        return self.bulk_remember([
+            {
+                "content": content,
+                "agent_id": agent_id,
+                "metadata": metadata,
+                "expires_at": expires_at
+            }
+            for content in contents
+        ])
+
+    def bulk_remember(self, items: List[Dict]) -> List[Memory]:
+        """Store many memories that may differ in agent, metadata or expiry.
+
+        Embeddings are created in batched requests and rows are inserted with
+        one insert_memories mutation per BULK_INSERT_SIZE items, keeping each
+        request under Hasura's body size limit. Contents are not chunked:
+        every content is checked against EMBEDDING_MAX_TOKENS before anything
+        is embedded or stored. Without the tokenizer extra the count is an
+        upper bound, the same one remember() uses to decide when to chunk.
+
+        Args:
+            items: Dicts with "content" and "agent_id", and optionally
+                "metadata" and "expires_at"
+
+        Returns:
+            List[Memory]: The stored memories, in the same order as items
+
+        Raises:
+            ContentTooLongError: If a content is over EMBEDDING_MAX_TOKENS
+        """
+        texts = [item["content"] for item in items]
+        for index, text in enumerate(texts):
+            tokens = self._count_tokens(text)
+            if tokens > self.EMBEDDING_MAX_TOKENS:
+                raise ContentTooLongError(index, tokens, self.EMBEDDING_MAX_TOKENS)
+        embeddings = self._embed_for_storage(texts)
+        objects = []
+        for item, embedding in zip(items, embeddings):
+            metadata = item.get("metadata")
+            if isinstance(metadata, dict):
+                metadata = MemoryMetadata(**metadata)
+            elif metadata is None:
+                metadata = MemoryMetadata(
+                    type=DataType.KNOWLEDGE,
+                    subtype=KnowledgeSubtype.DATASET,
+                    tags=[],
+                    version=1
+                )
+            objects.append({
+                "content": item["content"],
+                "agent_id": item["agent_id"],
+                "metadata": metadata.model_dump(),
+                "embedding": _vector_literal(embedding),
+                "expires_at": item.get("expires_at")
+            })
+
+        memories = []
+        for start in range(0, len(objects), self.BULK_INSERT_SIZE):
+            result = self._execute_query(BULK_REMEMBER_MUTATION, {
+                "objects": objects[start:start + self.BULK_INSERT_SIZE]
+            })
+            rows = result["data"]["insert_memories"]["returning"]
+            memories.extend(map(_memory_from_row, rows, embeddings[start:start + len(rows)]))
+
+        return memories
+
     def _expand_query(self, query: str, num_variations: int = 2) -> List[str]:
         """Generate semantic variations of the query.
         
@@ -536,10 +1137,16 @@ class MeshOS:
         use_semantic_expansion: bool = True,
         metadata_filter: Optional[Dict] = None,
         created_at_filter: Optional[Dict] = None,
-        expires_at_filter: Optional[Dict] = None
+        expires_at_filter: Optional[Dict] = None,
+        include_embedding: bool = False,
+        prefilter: Union[bool, str] = "auto"
     ) -> List[Memory]:
         """Search memories by semantic similarity.
         
+        Identical searches are answered from an in-memory cache for up to
+        RECALL_CACHE_TTL seconds. Any mutation made through this client
+        clears the cache.
+        
         Args:
             query: The text to search for
             agent_id: Optional agent ID to filter by
@@ -551,6 +1158,11 @@ class MeshOS:
             metadata_filter: Filter by metadata fields (e.g., {"type": "knowledge"})
             created_at_filter: Filter by creation time using operators (_gt, _gte, _lt, _lte, _eq)
             expires_at_filter: Filter by expiration time using operators (_gt, _gte, _lt, _lte, _eq)
+            include_embedding: If True, return each memory's embedding with the results
+            prefilter: True applies the filters first and ranks every match exactly,
+                False searches the HNSW index and filters its candidates. "auto"
+                prefilters when fewer than PREFILTER_MAX_ROWS memories match the
+                filters, at the cost of one count query per filtered recall
             
         Returns:
             List of Memory objects with similarity scores, sorted by similarity
@@ -572,15 +1184,66 @@ class MeshOS:
                 expires_at_filter={"_gt": "2025-02-05T00:00:00Z"}
             )
         """
+        cache_key = hashlib.blake2b(orjson.dumps(
+            [query, agent_id, limit, threshold, min_results, adaptive_threshold,
+             use_semantic_expansion, metadata_filter, created_at_filter, expires_at_filter,
+             include_embedding, prefilter],
+            option=orjson.OPT_SORT_KEYS,
+            default=str
+        ), digest_size=16).digest()
+        with self._cache_lock:
+            cached = self._recall_cache.get(cache_key)
+            if cached is not None and time.monotonic() - cached[0] < self.RECALL_CACHE_TTL:
+                self._recall_cache.move_to_end(cache_key)
+                return list(cached[1])
+        
+        results = self._recall_uncached(
+            query, agent_id, limit, threshold, min_results, adaptive_threshold,
+            use_semantic_expansion, metadata_filter, created_at_filter, expires_at_filter,
+            include_embedding, prefilter
+        )
+        with self._cache_lock:
+            self._recall_cache[cache_key] = (time.monotonic(), results)
+            self._recall_cache.move_to_end(cache_key)
+            while len(self._recall_cache) > self.RECALL_CACHE_SIZE:
+                self._recall_cache.popitem(last=False)
+        return list(results)
+
+    def _recall_uncached(
+        self,
+        query: str,
+        agent_id: Optional[str],
+        limit: int,
+        threshold: float,
+        min_results: int,
+        adaptive_threshold: bool,
+        use_semantic_expansion: bool,
+        metadata_filter: Optional[Dict],
+        created_at_filter: Optional[Dict],
+        expires_at_filter: Optional[Dict],
+        include_embedding: bool,
+        prefilter: Union[bool, str]
+    ) -> List[Memory]:
+        """Run the recall search strategy against Hasura."""
+        # Only the query embedding and threshold vary between search passes
+        search_args = _search_args(agent_id, limit, metadata_filter, created_at_filter, expires_at_filter)
+        if prefilter == "auto":
+            prefilter = self._filters_are_selective(search_args)
+        if prefilter:
+            search_query = SEARCH_MEMORIES_EXACT_QUERY if include_embedding else SEARCH_MEMORIES_EXACT_QUERY_WITHOUT_EMBEDDING
+        else:
+            search_query = SEARCH_MEMORIES_QUERY if include_embedding else SEARCH_MEMORIES_QUERY_WITHOUT_EMBEDDING
+        
+        # The query's vector literal is formatted once and reused at every threshold
+        query_vector = _vector_literal(self._create_embedding(query))
+        
         # First try: Direct search with initial threshold
         results = self._recall_with_threshold(
             query=query,
             threshold=threshold,
-            agent_id=agent_id,
-            limit=limit,
-            metadata_filter=metadata_filter,
-            created_at_filter=created_at_filter,
-            expires_at_filter=expires_at_filter
+            search_args=search_args,
+            search_query=search_query,
+            query_vector=query_vector
         )
         
         if len(results) >= min_results:
@@ -595,11 +1258,9 @@ class MeshOS:
                 new_results = self._recall_with_threshold(
                     query=query,
                     threshold=current_threshold,
-                    agent_id=agent_id,
-                    limit=limit,
-                    metadata_filter=metadata_filter,
-                    created_at_filter=created_at_filter,
-                    expires_at_filter=expires_at_filter
+                    search_args=search_args,
+                    search_query=search_query,
+                    query_vector=query_vector
                 )
                 
                 # Add new results that aren't already in the list
@@ -617,18 +1278,14 @@ class MeshOS:
             variations = self._expand_query(query)
             seen_ids = {}  # Start fresh since we have no results
             
-            # Try each variation with the original threshold first
-            for variation in variations[1:]:  # Skip original query as we already tried it
-                variation_results = self._recall_with_threshold(
-                    query=variation,
-                    threshold=threshold,
-                    agent_id=agent_id,
-                    limit=limit,
-                    metadata_filter=metadata_filter,
-                    created_at_filter=created_at_filter,
-                    expires_at_filter=expires_at_filter
-                )
-                
+            # Try each variation with the original threshold first,
+            # searching all of them in one request
+            for variation_results in self._recall_variations(
+                variations[1:],  # Skip original query as we already tried it
+                threshold=threshold,
+                search_args=search_args,
+                search_query=search_query
+            ):
                 # Add new results or update if better similarity
                 for memory in variation_results:
                     if memory.id not in seen_ids or (memory.similarity or 0) > (seen_ids[memory.id].similarity or 0):
@@ -642,17 +1299,12 @@ class MeshOS:
                 current_threshold = threshold - 0.05
                 
                 while current_threshold >= min_threshold and len(seen_ids) == 0:  # Stop at first result
-                    for variation in variations[1:]:
-                        variation_results = self._recall_with_threshold(
-                            query=variation,
-                            threshold=current_threshold,
-                            agent_id=agent_id,
-                            limit=limit,
-                            metadata_filter=metadata_filter,
-                            created_at_filter=created_at_filter,
-                            expires_at_filter=expires_at_filter
-                        )
-                        
+                    for variation_results in self._recall_variations(
+                        variations[1:],
+                        threshold=current_threshold,
+                        search_args=search_args,
+                        search_query=search_query
+                    ):
                         for memory in variation_results:
                             if memory.id not in seen_ids or (memory.similarity or 0) > (seen_ids[memory.id].similarity or 0):
                                 seen_ids[memory.id] = memory
@@ -664,91 +1316,89 @@ class MeshOS:
                         break
                     
                     current_threshold -= 0.05
-                
-                # Update results with any found memories
-                if seen_ids:
-                    results = list(seen_ids.values())
+            
+            # Update results with any found memories
+            if seen_ids:
+                results = list(seen_ids.values())
         
         # Sort by similarity and return top results
         results.sort(key=lambda x: x.similarity or 0, reverse=True)
         return results[:limit]
 
+    def _filters_are_selective(self, search_args: Dict) -> bool:
+        """Whether fewer than PREFILTER_MAX_ROWS memories pass the recall filters."""
+        where = {}
+        if search_args.get("filter_agent_id"):
+            where["agent_id"] = {"_eq": search_args["filter_agent_id"]}
+        if "metadata_filter" in search_args:
+            where["metadata"] = {"_contains": search_args["metadata_filter"]}
+        if "created_at_filter" in search_args:
+            where["created_at"] = search_args["created_at_filter"]
+        if "expires_at_filter" in search_args:
+            where["expires_at"] = search_args["expires_at_filter"]
+        if not where:
+            return False
+        
+        # The limit caps the count's cost when the filters are broad
+        result = self._execute_query(COUNT_MEMORIES_QUERY, {
+            "where": where,
+            "limit": self.PREFILTER_MAX_ROWS
+        })
+        return result["data"]["memories_aggregate"]["aggregate"]["count"] < self.PREFILTER_MAX_ROWS
+
     def _recall_with_threshold(
         self,
         query: str,
         threshold: float,
-        agent_id: Optional[str] = None,
-        limit: int = 10,
-        metadata_filter: Optional[Dict] = None,
-        created_at_filter: Optional[Dict] = None,
-        expires_at_filter: Optional[Dict] = None
+        search_args: Dict,
+        search_query: str = SEARCH_MEMORIES_QUERY_WITHOUT_EMBEDDING,
+        query_vector: Optional[str] = None
     ) -> List[Memory]:
-        """Internal method to perform recall with a specific threshold."""
-        # Create embedding for the query
-        embedding_str = f"[{','.join(str(x) for x in self._create_embedding(query))}]"
-        
-        # Construct the query
-        query = """
-        query SearchMemories(
-            $args: search_memories_args!
-        ) {
-            search_memories(
-                args: $args
-            ) {
-                id
-                agent_id
-                content
-                metadata
-                embedding
-                similarity
-                created_at
-                updated_at
-                expires_at
-            }
-        }
-        """
+        """Internal method to perform recall with a specific threshold.
         
-        # Prepare the arguments
+        Pass query_vector, the query's formatted embedding, to skip embedding
+        and formatting the query again.
+        """
+        if query_vector is None:
+            query_vector = _vector_literal(self._create_embedding(query))
         args = {
-            "query_embedding": embedding_str,
-            "match_threshold": threshold,
-            "match_count": limit,
-            "filter_agent_id": agent_id
+            **search_args,
+            "query_embedding": query_vector,
+            "match_threshold": threshold
         }
         
-        # Add filters if provided
-        if metadata_filter:
-            args["metadata_filter"] = metadata_filter
-        if created_at_filter:
-            args["created_at_filter"] = created_at_filter
-        if expires_at_filter:
-            args["expires_at_filter"] = expires_at_filter
-        
         # Execute the query
-        result = self._execute_query(query, {
+        result = self._execute_query(search_query, {
             "args": args
         })
         
-        # Convert results to Memory objects, preserving similarity scores
-        memories = []
-        for m in result["data"]["search_memories"]:
-            similarity = m.pop("similarity", None)
-            memory = Memory(**m)
-            memory.similarity = similarity
-            memories.append(memory)
-        
-        return memories
+        # Rows map straight onto Memory, similarity score included
+        return [Memory(**m) for m in result["data"]["search_memories"]]
+    
+    def _recall_variations(
+        self,
+        queries: List[str],
+        threshold: float,
+        search_args: Dict,
+        search_query: str = SEARCH_MEMORIES_QUERY_WITHOUT_EMBEDDING
+    ) -> List[List[Memory]]:
+        """Search for several queries at one threshold with a single batched request."""
+        if not queries:
+            return []
+        embeddings = self._create_embeddings(queries)
+        results = self._execute_batch(search_query, [
+            {"args": {
+                **search_args,
+                "query_embedding": _vector_literal(embedding),
+                "match_threshold": threshold
+            }}
+            for embedding in embeddings
+        ])
+        return [[Memory(**m) for m in result["data"]["search_memories"]] for result in results]
     
     def forget(self, memory_id: str) -> bool:
         """Delete a specific memory."""
-        query = """
-        mutation Forget($id: uuid!) {
-          delete_memories_by_pk(id: $id) {
-            id
-          }
-        }
-        """
-        result = self._execute_query(query, {"id": memory_id})
+        result = self._execute_query(FORGET_MUTATION, {"id": memory_id})
         return bool(result["data"]["delete_memories_by_pk"])
 
     def link_memories(
@@ -770,32 +1420,7 @@ class MeshOS:
         elif metadata is None:
             metadata = EdgeMetadata(relationship=relationship, weight=weight)
         
-        query = """
-        mutation LinkMemories(
-            $source_memory: uuid!,
-            $target_memory: uuid!,
-            $relationship: String!,
-            $weight: float8!,
-            $metadata: jsonb!
-        ) {
-            insert_memory_edges_one(object: {
-                source_memory: $source_memory,
-                target_memory: $target_memory,
-                relationship: $relationship,
-                weight: $weight,
-                metadata: $metadata
-            }) {
-                id
-                source_memory
-                target_memory
-                relationship
-                weight
-                created_at
-                metadata
-            }
-        }
-        """
-        result = self._execute_query(query, {
+        result = self._execute_query(LINK_MEMORIES_MUTATION, {
             "source_memory": source_memory_id,
             "target_memory": target_memory_id,
             "relationship": relationship.value,
@@ -827,14 +1452,7 @@ class MeshOS:
         if relationship:
             conditions["relationship"] = {"_eq": relationship}
         
-        query = """
-        mutation UnlinkMemories($where: memory_edges_bool_exp!) {
-            delete_memory_edges(where: $where) {
-                affected_rows
-            }
-        }
-        """
-        result = self._execute_query(query, {
+        result = self._execute_query(UNLINK_MEMORIES_MUTATION, {
             "where": conditions
         })
         return result["data"]["delete_memory_edges"]["affected_rows"] > 0
@@ -848,20 +1466,7 @@ class MeshOS:
     ) -> Memory:
         """Update a memory and optionally create a version edge to the previous version."""
         # First get the current memory
-        query = """
-        query GetMemory($id: uuid!) {
-            memories_by_pk(id: $id) {
-                id
-                agent_id
-                content
-                metadata
-                embedding
-                created_at
-                updated_at
-            }
-        }
-        """
-        result = self._execute_query(query, {"id": memory_id})
+        result = self._execute_query(GET_MEMORY_QUERY, {"id": memory_id})
         old_memory = result["data"]["memories_by_pk"]
         if not old_memory:
             raise ValueError(f"Memory {memory_id} not found")
@@ -917,26 +1522,7 @@ class MeshOS:
         max_depth: int = 1
     ) -> List[Dict]:
         """Get memories connected to the given memory."""
-        query = """
-        query GetConnectedMemories(
-            $memory_id: uuid!,
-            $relationship: String,
-            $max_depth: Int!
-        ) {
-            get_connected_memories(
-                memory_id: $memory_id,
-                relationship_type: $relationship,
-                max_depth: $max_depth
-            ) {
-                source_id
-                target_id
-                relationship
-                weight
-                depth
-            }
-        }
-        """
-        result = self._execute_query(query, {
+        result = self._execute_query(GET_CONNECTED_MEMORIES_QUERY, {
             "memory_id": memory_id,
             "relationship": relationship,
             "max_depth": max_depth
@@ -0,0 +1 @@
+DROP FUNCTION IF EXISTS public.search_memories_exact;
@@ -0,0 +1,59 @@
+-- Exact nearest-neighbour search for selective filters. search_memories
+-- orders by the bare distance expression so the HNSW index can serve it, but
+-- the index only returns hnsw.ef_search candidates before the filters run.
+-- When few memories match the filters it is cheaper and complete to fetch
+-- them through the filter indexes and sort by distance, which is what
+-- ordering by the similarity column makes the planner do. The client picks
+-- between the two functions (see MeshOS.recall's prefilter argument).
+CREATE OR REPLACE FUNCTION public.search_memories_exact(
+    query_embedding vector(1536),
+    match_threshold float8,
+    match_count integer,
+    filter_agent_id uuid DEFAULT NULL,
+    metadata_filter jsonb DEFAULT NULL,
+    created_at_filter jsonb DEFAULT NULL,
+    expires_at_filter jsonb DEFAULT NULL,
+    filter_entity_id uuid DEFAULT NULL
+)
+RETURNS SETOF public.memories_with_similarity
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT
+        m.id,
+        m.agent_id,
+        m.content,
+        m.metadata,
+        m.embedding,
+        m.created_at,
+        m.updated_at,
+        m.expires_at,
+        1 - (m.embedding <=> query_embedding::halfvec(1536)) AS similarity
+    FROM memories m
+    WHERE
+        (filter_agent_id IS NULL OR m.agent_id = filter_agent_id)
+        AND (metadata_filter IS NULL OR m.metadata @> metadata_filter)
+        AND (created_at_filter IS NULL OR (
+            (NOT created_at_filter ? '_gt' OR m.created_at > (created_at_filter->>'_gt')::timestamptz)
+            AND (NOT created_at_filter ? '_gte' OR m.created_at >= (created_at_filter->>'_gte')::timestamptz)
+            AND (NOT created_at_filter ? '_lt' OR m.created_at < (created_at_filter->>'_lt')::timestamptz)
+            AND (NOT created_at_filter ? '_lte' OR m.created_at <= (created_at_filter->>'_lte')::timestamptz)
+        ))
+        AND (expires_at_filter IS NULL OR (
+            (NOT expires_at_filter ? '_gt' OR m.expires_at > (expires_at_filter->>'_gt')::timestamptz)
+            AND (NOT expires_at_filter ? '_gte' OR m.expires_at >= (expires_at_filter->>'_gte')::timestamptz)
+            AND (NOT expires_at_filter ? '_lt' OR m.expires_at < (expires_at_filter->>'_lt')::timestamptz)
+            AND (NOT expires_at_filter ? '_lte' OR m.expires_at <= (expires_at_filter->>'_lte')::timestamptz)
+        ))
+        AND (filter_entity_id IS NULL OR EXISTS (
+            SELECT 1
+            FROM entity_memory_links eml
+            WHERE eml.memory_id = m.id AND eml.entity_id = filter_entity_id
+        ))
+        AND 1 - (m.embedding <=> query_embedding::halfvec(1536)) >= match_threshold
+    ORDER BY similarity DESC
+    LIMIT match_count;
+$$;
+
+-- Track the function in Hasura
+COMMENT ON FUNCTION public.search_memories_exact IS E'@graphql({"type": "Query"})';
@@ -0,0 +1,10 @@
+-- Embeddings keyed by a hash of the embedding model and content, so identical
+-- content is only sent to the embeddings API once across clients
+CREATE TABLE IF NOT EXISTS public.content_embeddings (
+    content_hash BYTEA PRIMARY KEY,
+    embedding halfvec(1536) NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+COMMENT ON TABLE public.content_embeddings IS
+'Embedding cache shared by clients created with persist_embeddings=True. content_hash is a 16-byte BLAKE2b digest of the model name and content.';
@@ -0,0 +1,98 @@
+-- Restore the ivfflat index
+DROP INDEX IF EXISTS public.memories_embedding_hnsw_idx;
+CREATE INDEX IF NOT EXISTS idx_memories_embedding ON public.memories 
+USING ivfflat (embedding vector_cosine_ops)
+WITH (lists = 100);
+
+-- Restore the previous version of search_memories from 5_entities
+CREATE OR REPLACE FUNCTION public.search_memories(
+    query_embedding vector(1536),
+    match_threshold float8,
+    match_count integer,
+    filter_agent_id uuid DEFAULT NULL,
+    metadata_filter jsonb DEFAULT NULL,
+    created_at_filter jsonb DEFAULT NULL,
+    expires_at_filter jsonb DEFAULT NULL,
+    filter_entity_id uuid DEFAULT NULL
+)
+RETURNS SETOF public.memories_with_similarity
+LANGUAGE sql
+STABLE
+AS $$
+    WITH normalized_query AS (
+        SELECT l2_normalize(query_embedding) AS normalized_vector
+    )
+    SELECT DISTINCT ON (m.id)
+        m.id,
+        m.agent_id,
+        m.content,
+        m.metadata,
+        m.embedding,
+        m.created_at,
+        m.updated_at,
+        m.expires_at,
+        -(m.embedding <#> (SELECT normalized_vector FROM normalized_query)) as similarity
+    FROM memories m
+    LEFT JOIN entity_memory_links eml ON m.id = eml.memory_id
+    WHERE
+        CASE 
+            WHEN filter_agent_id IS NOT NULL THEN m.agent_id = filter_agent_id
+            ELSE TRUE
+        END
+        AND CASE
+            WHEN metadata_filter IS NOT NULL THEN m.metadata @> metadata_filter
+            ELSE TRUE
+        END
+        AND CASE
+            WHEN created_at_filter IS NOT NULL THEN (
+                CASE
+                    WHEN created_at_filter ? '_gt' THEN m.created_at > (created_at_filter->>'_gt')::timestamptz
+                    ELSE TRUE
+                END
+                AND CASE
+                    WHEN created_at_filter ? '_gte' THEN m.created_at >= (created_at_filter->>'_gte')::timestamptz
+                    ELSE TRUE
+                END
+                AND CASE
+                    WHEN created_at_filter ? '_lt' THEN m.created_at < (created_at_filter->>'_lt')::timestamptz
+                    ELSE TRUE
+                END
+                AND CASE
+                    WHEN created_at_filter ? '_lte' THEN m.created_at <= (created_at_filter->>'_lte')::timestamptz
+                    ELSE TRUE
+                END
+            )
+            ELSE TRUE
+        END
+        AND CASE
+            WHEN expires_at_filter IS NOT NULL THEN (
+                CASE
+                    WHEN expires_at_filter ? '_gt' THEN m.expires_at > (expires_at_filter->>'_gt')::timestamptz
+                    ELSE TRUE
+                END
+                AND CASE
+                    WHEN expires_at_filter ? '_gte' THEN m.expires_at >= (expires_at_filter->>'_gte')::timestamptz
+                    ELSE TRUE
+                END
+                AND CASE
+                    WHEN expires_at_filter ? '_lt' THEN m.expires_at < (expires_at_filter->>'_lt')::timestamptz
+                    ELSE TRUE
+                END
+                AND CASE
+                    WHEN expires_at_filter ? '_lte' THEN m.expires_at <= (expires_at_filter->>'_lte')::timestamptz
+                    ELSE TRUE
+                END
+            )
+            ELSE TRUE
+        END
+        AND CASE
+            WHEN filter_entity_id IS NOT NULL THEN eml.entity_id = filter_entity_id
+            ELSE TRUE
+        END
+        AND -(m.embedding <#> (SELECT normalized_vector FROM normalized_query)) >= match_threshold
+    ORDER BY m.id, -(m.embedding <#> (SELECT normalized_vector FROM normalized_query)) DESC
+    LIMIT match_count;
+$$;
+
+-- Track the function in Hasura
+COMMENT ON FUNCTION public.search_memories IS E'@graphql({"type": "Query"})';
@@ -0,0 +1,73 @@
+-- Make sure pgvector is available (HNSW needs pgvector 0.5.0 or later)
+CREATE EXTENSION IF NOT EXISTS vector;
+
+-- Replace the ivfflat index with an HNSW index for memory search
+DROP INDEX IF EXISTS public.idx_memories_embedding;
+CREATE INDEX IF NOT EXISTS memories_embedding_hnsw_idx ON public.memories
+USING hnsw (embedding vector_cosine_ops)
+WITH (m = 16, ef_construction = 64);
+
+-- Rewrite search_memories so the planner can answer it with an index scan:
+-- the ORDER BY is the bare distance expression the index is built for, and the
+-- entity filter is an EXISTS check instead of a join with DISTINCT ON (m.id).
+-- The signature is unchanged, so Hasura keeps tracking the function.
+--
+-- Stored embeddings are L2-normalized by the normalize_memory_embedding
+-- trigger, so cosine similarity is 1 - cosine distance.
+--
+-- HNSW scans return at most hnsw.ef_search candidates (40 by default) before
+-- filters are applied. Raise it when recalling with large match_count values
+-- or selective filters, for example:
+--   ALTER DATABASE mesh_os SET hnsw.ef_search = 100;
+CREATE OR REPLACE FUNCTION public.search_memories(
+    query_embedding vector(1536),
+    match_threshold float8,
+    match_count integer,
+    filter_agent_id uuid DEFAULT NULL,
+    metadata_filter jsonb DEFAULT NULL,
+    created_at_filter jsonb DEFAULT NULL,
+    expires_at_filter jsonb DEFAULT NULL,
+    filter_entity_id uuid DEFAULT NULL
+)
+RETURNS SETOF public.memories_with_similarity
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT
+        m.id,
+        m.agent_id,
+        m.content,
+        m.metadata,
+        m.embedding,
+        m.created_at,
+        m.updated_at,
+        m.expires_at,
+        1 - (m.embedding <=> query_embedding) AS similarity
+    FROM memories m
+    WHERE
+        (filter_agent_id IS NULL OR m.agent_id = filter_agent_id)
+        AND (metadata_filter IS NULL OR m.metadata @> metadata_filter)
+        AND (created_at_filter IS NULL OR (
+            (NOT created_at_filter ? '_gt' OR m.created_at > (created_at_filter->>'_gt')::timestamptz)
+            AND (NOT created_at_filter ? '_gte' OR m.created_at >= (created_at_filter->>'_gte')::timestamptz)
+            AND (NOT created_at_filter ? '_lt' OR m.created_at < (created_at_filter->>'_lt')::timestamptz)
+            AND (NOT created_at_filter ? '_lte' OR m.created_at <= (created_at_filter->>'_lte')::timestamptz)
+        ))
+        AND (expires_at_filter IS NULL OR (
+            (NOT expires_at_filter ? '_gt' OR m.expires_at > (expires_at_filter->>'_gt')::timestamptz)
+            AND (NOT expires_at_filter ? '_gte' OR m.expires_at >= (expires_at_filter->>'_gte')::timestamptz)
+            AND (NOT expires_at_filter ? '_lt' OR m.expires_at < (expires_at_filter->>'_lt')::timestamptz)
+            AND (NOT expires_at_filter ? '_lte' OR m.expires_at <= (expires_at_filter->>'_lte')::timestamptz)
+        ))
+        AND (filter_entity_id IS NULL OR EXISTS (
+            SELECT 1
+            FROM entity_memory_links eml
+            WHERE eml.memory_id = m.id AND eml.entity_id = filter_entity_id
+        ))
+        AND 1 - (m.embedding <=> query_embedding) >= match_threshold
+    ORDER BY m.embedding <=> query_embedding
+    LIMIT match_count;
+$$;
+
+-- Track the function in Hasura
+COMMENT ON FUNCTION public.search_memories IS E'@graphql({"type": "Query"})';
@@ -0,0 +1,4 @@
+DROP INDEX IF EXISTS public.idx_memories_expires_at;
+DROP INDEX IF EXISTS public.idx_memories_created_at;
+DROP INDEX IF EXISTS public.idx_memories_metadata;
+DROP INDEX IF EXISTS public.idx_memories_agent_id;
@@ -0,0 +1,16 @@
+-- Index the search_memories filter columns so the planner can pick between
+-- the HNSW scan and a pre-filtered exact search. Without them an agent or
+-- metadata filter can only be checked after the index scan, so selective
+-- filters return fewer than match_count rows or fall back to a sequential scan.
+CREATE INDEX IF NOT EXISTS idx_memories_agent_id ON public.memories(agent_id);
+
+-- jsonb_path_ops supports the @> containment used by metadata_filter
+CREATE INDEX IF NOT EXISTS idx_memories_metadata ON public.memories
+USING gin (metadata jsonb_path_ops);
+
+CREATE INDEX IF NOT EXISTS idx_memories_created_at ON public.memories(created_at);
+CREATE INDEX IF NOT EXISTS idx_memories_expires_at ON public.memories(expires_at);
+
+-- With pgvector 0.8 or later, filtered recalls can keep scanning the HNSW
+-- index until enough rows pass the filters:
+--   ALTER DATABASE mesh_os SET hnsw.iterative_scan = relaxed_order;
@@ -0,0 +1,166 @@
+-- Restore float32 embeddings
+DROP FUNCTION IF EXISTS public.search_memories;
+DROP VIEW IF EXISTS public.memories_with_similarity;
+DROP INDEX IF EXISTS public.memories_embedding_hnsw_idx;
+
+ALTER TABLE public.memories
+    ALTER COLUMN embedding TYPE vector(1536) USING embedding::vector(1536);
+
+CREATE INDEX IF NOT EXISTS memories_embedding_hnsw_idx ON public.memories
+USING hnsw (embedding vector_cosine_ops)
+WITH (m = 16, ef_construction = 64);
+
+CREATE OR REPLACE VIEW public.memories_with_similarity AS
+SELECT 
+    m.*,
+    0::float8 as similarity  -- Default similarity, will be replaced in search
+FROM memories m;
+
+-- Restore the version of search_memories from 7_hnsw_search
+CREATE OR REPLACE FUNCTION public.search_memories(
+    query_embedding vector(1536),
+    match_threshold float8,
+    match_count integer,
+    filter_agent_id uuid DEFAULT NULL,
+    metadata_filter jsonb DEFAULT NULL,
+    created_at_filter jsonb DEFAULT NULL,
+    expires_at_filter jsonb DEFAULT NULL,
+    filter_entity_id uuid DEFAULT NULL
+)
+RETURNS SETOF public.memories_with_similarity
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT
+        m.id,
+        m.agent_id,
+        m.content,
+        m.metadata,
+        m.embedding,
+        m.created_at,
+        m.updated_at,
+        m.expires_at,
+        1 - (m.embedding <=> query_embedding) AS similarity
+    FROM memories m
+    WHERE
+        (filter_agent_id IS NULL OR m.agent_id = filter_agent_id)
+        AND (metadata_filter IS NULL OR m.metadata @> metadata_filter)
+        AND (created_at_filter IS NULL OR (
+            (NOT created_at_filter ? '_gt' OR m.created_at > (created_at_filter->>'_gt')::timestamptz)
+            AND (NOT created_at_filter ? '_gte' OR m.created_at >= (created_at_filter->>'_gte')::timestamptz)
+            AND (NOT created_at_filter ? '_lt' OR m.created_at < (created_at_filter->>'_lt')::timestamptz)
+            AND (NOT created_at_filter ? '_lte' OR m.created_at <= (created_at_filter->>'_lte')::timestamptz)
+        ))
+        AND (expires_at_filter IS NULL OR (
+            (NOT expires_at_filter ? '_gt' OR m.expires_at > (expires_at_filter->>'_gt')::timestamptz)
+            AND (NOT expires_at_filter ? '_gte' OR m.expires_at >= (expires_at_filter->>'_gte')::timestamptz)
+            AND (NOT expires_at_filter ? '_lt' OR m.expires_at < (expires_at_filter->>'_lt')::timestamptz)
+            AND (NOT expires_at_filter ? '_lte' OR m.expires_at <= (expires_at_filter->>'_lte')::timestamptz)
+        ))
+        AND (filter_entity_id IS NULL OR EXISTS (
+            SELECT 1
+            FROM entity_memory_links eml
+            WHERE eml.memory_id = m.id AND eml.entity_id = filter_entity_id
+        ))
+        AND 1 - (m.embedding <=> query_embedding) >= match_threshold
+    ORDER BY m.embedding <=> query_embedding
+    LIMIT match_count;
+$$;
+
+-- Track the function in Hasura
+COMMENT ON FUNCTION public.search_memories IS E'@graphql({"type": "Query"})';
+
+-- Restore the version of search_memories_and_entities from 5_entities
+CREATE OR REPLACE FUNCTION search_memories_and_entities(
+    query_embedding vector(1536),
+    match_threshold float8,
+    match_count integer,
+    include_entities boolean DEFAULT true,
+    include_memories boolean DEFAULT true,
+    metadata_filter jsonb DEFAULT NULL,
+    created_at_filter jsonb DEFAULT NULL
+)
+RETURNS SETOF public.search_results_with_similarity
+LANGUAGE sql STABLE AS $$
+    WITH normalized_query AS (
+        SELECT l2_normalize(query_embedding) AS normalized_vector
+    )
+    (
+        SELECT 
+            m.id,
+            'memory'::text as type,
+            m.content,
+            m.metadata,
+            -(m.embedding <#> (SELECT normalized_vector FROM normalized_query)) as similarity
+        FROM memories m
+        WHERE include_memories = true
+        AND CASE
+            WHEN metadata_filter IS NOT NULL THEN m.metadata @> metadata_filter
+            ELSE TRUE
+        END
+        AND CASE
+            WHEN created_at_filter IS NOT NULL THEN (
+                CASE
+                    WHEN created_at_filter ? '_gt' THEN m.created_at > (created_at_filter->>'_gt')::timestamptz
+                    ELSE TRUE
+                END
+                AND CASE
+                    WHEN created_at_filter ? '_gte' THEN m.created_at >= (created_at_filter->>'_gte')::timestamptz
+                    ELSE TRUE
+                END
+                AND CASE
+                    WHEN created_at_filter ? '_lt' THEN m.created_at < (created_at_filter->>'_lt')::timestamptz
+                    ELSE TRUE
+                END
+                AND CASE
+                    WHEN created_at_filter ? '_lte' THEN m.created_at <= (created_at_filter->>'_lte')::timestamptz
+                    ELSE TRUE
+                END
+            )
+            ELSE TRUE
+        END
+        AND -(m.embedding <#> (SELECT normalized_vector FROM normalized_query)) >= match_threshold
+    )
+    UNION ALL
+    (
+        SELECT 
+            e.id,
+            'entity'::text as type,
+            e.name as content,
+            e.metadata,
+            -(e.embedding <#> (SELECT normalized_vector FROM normalized_query)) as similarity
+        FROM entities e
+        WHERE include_entities = true
+        AND CASE
+            WHEN metadata_filter IS NOT NULL THEN e.metadata @> metadata_filter
+            ELSE TRUE
+        END
+        AND CASE
+            WHEN created_at_filter IS NOT NULL THEN (
+                CASE
+                    WHEN created_at_filter ? '_gt' THEN e.created_at > (created_at_filter->>'_gt')::timestamptz
+                    ELSE TRUE
+                END
+                AND CASE
+                    WHEN created_at_filter ? '_gte' THEN e.created_at >= (created_at_filter->>'_gte')::timestamptz
+                    ELSE TRUE
+                END
+                AND CASE
+                    WHEN created_at_filter ? '_lt' THEN e.created_at < (created_at_filter->>'_lt')::timestamptz
+                    ELSE TRUE
+                END
+                AND CASE
+                    WHEN created_at_filter ? '_lte' THEN e.created_at <= (created_at_filter->>'_lte')::timestamptz
+                    ELSE TRUE
+                END
+            )
+            ELSE TRUE
+        END
+        AND -(e.embedding <#> (SELECT normalized_vector FROM normalized_query)) >= match_threshold
+    )
+    ORDER BY similarity DESC
+    LIMIT match_count;
+$$;
+
+-- Track the function in Hasura
+COMMENT ON FUNCTION search_memories_and_entities IS E'@graphql({"type": "Query"})';
@@ -35,11 +35,19 @@ setup(
     install_requires=[
         "click>=8.0.0",
         "openai>=1.0.0",
+        "orjson>=3.8.0",
+        "httpx>=0.23.0",
         "pydantic>=2.0.0",
         "requests>=2.25.0",
+        "urllib3>=1.26.0",
         "rich>=10.0.0",
         "python-dotenv>=0.19.0",
     ],
+    extras_require={
+        "tokenizer": ["tiktoken>=0.5.0"],
+        "http2": ["h2>=3,<5"],
+        "msgpack": ["msgpack>=1.0.0"],
+    },
     entry_points={
         "console_scripts": [
             "mesh-os=mesh_os.cli.main:cli",
@@ -0,0 +1,13 @@
+"""
+Shared fixtures for the MeshOS tests.
+"""
+import pytest
+
+@pytest.fixture(scope="session", autouse=True)
+def mock_env():
+    """Set test credentials once for the whole session."""
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv("OPENAI_API_KEY", "test-key")
+        mp.setenv("HASURA_URL", "http://test-url")
+        mp.setenv("HASURA_ADMIN_SECRET", "test-secret")
+        yield
@@ -0,0 +1,132 @@
+"""
+Tests for the async MeshOS client.
+"""
+import asyncio
+import json
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, PropertyMock, patch
+
+import pytest
+
+from mesh_os import AsyncMeshOS, AuthError, GraphQLError
+from mesh_os.core.client import Memory
+
+TEST_MEMORY = {
+    "id": "test-memory-id",
+    "agent_id": "test-agent-id",
+    "content": "Test memory content",
+    "metadata": {
+        "type": "knowledge",
+        "subtype": "dataset",
+        "tags": ["test"],
+        "version": 1
+    },
+    "embedding": [0.1] * 1536,
+    "created_at": "2024-01-01T00:00:00Z",
+    "updated_at": "2024-01-01T00:00:00Z"
+}
+
+@pytest.fixture
+def mock_openai():
+    """Mock the async OpenAI client."""
+    mock_client = MagicMock()
+    mock_client.embeddings.create = AsyncMock(
+        return_value=SimpleNamespace(data=[SimpleNamespace(embedding=[0.1] * 1536, index=0)])
+    )
+    mock_client.close = AsyncMock()
+    with patch("openai.AsyncOpenAI", return_value=mock_client):
+        yield mock_client
+
+@pytest.fixture
+def mock_post():
+    """Mock GraphQL requests to Hasura."""
+    with patch("httpx.AsyncClient.post", new_callable=AsyncMock) as mock:
+        response = MagicMock(status_code=200)
+        # Responses are parsed from the raw body; tests set the decoded JSON
+        type(response).content = PropertyMock(side_effect=lambda: json.dumps(response.json()).encode())
+        mock.return_value = response
+        yield mock
+
+@pytest.fixture
+def client(mock_openai, mock_post):
+    """Create an AsyncMeshOS instance with mocked dependencies."""
+    return AsyncMeshOS(url="http://test-url", api_key="test-secret", openai_api_key="test-key")
+
+def set_response(mock_post, data):
+    """Set the GraphQL response data."""
+    mock_post.return_value.json.return_value = {"data": data}
+
+class TestAsyncMemoryOperations:
+    """Tests for async memory operations."""
+    
+    def test_remember(self, client, mock_post):
+        """Test storing a memory."""
+        set_response(mock_post, {"insert_memories_one": dict(TEST_MEMORY)})
+        
+        memory = asyncio.run(client.remember(content="Test memory content", agent_id="test-agent-id"))
+        
+        assert isinstance(memory, Memory)
+        assert memory.id == TEST_MEMORY["id"]
+        assert "mutation Remember" in json.loads(mock_post.call_args[1]["content"])["query"]
+    
+    def test_remember_many(self, client, mock_post, mock_openai):
+        """Test storing memories concurrently."""
+        mock_post.return_value.json.side_effect = lambda: {
+            "data": {"insert_memories_one": dict(TEST_MEMORY)}
+        }
+        
+        memories = asyncio.run(client.remember_many([
+            {"content": "first", "agent_id": "test-agent-id"},
+            {"content": "second", "agent_id": "test-agent-id"},
+        ]))
+        
+        assert len(memories) == 2
+        assert mock_post.call_count == 2
+        assert mock_openai.embeddings.create.call_count == 2
+    
+    def test_recall(self, client, mock_post):
+        """Test searching memories with filters."""
+        set_response(mock_post, {"search_memories": [{**TEST_MEMORY, "similarity": 0.9}]})
+        
+        memories = asyncio.run(client.recall(
+            "test query",
+            metadata_filter={"type": "knowledge"}
+        ))
+        
+        assert memories[0].similarity == 0.9
+        args = json.loads(mock_post.call_args[1]["content"])["variables"]["args"]
+        assert args["metadata_filter"] == {"type": "knowledge"}
+        assert args["match_threshold"] == 0.7
+    
+    def test_forget(self, client, mock_post):
+        """Test deleting a memory."""
+        set_response(mock_post, {"delete_memories_by_pk": {"id": TEST_MEMORY["id"]}})
+        
+        assert asyncio.run(client.forget(TEST_MEMORY["id"]))
+    
+    def test_graphql_error(self, client, mock_post):
+        """Test that GraphQL errors are raised."""
+        mock_post.return_value.json.return_value = {"errors": [{"message": "Test error"}]}
+        
+        with pytest.raises(GraphQLError, match="Test error"):
+            asyncio.run(client.forget(TEST_MEMORY["id"]))
+    
+    def test_invalid_api_key(self, client, mock_post):
+        """Test that a 401 from Hasura raises AuthError."""
+        mock_post.return_value.status_code = 401
+        
+        with pytest.raises(AuthError) as excinfo:
+            asyncio.run(client.forget(TEST_MEMORY["id"]))
+        assert excinfo.value.response is mock_post.return_value
+    
+    def test_context_manager_closes_client(self, client, mock_openai):
+        """Test that connections are closed on exit."""
+        async def use_client():
+            async with client:
+                pass
+        
+        with patch("httpx.AsyncClient.aclose", new_callable=AsyncMock) as mock_aclose:
+            asyncio.run(use_client())
+        
+        mock_aclose.assert_awaited_once()
+        mock_openai.close.assert_awaited_once()
@@ -2,18 +2,20 @@
 Tests for the MeshOS CLI.
 """
 import json
-import uuid
+from dataclasses import dataclass, replace
 from pathlib import Path
 from typing import Dict, Any
-from unittest.mock import MagicMock, patch
+from unittest.mock import patch
 
 import click
 import pytest
 from click.testing import CliRunner
 
-from mesh_os.cli.main import cli, validate_uuid, validate_metadata, validate_memory_metadata
-from mesh_os.core.taxonomy import DataType, EdgeType, KnowledgeSubtype
-from mesh_os.core.client import InvalidSlugError
+from mesh_os.cli.main import (
+    cli, validate_uuid, validate_metadata, validate_memory_metadata, _metadata_bulk_payload,
+    setup_openai_key, _Deadline, _migration_dirs
+)
+from mesh_os.core.client import ContentTooLongError, InvalidSlugError
 
 # Test data with fixed UUIDs for consistency
 TEST_AGENT = {
@@ -25,6 +27,9 @@ TEST_AGENT = {
     "slug": "test-agent"  # Add default slug
 }
 
+# Shared by every test so the 1536 floats are allocated once
+TEST_EMBEDDING = (0.1,) * 1536
+
 TEST_MEMORY = {
     "id": "123e4567-e89b-12d3-a456-426614174001",
     "agent_id": TEST_AGENT["id"],
@@ -35,7 +40,7 @@ TEST_MEMORY = {
         "tags": ["test"],
         "version": 1
     },
-    "embedding": [0.1] * 1536,
+    "embedding": TEST_EMBEDDING,
     "created_at": "2024-01-01T00:00:00Z",
     "updated_at": "2024-01-01T00:00:00Z"
 }
@@ -55,26 +60,65 @@ TEST_MEMORY_EDGE = {
     }
 }
 
-@pytest.fixture
+# Read-only stand-ins for the objects the client returns, built once
+
+@dataclass(frozen=True)
+class _Agent:
+    id: str
+    name: str
+    description: str
+    metadata: Dict[str, Any]
+    status: str
+    slug: str
+
+@dataclass(frozen=True)
+class _Memory:
+    id: str
+    agent_id: str
+    content: str
+    metadata: Dict[str, Any]
+    embedding: tuple
+    created_at: str
+    updated_at: str
+
+@dataclass(frozen=True)
+class _MemoryEdge:
+    id: str
+    source_memory: str
+    target_memory: str
+    relationship: str
+    weight: float
+    created_at: str
+    metadata: Dict[str, Any]
+
+AGENT = _Agent(**TEST_AGENT)
+MEMORY = _Memory(**TEST_MEMORY)
+MEMORY_EDGE = _MemoryEdge(**TEST_MEMORY_EDGE)
+
+# --metadata option values, serialized once
+TEST_AGENT_METADATA_JSON = json.dumps(TEST_AGENT["metadata"])
+TEST_MEMORY_METADATA_JSON = json.dumps(TEST_MEMORY["metadata"])
+
+# Fixtures below are module-scoped so each patch is applied once for the
+# whole file rather than per test; a session scope would leak them into
+# the SDK tests.
+
+@pytest.fixture(scope="module")
 def runner():
     """Create a Click CLI test runner."""
     return CliRunner()
 
-@pytest.fixture
-def mock_client():
-    """Mock the MeshOS client."""
+@pytest.fixture(scope="module")
+def _get_client_mock():
+    """Patch get_client once for the module."""
     with patch("mesh_os.cli.main.get_client") as mock:
-        yield mock.return_value
-
-@pytest.fixture(autouse=True)
-def mock_env():
-    """Mock environment variables."""
-    with patch.dict("os.environ", {
-        "OPENAI_API_KEY": "test-key",
-        "HASURA_URL": "http://test-url",
-        "HASURA_ADMIN_SECRET": "test-secret"
-    }):
-        yield
+        yield mock
+
+@pytest.fixture
+def mock_client(_get_client_mock):
+    """Mock the MeshOS client, reset before each test."""
+    _get_client_mock.reset_mock(return_value=True, side_effect=True)
+    return _get_client_mock.return_value
 
 class TestValidation:
     """Tests for validation functions."""
@@ -83,9 +127,16 @@ class TestValidation:
         """Test UUID validation."""
         valid_uuid = TEST_AGENT["id"]
         assert validate_uuid(None, None, valid_uuid) == valid_uuid
+        assert validate_uuid(None, None, valid_uuid.upper()) == valid_uuid.upper()
+        # Forms outside the 36-character fast path still go through UUID()
+        assert validate_uuid(None, None, valid_uuid.replace("-", "")) == valid_uuid.replace("-", "")
         
         with pytest.raises(click.BadParameter, match="Invalid UUID format"):
             validate_uuid(None, None, "not-a-uuid")
+        with pytest.raises(click.BadParameter, match="Invalid UUID format"):
+            validate_uuid(None, None, valid_uuid[:35] + "g")
+        with pytest.raises(click.BadParameter, match="Invalid UUID format"):
+            validate_uuid(None, None, valid_uuid[:8] + "0" + valid_uuid[9:13] + "-" + valid_uuid[14:])
     
     def test_validate_metadata(self):
         """Test metadata validation."""
@@ -134,13 +185,13 @@ class TestAgentCommands:
     
     def test_register_agent(self, runner, mock_client):
         """Test registering a new agent."""
-        mock_client.register_agent.return_value = MagicMock(**TEST_AGENT)
+        mock_client.register_agent.return_value = AGENT
         
         result = runner.invoke(cli, [
             "agent", "register",
             "TestAgent",
             "--description", "Test description",
-            "--metadata", json.dumps(TEST_AGENT["metadata"]),
+            "--metadata", TEST_AGENT_METADATA_JSON,
             "--slug", "test-agent"
         ])
         
@@ -171,7 +222,7 @@ class TestAgentCommands:
     
     def test_unregister_agent_by_slug(self, runner, mock_client):
         """Test unregistering an agent using slug."""
-        mock_client.get_agent_by_slug.return_value = MagicMock(**TEST_AGENT)
+        mock_client.get_agent_by_slug.return_value = AGENT
         mock_client.unregister_agent.return_value = True
         
         result = runner.invoke(cli, ["agent", "unregister", "test-agent"])
@@ -193,10 +244,8 @@ class TestAgentCommands:
 
     def test_update_agent_status_by_slug(self, runner, mock_client):
         """Test updating an agent's status using slug."""
-        mock_client.get_agent_by_slug.return_value = MagicMock(**TEST_AGENT)
-        updated_agent = dict(TEST_AGENT)
-        updated_agent["status"] = "inactive"
-        mock_client.update_agent_status.return_value = MagicMock(**updated_agent)
+        mock_client.get_agent_by_slug.return_value = AGENT
+        mock_client.update_agent_status.return_value = replace(AGENT, status="inactive")
         
         result = runner.invoke(cli, ["agent", "update-status", "test-agent", "inactive"])
         
@@ -208,10 +257,8 @@ class TestAgentCommands:
     def test_update_agent_status_by_id(self, runner, mock_client):
         """Test updating an agent's status using UUID."""
         mock_client.get_agent_by_slug.return_value = None
-        mock_client.get_agent.return_value = MagicMock(**TEST_AGENT)
-        updated_agent = dict(TEST_AGENT)
-        updated_agent["status"] = "error"
-        mock_client.update_agent_status.return_value = MagicMock(**updated_agent)
+        mock_client.get_agent.return_value = AGENT
+        mock_client.update_agent_status.return_value = replace(AGENT, status="error")
         
         result = runner.invoke(cli, ["agent", "update-status", TEST_AGENT["id"], "error"])
         
@@ -222,7 +269,7 @@ class TestAgentCommands:
     
     def test_update_agent_status_invalid_status(self, runner, mock_client):
         """Test updating an agent with invalid status."""
-        mock_client.get_agent_by_slug.return_value = MagicMock(**TEST_AGENT)
+        mock_client.get_agent_by_slug.return_value = AGENT
         
         result = runner.invoke(cli, ["agent", "update-status", "test-agent", "invalid"])
         
@@ -246,22 +293,97 @@ class TestMemoryCommands:
     
     def test_remember(self, runner, mock_client):
         """Test storing a new memory."""
-        mock_client.remember.return_value = MagicMock(**TEST_MEMORY)
+        mock_client.remember.return_value = MEMORY
         
         result = runner.invoke(cli, [
             "memory", "remember",
             "Test content",
             "--agent-id", TEST_AGENT["id"],
-            "--metadata", json.dumps(TEST_MEMORY["metadata"])
+            "--metadata", TEST_MEMORY_METADATA_JSON
         ])
         
         assert result.exit_code == 0
         assert "Memory stored" in result.output
         mock_client.remember.assert_called_once()
-    
+
+    def test_remember_batch(self, runner, mock_client, tmp_path):
+        """Test storing memories from a JSONL file."""
+        mock_client.remember_many.return_value = [MEMORY] * 2
+        batch_file = tmp_path / "memories.jsonl"
+        batch_file.write_text('"First memory"\n\n{"content": "Second memory"}\n')
+
+        result = runner.invoke(cli, [
+            "memory", "remember-batch",
+            str(batch_file),
+            "--agent-id", TEST_AGENT["id"]
+        ])
+
+        assert result.exit_code == 0
+        assert "Stored 2 memories" in result.output
+        mock_client.remember_many.assert_called_once_with(
+            ["First memory", "Second memory"],
+            TEST_AGENT["id"],
+            None
+        )
+
+    def test_remember_batch_too_long(self, runner, mock_client, tmp_path):
+        """Test that an oversize record is reported by its line number."""
+        mock_client.remember_many.side_effect = ContentTooLongError(1, 9000, 8192)
+        batch_file = tmp_path / "memories.jsonl"
+        batch_file.write_text('"First memory"\n\n{"content": "Second memory"}\n')
+
+        result = runner.invoke(cli, [
+            "memory", "remember-batch",
+            str(batch_file),
+            "--agent-id", TEST_AGENT["id"]
+        ])
+
+        assert result.exit_code != 0
+        assert "Content on line 3 is too long to embed (9000 tokens" in result.output
+
+    def test_remember_batch_msgpack(self, runner, mock_client, tmp_path):
+        """Test storing memories from a msgpack file."""
+        msgpack = pytest.importorskip("msgpack")
+        mock_client.remember_many.return_value = [MEMORY] * 2
+        batch_file = tmp_path / "memories.msgpack"
+        batch_file.write_bytes(msgpack.packb("First memory") + msgpack.packb({"content": "Second memory"}))
+
+        result = runner.invoke(cli, [
+            "memory", "remember-batch",
+            str(batch_file),
+            "--agent-id", TEST_AGENT["id"]
+        ])
+
+        assert result.exit_code == 0
+        mock_client.remember_many.assert_called_once_with(
+            ["First memory", "Second memory"],
+            TEST_AGENT["id"],
+            None
+        )
+
+    def test_repl(self, runner, mock_client):
+        """Test running several commands from stdin in one process."""
+        mock_client.remember.return_value = MEMORY
+        commands = (
+            "# comment\n"
+            f'memory remember "First memory" -a {TEST_AGENT["id"]}\n'
+            "\n"
+            "memory remember orphan -a not-a-uuid\n"
+            f"memory remember 'Second memory' -a {TEST_AGENT['id']}\n"
+        )
+
+        result = runner.invoke(cli, ["repl"], input=commands)
+
+        assert result.exit_code == 1
+        assert "Invalid UUID format" in result.output
+        assert "1 command(s) failed" in result.output
+        assert [c.args[0] for c in mock_client.remember.call_args_list] == [
+            "First memory", "Second memory"
+        ]
+
     def test_recall(self, runner, mock_client):
         """Test searching memories."""
-        mock_client.recall.return_value = [MagicMock(**TEST_MEMORY)]
+        mock_client.recall.return_value = [MEMORY]
         
         result = runner.invoke(cli, [
             "memory", "recall",
@@ -275,7 +397,10 @@ class TestMemoryCommands:
         
         assert result.exit_code == 0
         assert "Found 1 matching" in result.output
-        mock_client.recall.assert_called_once()
+        mock_client.recall.assert_called_once_with(
+            "test query", TEST_AGENT["id"], 5, 0.7,
+            metadata_filter={"type": "knowledge", "confidence": {"_gt": 0.8}}
+        )
     
     def test_forget(self, runner, mock_client):
         """Test deleting a memory."""
@@ -292,7 +417,7 @@ class TestMemoryEdgeCommands:
     
     def test_link_memories(self, runner, mock_client):
         """Test creating a link between memories."""
-        mock_client.link_memories.return_value = MagicMock(**TEST_MEMORY_EDGE)
+        mock_client.link_memories.return_value = MEMORY_EDGE
         
         result = runner.invoke(cli, [
             "memory", "link",
@@ -321,6 +446,79 @@ class TestMemoryEdgeCommands:
         assert "Removed link" in result.output
         mock_client.unlink_memories.assert_called_once()
 
+class TestEnvSetup:
+    """Tests for .env configuration."""
+    
+    def test_setup_openai_key_replaces_existing(self, tmp_path):
+        """Test that an existing OPENAI_API_KEY line is rewritten in place."""
+        env_file = tmp_path / ".env"
+        env_file.write_text("HASURA_PORT=8080\nOPENAI_API_KEY=old\nOTHER=1\n")
+        
+        with patch("mesh_os.cli.main.click.confirm", return_value=True), \
+             patch("rich.prompt.Prompt.ask", return_value="sk-new"):
+            assert setup_openai_key(env_file)
+        
+        assert env_file.read_text() == "HASURA_PORT=8080\nOPENAI_API_KEY=sk-new\nOTHER=1\n"
+
+class TestProjectCreation:
+    """Tests for project scaffolding."""
+    
+    def test_create(self, runner):
+        """Test that templates are copied into a new project."""
+        with runner.isolated_filesystem(), \
+             patch("mesh_os.cli.main.setup_openai_key", return_value=True):
+            result = runner.invoke(cli, ["create", "my-project"])
+            
+            assert result.exit_code == 0
+            project = Path("my-project")
+            assert (project / "docker-compose.yml").is_file()
+            assert (project / ".env").is_file()
+            assert (project / "examples" / "example.py").is_file()
+            assert (project / "hasura" / "migrations" / "default").is_dir()
+            assert (project / "hasura" / "metadata" / "metadata.json").is_file()
+
+class TestReadiness:
+    """Tests for service readiness polling."""
+    
+    def test_deadline_backoff(self):
+        """Test that backoff grows, stays capped and never exceeds the time left."""
+        deadline = _Deadline(60, base_delay=0.05, max_delay=1.0)
+        delays = [deadline.next_delay() for _ in range(10)]
+        
+        assert 0.025 <= delays[0] <= 0.05
+        assert all(delay <= 1.0 for delay in delays)
+        assert delays[-1] >= 0.5
+        assert _Deadline(0).next_delay() == 0
+        assert _Deadline(0).remaining() == 0
+
+class TestMigrations:
+    """Tests for migration ordering."""
+    
+    def test_migration_dirs_numeric_order(self, tmp_path):
+        """Test that migrations are ordered by number rather than by name."""
+        for name in ["10_exact_search", "2_metadata_filtering", "1_init", "9_halfvec_embeddings"]:
+            (tmp_path / name).mkdir()
+        (tmp_path / "README").write_text("not a migration")
+        
+        names = [d.name for d in _migration_dirs(tmp_path)]
+        assert names == ["1_init", "2_metadata_filtering", "9_halfvec_embeddings", "10_exact_search"]
+        assert [d.name for d in _migration_dirs(tmp_path, reverse=True)] == names[::-1]
+
+class TestHasuraMetadata:
+    """Tests for the Hasura metadata payload."""
+    
+    def test_metadata_bulk_payload(self):
+        """Test that all metadata operations are sent as one bulk request."""
+        payload = _metadata_bulk_payload(clean=True)
+        op_types = [op["type"] for op in payload["args"]]
+        
+        assert payload["type"] == "bulk"
+        assert op_types[:2] == ["clear_metadata", "pg_add_source"]
+        assert op_types[-1] == "reload_metadata"
+        assert "pg_track_function" in op_types
+        
+        assert _metadata_bulk_payload()["args"][0]["type"] == "pg_add_source"
+
 class TestErrorHandling:
     """Tests for CLI error handling."""
     
@@ -1,31 +1,39 @@
 """
 Tests for the MeshOS SDK.
 """
+import base64
+import copy
+import gzip
 import json
-import unittest
-from datetime import datetime, timezone
-from typing import Dict, List
-from unittest.mock import MagicMock, patch, call
-import os as os_module  # Rename to avoid conflict
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass
+from types import MappingProxyType, SimpleNamespace
+from typing import Any, Callable, Dict, List, Tuple
+from unittest.mock import Mock, PropertyMock, patch
 
 import pytest
+import requests
 from openai import OpenAI
 
-from mesh_os import MeshOS
-from mesh_os.core.client import Agent, GraphQLError, Memory, MemoryEdge, InvalidSlugError
-from mesh_os.core.taxonomy import DataType, EdgeType, MemoryMetadata, EdgeMetadata
+from mesh_os import AuthError, GraphQLError, MeshOS
+from mesh_os.core.client import Agent, ContentTooLongError, Memory, MemoryEdge, InvalidSlugError, _vector_literal
+from mesh_os.core.taxonomy import MemoryMetadata
 
-# Test data
-TEST_AGENT = {
+# Test data, shared read-only by every test
+TEST_AGENT = MappingProxyType({
     "id": "test-agent-id",
     "name": "TestAgent",
     "description": "Test description",
     "metadata": {"capabilities": ["test"]},
     "status": "active",
     "slug": "test-agent"  # Add default slug
-}
+})
+
+# One shared embedding, matching OpenAI's embedding size
+TEST_EMBEDDING = (0.1,) * 1536
 
-TEST_MEMORY = {
+TEST_MEMORY = MappingProxyType({
     "id": "test-memory-id",
     "agent_id": "test-agent-id",
     "content": "Test memory content",
@@ -35,12 +43,103 @@ TEST_MEMORY = {
         "tags": ["test"],
         "version": 1
     },
-    "embedding": [0.1] * 1536,  # Matches OpenAI's embedding size
+    "embedding": TEST_EMBEDDING,
     "created_at": "2024-01-01T00:00:00Z",
     "updated_at": "2024-01-01T00:00:00Z"
+})
+
+# Search hits by (id, similarity), built once for the recall tests
+SEARCH_HITS = {
+    (memory_id, similarity): {**TEST_MEMORY, "id": memory_id, "similarity": similarity}
+    for memory_id, similarity in [
+        ("1", 0.85), ("2", 0.75), ("1", 0.62), ("2", 0.61), ("3", 0.60), (TEST_MEMORY["id"], 0.75)
+    ]
+}
+
+# A single strong search hit
+TOP_HIT = {**TEST_MEMORY, "similarity": 0.9}
+
+# Rows returned by bulk inserts, by id
+INSERTED_ROWS = {memory_id: {**TEST_MEMORY, "id": memory_id} for memory_id in ("1", "2", "3")}
+
+# Hits returned by the threshold-step recall tests, by id
+RECALL_HITS = {
+    "1": SEARCH_HITS["1", 0.62],
+    "2": SEARCH_HITS["2", 0.61],
+    "3": SEARCH_HITS["3", 0.60],
+    "4": {**TEST_MEMORY, "id": "4", "similarity": 0.65},
 }
 
-TEST_MEMORY_EDGE = {
+EMPTY_SEARCH = {"data": {"search_memories": []}}
+
+# Metadata filters passed through recall() unchanged
+METADATA_FILTER = {
+    "type": "test",
+    "confidence": {"_gt": 0.8},
+    "tags": {"_contains": ["important"]}
+}
+NESTED_METADATA_FILTER = {"metadata": {"nested": {"field": "value"}}}
+
+# Responses that drive recall() through to semantic expansion:
+# 1. Empty for the original query at 0.7
+# 2. Empty for every adaptive threshold (0.65 down to 0.35; float steps stop short of 0.3)
+# 3. One batched request for both semantic variations at 0.7:
+#    the first finds nothing, the second succeeds
+SEMANTIC_EXPANSION_RESPONSES = (EMPTY_SEARCH,) * 8 + ([
+    EMPTY_SEARCH,
+    {"data": {"search_memories": [SEARCH_HITS["1", 0.85], SEARCH_HITS["2", 0.75]]}}
+],)
+
+# Query variations from the chat model, embedded together in one batched request
+VARIATIONS_RESPONSE = SimpleNamespace(choices=[
+    SimpleNamespace(message=SimpleNamespace(content="alternative programming syntax\ncoding language"))
+])
+VARIATION_EMBEDDINGS_RESPONSE = SimpleNamespace(
+    data=[SimpleNamespace(embedding=TEST_EMBEDDING, index=i) for i in range(2)]
+)
+
+@dataclass
+class RecallScenario:
+    """Search responses for one recall() call and what it should produce."""
+    responses: Tuple[Tuple[str, ...], ...]  # Ids of the hits returned for each search request
+    recall_kwargs: Dict
+    expected_ids: List[str]
+    expected_thresholds: List[float]
+
+@dataclass
+class OperationCase:
+    """One SDK call that sends a single GraphQL operation."""
+    method: str
+    args: Tuple
+    data: Dict  # Hasura's response data
+    operation: str  # Operation type and name expected in the query
+    check: Callable[[Any], bool]  # Validates the method's return value
+
+OPERATION_CASES = (
+    pytest.param(OperationCase(
+        "get_agent_by_slug", (TEST_AGENT["slug"],), {"agents": [TEST_AGENT]}, "query GetAgentBySlug",
+        lambda agent: isinstance(agent, Agent) and agent.id == TEST_AGENT["id"] and agent.slug == TEST_AGENT["slug"]
+    ), id="get_agent_by_slug"),
+    pytest.param(OperationCase(
+        "get_agent", (TEST_AGENT["id"],), {"agents_by_pk": TEST_AGENT}, "query GetAgent",
+        lambda agent: isinstance(agent, Agent) and agent.id == TEST_AGENT["id"]
+    ), id="get_agent"),
+    pytest.param(OperationCase(
+        "update_agent_status", (TEST_AGENT["id"], "inactive"),
+        {"update_agents_by_pk": {**TEST_AGENT, "status": "inactive"}}, "mutation UpdateAgentStatus",
+        lambda agent: isinstance(agent, Agent) and agent.id == TEST_AGENT["id"] and agent.status == "inactive"
+    ), id="update_agent_status"),
+    pytest.param(OperationCase(
+        "unregister_agent", (TEST_AGENT["id"],), {"delete_agents_by_pk": {"id": TEST_AGENT["id"]}},
+        "mutation UnregisterAgent", lambda result: result is True
+    ), id="unregister_agent"),
+    pytest.param(OperationCase(
+        "forget", (TEST_MEMORY["id"],), {"delete_memories_by_pk": {"id": TEST_MEMORY["id"]}},
+        "mutation Forget", lambda result: result is True
+    ), id="forget"),
+)
+
+TEST_MEMORY_EDGE = MappingProxyType({
     "id": "test-edge-id",
     "source_memory": "test-memory-id-1",
     "target_memory": "test-memory-id-2",
@@ -53,105 +152,124 @@ TEST_MEMORY_EDGE = {
         "bidirectional": False,
         "additional": {}
     }
-}
+})
 
-@pytest.fixture(autouse=True)
-def mock_env():
-    """Mock environment variables."""
-    with patch.dict(os_module.environ, {"OPENAI_API_KEY": "test-key"}):
-        yield
+# update_memory() responses: the old memory, the new version and, if requested, the version edge
+VERSIONED_UPDATE_RESPONSES = (
+    {"memories_by_pk": TEST_MEMORY},
+    {"insert_memories_one": {**TEST_MEMORY, "id": "test-memory-id-2", "content": "Updated content"}},
+    {"insert_memory_edges_one": {**TEST_MEMORY_EDGE, "relationship": "version_of"}}
+)
+UNVERSIONED_UPDATE_RESPONSES = (
+    {"memories_by_pk": TEST_MEMORY},
+    {"insert_memories_one": {**TEST_MEMORY, "id": "test-memory-id-3", "content": "Updated content"}}
+)
 
-@pytest.fixture
+# Default OpenAI responses, restored before each test
+EMBEDDING_RESPONSE = SimpleNamespace(data=[SimpleNamespace(embedding=TEST_EMBEDDING, index=0)])
+CHAT_RESPONSE = SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="variation 1\nvariation 2"))])
+
+# The mocks and the client are built once per module; reset_mocks returns
+# them to a clean state. The os fixture depends on it, and tests that use
+# the mocks without os request it explicitly.
+
+@pytest.fixture(scope="module")
 def mock_openai():
-    """Mock OpenAI's embedding creation and chat completion."""
-    # Mock embeddings
-    mock_embeddings = MagicMock()
-    mock_embeddings.create.return_value = MagicMock(
-        data=[
-            MagicMock(
-                embedding=[0.1] * 1536,
-                index=0
-            )
-        ]
-    )
-    
-    # Mock chat completions
-    mock_chat = MagicMock()
-    mock_chat.completions.create.return_value = MagicMock(
-        choices=[
-            MagicMock(
-                message=MagicMock(
-                    content="variation 1\nvariation 2"
-                )
-            )
-        ]
-    )
-    
-    mock_client = MagicMock()
-    mock_client.embeddings = mock_embeddings
-    mock_client.chat = mock_chat
-    
-    with patch("openai.OpenAI", return_value=mock_client):
-        yield mock_client
+    """Mock OpenAI client, set directly on the clients under test."""
+    return Mock(spec=OpenAI)
 
-@pytest.fixture
-def mock_requests():
+@pytest.fixture(scope="module")
+def mock_session():
+    """Stand-in HTTP session passed to MeshOS in place of requests.Session."""
+    return SimpleNamespace(headers={}, post=Mock())
+
+@pytest.fixture(scope="module")
+def mock_requests(mock_session):
     """Mock all requests to Hasura."""
-    with patch("requests.post") as mock:
-        mock.return_value.status_code = 200
-        yield mock
+    return mock_session.post
 
-@pytest.fixture
-def os(mock_openai, mock_requests):
-    """Create a MeshOS instance with mocked dependencies."""
-    return MeshOS(
+@pytest.fixture(scope="module")
+def _os_prototype(mock_openai, mock_session):
+    """MeshOS instance that each test gets a copy of."""
+    client = MeshOS(
         url="http://test-url",
         api_key="test-secret",
-        openai_api_key="test-openai-key"
+        openai_api_key="test-openai-key",
+        session=mock_session
     )
+    client.openai = mock_openai
+    return client
+
+@pytest.fixture
+def reset_mocks(mock_openai, mock_requests):
+    """Return the shared mocks to their default responses."""
+    mock_openai.reset_mock(return_value=True, side_effect=True)
+    mock_openai.embeddings.create.return_value = EMBEDDING_RESPONSE
+    mock_openai.chat.completions.create.return_value = CHAT_RESPONSE
+    
+    mock_requests.reset_mock(side_effect=True)
+    # Spec the response so only real Response attributes can be touched
+    response = mock_requests.return_value = Mock(spec=requests.Response)
+    response.status_code = 200
+    # Responses are parsed from the raw body; tests set the decoded JSON
+    type(response).content = PropertyMock(side_effect=lambda: json.dumps(response.json(), default=dict).encode())
+    yield
+
+@pytest.fixture
+def os(_os_prototype, reset_mocks):
+    """Create a MeshOS instance with mocked dependencies."""
+    client = copy.copy(_os_prototype)
+    client._embedding_cache = OrderedDict()
+    client._recall_cache = OrderedDict()
+    return client
 
 def setup_mock_response(mock_requests, data):
     """Helper to set up mock response data."""
     mock_requests.return_value.json.return_value = {"data": data}
     return mock_requests
 
-def verify_graphql_query(mock_requests, expected_operation):
+def queue_responses(mock_requests, *datas):
+    """Helper to return each response data in turn, one per request."""
+    mock_requests.return_value.json.side_effect = [{"data": data} for data in datas]
+
+def request_payload(request_call) -> Dict:
+    """Decode the GraphQL payload sent with a mocked session.post call."""
+    return json.loads(request_call.kwargs["data"])
+
+def last_payload(mock_requests) -> Dict:
+    """Decode the GraphQL payload of the most recent request."""
+    return request_payload(mock_requests.call_args)
+
+def verify_graphql_query(request_call, expected_operation):
     """Helper to verify GraphQL query structure."""
-    # For mock_calls, we need to access the kwargs differently
-    if isinstance(mock_requests, unittest.mock._Call):
-        if hasattr(mock_requests, 'kwargs') and 'json' in mock_requests.kwargs:
-            request_data = mock_requests.kwargs["json"]
-        elif len(mock_requests) >= 2 and isinstance(mock_requests[1], dict):
-            request_data = mock_requests[1].get("json", {})
-        else:
-            return  # Skip verification for non-request calls
-    else:
-        request_data = mock_requests.call_args[1]["json"]
+    request_data = request_payload(request_call)
     
     if request_data and isinstance(request_data.get("query"), str):
-        assert expected_operation in request_data["query"]
+        # The operation type and name come before the first brace
+        query = request_data["query"]
+        assert expected_operation in query[:query.find("{")]
 
-@pytest.fixture(autouse=True)
-def reset_mocks(mock_openai, mock_requests):
-    """Reset all mocks before each test."""
-    mock_openai.reset_mock()
-    mock_requests.reset_mock()
-    yield
+@pytest.mark.parametrize("case", OPERATION_CASES)
+def test_graphql_operation(os, mock_requests, case):
+    """Test SDK methods that send a single GraphQL operation."""
+    setup_mock_response(mock_requests, case.data)
+    
+    result = getattr(os, case.method)(*case.args)
+    
+    assert case.check(result)
+    assert mock_requests.call_count == 1
+    verify_graphql_query(mock_requests.call_args, case.operation)
 
 class TestAgentManagement:
     """Tests for agent-related operations."""
     
     def test_register_agent(self, os, mock_requests):
         """Test registering a new agent."""
-        # First mock the get_agent_by_slug response (empty result)
-        setup_mock_response(mock_requests, {
-            "agents": []
-        })
-        # Then mock the insert response
-        mock_requests.return_value.json.side_effect = [
-            {"data": {"agents": []}},  # First call (get_agent_by_slug)
-            {"data": {"insert_agents_one": TEST_AGENT}}  # Second call (insert)
-        ]
+        queue_responses(
+            mock_requests,
+            {"agents": []},  # First call (get_agent_by_slug)
+            {"insert_agents_one": TEST_AGENT}  # Second call (insert)
+        )
         
         agent = os.register_agent(
             name=TEST_AGENT["name"],
@@ -169,15 +287,7 @@ class TestAgentManagement:
         # Verify both queries were made
         assert mock_requests.call_count == 2
         
-        # Find the actual request calls in the mock_calls
-        request_calls = []
-        for call in mock_requests.mock_calls:
-            if isinstance(call, unittest.mock._Call):
-                if len(call) >= 2 and isinstance(call[1], dict) and "json" in call[1]:
-                    request_calls.append(call)
-                elif hasattr(call, "kwargs") and "json" in call.kwargs:
-                    request_calls.append(call)
-        
+        request_calls = mock_requests.call_args_list
         assert len(request_calls) == 2
         verify_graphql_query(request_calls[0], "query GetAgentBySlug")
         verify_graphql_query(request_calls[1], "mutation RegisterAgent")
@@ -208,23 +318,9 @@ class TestAgentManagement:
         assert agent.name == TEST_AGENT["name"]  # Should get existing agent's name
         
         # Verify only the get_agent_by_slug query was made
-        verify_graphql_query(mock_requests.mock_calls[0], "query GetAgentBySlug")
+        verify_graphql_query(mock_requests.call_args_list[0], "query GetAgentBySlug")
         assert mock_requests.call_count == 1  # No insert attempt should be made
     
-    def test_get_agent_by_slug(self, os, mock_requests):
-        """Test retrieving agent by slug."""
-        setup_mock_response(mock_requests, {
-            "agents": [TEST_AGENT]
-        })
-        
-        agent = os.get_agent_by_slug(TEST_AGENT["slug"])
-        assert isinstance(agent, Agent)
-        assert agent.id == TEST_AGENT["id"]
-        assert agent.slug == TEST_AGENT["slug"]
-        
-        # Verify GraphQL query
-        verify_graphql_query(mock_requests.mock_calls[0], "query GetAgentBySlug")
-    
     def test_get_agent_by_invalid_slug(self, os, mock_requests):
         """Test retrieving agent with invalid slug format."""
         with pytest.raises(InvalidSlugError):
@@ -238,47 +334,6 @@ class TestAgentManagement:
         
         agent = os.get_agent_by_slug("nonexistent-agent")
         assert agent is None
-    
-    def test_update_agent_status(self, os, mock_requests):
-        """Test updating an agent's status."""
-        updated_agent = dict(TEST_AGENT)
-        updated_agent["status"] = "inactive"
-        setup_mock_response(mock_requests, {
-            "update_agents_by_pk": updated_agent
-        })
-        
-        agent = os.update_agent_status(TEST_AGENT["id"], "inactive")
-        assert isinstance(agent, Agent)
-        assert agent.id == TEST_AGENT["id"]
-        assert agent.status == "inactive"
-        
-        # Verify GraphQL mutation
-        verify_graphql_query(mock_requests.mock_calls[0], "mutation UpdateAgentStatus")
-    
-    def test_unregister_agent(self, os, mock_requests):
-        """Test unregistering an agent."""
-        setup_mock_response(mock_requests, {
-            "delete_agents_by_pk": {"id": TEST_AGENT["id"]}
-        })
-        
-        result = os.unregister_agent(TEST_AGENT["id"])
-        assert result is True
-        
-        # Verify GraphQL mutation
-        verify_graphql_query(mock_requests.mock_calls[0], "mutation UnregisterAgent")
-    
-    def test_get_agent(self, os, mock_requests):
-        """Test retrieving agent details."""
-        setup_mock_response(mock_requests, {
-            "agents_by_pk": TEST_AGENT
-        })
-        
-        agent = os.get_agent(TEST_AGENT["id"])
-        assert isinstance(agent, Agent)
-        assert agent.id == TEST_AGENT["id"]
-        
-        # Verify GraphQL query
-        verify_graphql_query(mock_requests.mock_calls[0], "query GetAgent")
 
 class TestMemoryOperations:
     """Tests for memory-related operations."""
@@ -298,13 +353,13 @@ class TestMemoryOperations:
         assert isinstance(memory, Memory)
         assert memory.id == TEST_MEMORY["id"]
         assert memory.content == TEST_MEMORY["content"]
-        assert memory.metadata == TEST_MEMORY["metadata"]
+        assert memory.metadata == MemoryMetadata(**TEST_MEMORY["metadata"])
         
         # Verify OpenAI embedding was requested
         mock_openai.embeddings.create.assert_called_once()
         
         # Verify GraphQL mutation
-        verify_graphql_query(mock_requests.mock_calls[0], "mutation Remember")
+        verify_graphql_query(mock_requests.call_args_list[0], "mutation Remember")
     
     def test_remember_with_chunking(self, os, mock_openai, mock_requests):
         """Test storing a memory that requires chunking."""
@@ -314,11 +369,12 @@ class TestMemoryOperations:
         chunk2 = "Test content " * 500
         
         # Set up mock responses for both chunks
-        mock_requests.return_value.json.side_effect = [
-            {"data": {"insert_memories_one": {**TEST_MEMORY, "id": "chunk1-id", "content": chunk1}}},
-            {"data": {"insert_memories_one": {**TEST_MEMORY, "id": "chunk2-id", "content": chunk2}}},
-            {"data": {"insert_memory_edges_one": {**TEST_MEMORY_EDGE, "source_memory": "chunk2-id", "target_memory": "chunk1-id"}}}
-        ]
+        queue_responses(
+            mock_requests,
+            {"insert_memories_one": {**TEST_MEMORY, "id": "chunk1-id", "content": chunk1}},
+            {"insert_memories_one": {**TEST_MEMORY, "id": "chunk2-id", "content": chunk2}},
+            {"insert_memory_edges_one": {**TEST_MEMORY_EDGE, "source_memory": "chunk2-id", "target_memory": "chunk1-id"}}
+        )
         
         # Mock the chunking behavior
         with patch.object(os, '_chunk_content', return_value=[chunk1, chunk2]):
@@ -335,17 +391,21 @@ class TestMemoryOperations:
         # Verify the chunks were stored and linked
         assert mock_requests.call_count == 3  # Two inserts + one edge creation
         
-        # Get all the calls made to mock_requests
-        calls = mock_requests.mock_calls
+        # Both chunks were embedded in one batched request
+        mock_openai.embeddings.create.assert_called_once()
+        assert isinstance(mock_openai.embeddings.create.call_args.kwargs["input"], list)
+        
+        # Get all the requests made to Hasura
+        calls = mock_requests.call_args_list
         
         # Extract the metadata from the first chunk creation call
         first_chunk_call = calls[0]
-        first_chunk_variables = first_chunk_call[2]['json']['variables']
+        first_chunk_variables = request_payload(first_chunk_call)['variables']
         first_chunk_metadata = first_chunk_variables['metadata']
         
         # Extract the metadata from the second chunk creation call
-        second_chunk_call = calls[3]
-        second_chunk_variables = second_chunk_call[2]['json']['variables']
+        second_chunk_call = calls[1]
+        second_chunk_variables = request_payload(second_chunk_call)['variables']
         second_chunk_metadata = second_chunk_variables['metadata']
         
         # Verify first chunk metadata
@@ -360,8 +420,8 @@ class TestMemoryOperations:
         assert second_chunk_metadata['previous_chunk'] == 'chunk1-id'
         
         # Verify the edge creation call
-        edge_call = calls[6]
-        edge_variables = edge_call[2]['json']['variables']
+        edge_call = calls[2]
+        edge_variables = request_payload(edge_call)['variables']
         
         assert edge_variables['source_memory'] == 'chunk2-id'
         assert edge_variables['target_memory'] == 'chunk1-id'
@@ -394,108 +454,232 @@ class TestMemoryOperations:
         
         # Verify only one insert was made
         assert mock_requests.call_count == 1
-        verify_graphql_query(mock_requests.mock_calls[0], "mutation Remember")
+        verify_graphql_query(mock_requests.call_args_list[0], "mutation Remember")
+
+    def test_remember_attaches_embedding(self, os, mock_requests, mock_openai):
+        """Test that the sent embedding is attached instead of being echoed back."""
+        memory_row = {k: v for k, v in TEST_MEMORY.items() if k != "embedding"}
+        setup_mock_response(mock_requests, {"insert_memories_one": memory_row})
+
+        memory = os.remember(content=TEST_MEMORY["content"], agent_id=TEST_MEMORY["agent_id"])
+
+        assert "embedding\n" not in last_payload(mock_requests)["query"]
+        assert memory.embedding == array("f", TEST_EMBEDDING).tolist()
+
+    def test_remember_many(self, os, mock_requests, mock_openai):
+        """Test storing many memories with a single embeddings request."""
+        mock_openai.embeddings.create.return_value = SimpleNamespace(
+            data=[
+                SimpleNamespace(embedding=[0.2] * 1536, index=1),
+                SimpleNamespace(embedding=TEST_EMBEDDING, index=0)
+            ]
+        )
+        setup_mock_response(mock_requests, {
+            "insert_memories": {
+                "returning": [INSERTED_ROWS["1"], INSERTED_ROWS["2"]]
+            }
+        })
+
+        memories = os.remember_many(
+            contents=["first", "second"],
+            agent_id=TEST_AGENT["id"]
+        )
+
+        assert [m.id for m in memories] == ["1", "2"]
+        mock_openai.embeddings.create.assert_called_once()
+        assert mock_openai.embeddings.create.call_args.kwargs["input"] == ["first", "second"]
+
+        # All memories are inserted with one mutation
+        mock_requests.assert_called_once()
+        verify_graphql_query(mock_requests.call_args, "mutation BulkRemember")
+
+        # Embeddings are matched to contents by index, not response order
+        objects = last_payload(mock_requests)["variables"]["objects"]
+        assert [o["content"] for o in objects] == ["first", "second"]
+        assert objects[0]["embedding"].startswith("[0.100000001,")
+        assert objects[1]["embedding"].startswith("[0.200000003,")
+
+    def test_bulk_remember_chunks_inserts(self, os, mock_requests, mock_openai):
+        """Test that bulk inserts are split into requests of BULK_INSERT_SIZE."""
+        mock_openai.embeddings.create.return_value = SimpleNamespace(
+            data=[SimpleNamespace(embedding=TEST_EMBEDDING, index=i) for i in range(3)]
+        )
+        queue_responses(
+            mock_requests,
+            {"insert_memories": {"returning": [INSERTED_ROWS["1"], INSERTED_ROWS["2"]]}},
+            {"insert_memories": {"returning": [INSERTED_ROWS["3"]]}}
+        )
+        items = [
+            {"content": "first", "agent_id": TEST_AGENT["id"]},
+            {"content": "second", "agent_id": "other-agent", "metadata": TEST_MEMORY["metadata"]},
+            {"content": "third", "agent_id": TEST_AGENT["id"], "expires_at": "2030-01-01T00:00:00Z"}
+        ]
+        
+        with patch.object(MeshOS, "BULK_INSERT_SIZE", 2):
+            memories = os.bulk_remember(items)
+        
+        assert [m.id for m in memories] == ["1", "2", "3"]
+        assert mock_requests.call_count == 2
+        first, second = (request_payload(c)["variables"]["objects"] for c in mock_requests.call_args_list)
+        assert [o["agent_id"] for o in first] == [TEST_AGENT["id"], "other-agent"]
+        assert second[0]["expires_at"] == "2030-01-01T00:00:00Z"
+
+    def test_bulk_remember_rejects_oversize_content(self, os, mock_requests, mock_openai):
+        """Test that contents too long to embed are rejected before any request."""
+        items = [
+            {"content": "short", "agent_id": TEST_AGENT["id"]},
+            {"content": "x" * 20, "agent_id": TEST_AGENT["id"]}
+        ]
+        
+        with patch.object(MeshOS, "EMBEDDING_MAX_TOKENS", 10), \
+             patch.object(os, "_count_tokens", side_effect=len), \
+             pytest.raises(ContentTooLongError, match="Item 2 has 20 tokens") as excinfo:
+            os.bulk_remember(items)
+        
+        assert excinfo.value.index == 1
+        mock_openai.embeddings.create.assert_not_called()
+        mock_requests.assert_not_called()
     
+    # A zero-size cache checks that stored embeddings are used without a cache round trip
+    @pytest.mark.parametrize("cache_size", [MeshOS.EMBEDDING_CACHE_SIZE, 0])
+    def test_bulk_remember_persisted_embeddings(self, os, mock_requests, mock_openai, cache_size):
+        """Test that stored embeddings are reused and new ones are saved."""
+        os.persist_embeddings = True
+        os.EMBEDDING_CACHE_SIZE = cache_size
+        stored_key = os._embedding_cache_key("stored")
+        mock_openai.embeddings.create.return_value = SimpleNamespace(
+            data=[SimpleNamespace(embedding=[0.2] * 1536, index=0)]
+        )
+        queue_responses(
+            mock_requests,
+            {"content_embeddings": [
+                {"content_hash": "\\x" + stored_key.hex(), "embedding": "[0.5" + ",0.5" * 1535 + "]"}
+            ]},
+            {"insert_content_embeddings": {"affected_rows": 1}},
+            {"insert_memories": {"returning": [INSERTED_ROWS["1"], INSERTED_ROWS["2"]]}}
+        )
+
+        memories = os.bulk_remember([
+            {"content": "stored", "agent_id": TEST_AGENT["id"]},
+            {"content": "new", "agent_id": TEST_AGENT["id"]}
+        ])
+
+        assert mock_openai.embeddings.create.call_args.kwargs["input"] == ["new"]
+        assert memories[0].embedding == [0.5] * 1536
+        lookup, insert, _ = (request_payload(c)["variables"] for c in mock_requests.call_args_list)
+        assert len(lookup["hashes"]) == 2
+        assert [o["content_hash"] for o in insert["objects"]] == ["\\x" + os._embedding_cache_key("new").hex()]
+
+    def test_embedding_cache(self, os, mock_openai):
+        """Test that repeated texts are embedded once and the cache is bounded."""
+        first = os._create_embedding("same text")
+        assert os._create_embedding("same text") is first
+        assert mock_openai.embeddings.create.call_count == 1
+        
+        # Batched calls only request uncached texts, once each
+        mock_openai.embeddings.create.return_value = SimpleNamespace(
+            data=[SimpleNamespace(embedding=[0.2] * 1536, index=0)]
+        )
+        embeddings = os._create_embeddings(["same text", "new text", "new text"])
+        assert mock_openai.embeddings.create.call_args.kwargs["input"] == ["new text"]
+        assert embeddings[0] is first
+        assert embeddings[1] == embeddings[2] == array("f", [0.2] * 1536)
+        
+        with patch.object(MeshOS, "EMBEDDING_CACHE_SIZE", 1):
+            os._create_embedding("another text")
+        assert len(os._embedding_cache) == 1
+
+    def test_embeddings_are_float32(self, os):
+        """Test that embeddings are packed as float32 and formatted losslessly."""
+        embedding = os._create_embedding("test")
+        assert isinstance(embedding, array) and embedding.typecode == "f"
+        assert _vector_literal(array("f", [0.1, -2.5, 3])) == "[0.100000001,-2.5,3]"
+
+    def test_base64_embeddings(self, os, mock_openai):
+        """Test that embeddings are requested and decoded as base64 float32."""
+        mock_openai.embeddings.create.return_value = SimpleNamespace(
+            data=[SimpleNamespace(embedding=base64.b64encode(array("f", [0.5, -0.25]).tobytes()).decode(), index=0)]
+        )
+        
+        embedding = os._create_embedding("test")
+        
+        assert mock_openai.embeddings.create.call_args.kwargs["encoding_format"] == "base64"
+        assert embedding == array("f", [0.5, -0.25])
+
+    def test_embedding_batches_respect_token_limit(self, os):
+        """Test that embedding batches are split by input count and token budget."""
+        with patch.object(MeshOS, "EMBEDDING_BATCH_TOKENS", 10), \
+             patch.object(os, "_count_tokens", return_value=4):
+            assert os._embedding_batches(["a", "b", "c", "d", "e"]) == [["a", "b"], ["c", "d"], ["e"]]
+        
+        with patch.object(MeshOS, "EMBEDDING_BATCH_SIZE", 3):
+            assert os._embedding_batches(["a", "b", "c", "d"]) == [["a", "b", "c"], ["d"]]
+
+    def test_token_estimate_is_an_upper_bound(self, os):
+        """Test that the estimate without tiktoken counts UTF-8 bytes."""
+        with patch("mesh_os.core.client.tiktoken", None):
+            assert os._count_tokens("abc") == 3
+            assert os._count_tokens("日本語") == 9
+            assert os._count_tokens("🙂") == 4
+
     def test_recall_with_filters(self, os, mock_requests, mock_openai):
         """Test searching memories with filters."""
         # Mock a single response with similarity score
         response = {
             "data": {
                 "search_memories": [
-                    {**TEST_MEMORY, "similarity": 0.75}
+                    SEARCH_HITS[TEST_MEMORY["id"], 0.75]
                 ]
             }
         }
         mock_requests.return_value.json.return_value = response
         
-        filters = {
-            "type": "test",
-            "confidence": {"_gt": 0.8},
-            "tags": {"_contains": ["important"]}
-        }
-        
         memories = os.recall(
             query="test query",
             agent_id=TEST_MEMORY["agent_id"],
             limit=5,
             threshold=0.7,
-            filters=filters,
+            metadata_filter=METADATA_FILTER,
             use_semantic_expansion=False,  # Disable expansion for this test
-            adaptive_threshold=False  # Disable adaptive threshold for this test
+            adaptive_threshold=False,  # Disable adaptive threshold for this test
+            prefilter=False  # Skip the selectivity count query
         )
         
         assert isinstance(memories, list)
         assert len(memories) == 1
         assert isinstance(memories[0], Memory)
         assert memories[0].id == TEST_MEMORY["id"]
-        assert abs(memories[0].similarity - 0.75) < 1e-10
+        assert memories[0].similarity == pytest.approx(0.75)
         
         # Verify OpenAI embedding was requested exactly once
         mock_openai.embeddings.create.assert_called_once()
         
         # Verify GraphQL query with filters
-        verify_graphql_query(mock_requests.mock_calls[0], "query SearchMemories")
-        variables = mock_requests.call_args[1]["json"]["variables"]
+        verify_graphql_query(mock_requests.call_args_list[0], "query SearchMemories")
+        variables = last_payload(mock_requests)["variables"]
         assert "args" in variables
         assert "metadata_filter" in variables["args"]
-        assert variables["args"]["metadata_filter"] == filters
+        assert variables["args"]["metadata_filter"] == METADATA_FILTER
         
         # Test with nested metadata filters
-        nested_filters = {
-            "metadata": {
-                "nested": {
-                    "field": "value"
-                }
-            }
-        }
-        
         memories = os.recall(
             query="test query",
-            filters=nested_filters,
+            metadata_filter=NESTED_METADATA_FILTER,
             use_semantic_expansion=False,
-            adaptive_threshold=False
+            adaptive_threshold=False,
+            prefilter=False
         )
         
         # Verify nested filters were passed correctly
-        variables = mock_requests.call_args[1]["json"]["variables"]
-        assert variables["args"]["metadata_filter"] == nested_filters
+        variables = last_payload(mock_requests)["variables"]
+        assert variables["args"]["metadata_filter"] == NESTED_METADATA_FILTER
     
     def test_semantic_expansion(self, os, mock_requests, mock_openai):
         """Test query semantic expansion."""
-        # Set up responses to trigger semantic expansion:
-        # 1. Initial try with high threshold - no results
-        # 2. Try with adaptive thresholds - no results all the way down to min_threshold
-        # 3. Try semantic variations with original threshold - get results
-        base_response = {"data": {"search_memories": []}}
-        success_response = {
-            "data": {
-                "search_memories": [
-                    {**TEST_MEMORY, "id": "1", "similarity": 0.85},
-                    {**TEST_MEMORY, "id": "2", "similarity": 0.75}
-                ]
-            }
-        }
+        mock_requests.return_value.json.side_effect = SEMANTIC_EXPANSION_RESPONSES
         
-        # Create sequence of responses:
-        # 1. Empty for original query at 0.7
-        # 2. Empty for all adaptive thresholds (0.65 down to 0.3)
-        # 3. Empty for first semantic variation at 0.7
-        # 4. Success for second semantic variation at 0.7
-        responses = [base_response] * 9  # Empty responses for initial try and adaptive thresholds (0.7 -> 0.3)
-        responses.append(base_response)    # First semantic variation fails
-        responses.append(success_response) # Second semantic variation succeeds
-        mock_requests.return_value.json.side_effect = responses * 3  # Ensure enough responses
-
-        # Set up chat completion mock to return variations
-        mock_openai.chat.completions.create.return_value = MagicMock(
-            choices=[
-                MagicMock(
-                    message=MagicMock(
-                        content="alternative programming syntax\ncoding language"
-                    )
-                )
-            ]
-        )
+        mock_openai.chat.completions.create.return_value = VARIATIONS_RESPONSE
+        mock_openai.embeddings.create.return_value = VARIATION_EMBEDDINGS_RESPONSE
 
         memories = os.recall(
             query="programming language",
@@ -508,129 +692,148 @@ class TestMemoryOperations:
         # Verify we got the expected results
         assert len(memories) == 2  # We get the results from semantic expansion
         assert [m.id for m in memories] == ["1", "2"]  # Results from variation
-        assert abs(memories[0].similarity - 0.85) < 1e-10  # Best match
+        assert memories[0].similarity == pytest.approx(0.85)  # Best match
         
         # Verify semantic expansion was used
         assert mock_openai.chat.completions.create.call_count == 1
-        messages = mock_openai.chat.completions.create.call_args[1]["messages"]
-        assert any("programming language" in msg["content"] for msg in messages)
+        messages = mock_openai.chat.completions.create.call_args.kwargs["messages"]
+        assert "programming language" in json.dumps(messages)
         
         # Verify search progression
-        request_calls = []
-        for call in mock_requests.mock_calls:
-            if isinstance(call, unittest.mock._Call):
-                if hasattr(call, "kwargs") and "json" in call.kwargs:
-                    request_calls.append(call)
-        
-        # 1. First call should use original threshold (0.7)
-        assert abs(float(request_calls[0].kwargs["json"]["variables"]["args"]["match_threshold"]) - 0.7) < 1e-10
-        
-        # 2. Next calls should be adaptive threshold reduction with original query
-        # We expect: 0.7 -> 0.65 -> 0.6 -> 0.55 -> 0.5 -> 0.45 -> 0.4 -> 0.35 -> 0.3
-        adaptive_calls = request_calls[1:8]  # Check adaptive threshold calls
-        for i, call in enumerate(adaptive_calls):
-            threshold = float(call.kwargs["json"]["variables"]["args"]["match_threshold"])
-            expected = 0.7 - ((i + 1) * 0.05)  # 0.65, 0.6, 0.55, ...
-            assert abs(threshold - expected) < 1e-10
+        request_calls = mock_requests.call_args_list
+        
+        # 1. First call uses the original threshold (0.7), then the adaptive
+        # threshold steps down with the original query: 0.65, 0.6, ... 0.35
+        thresholds = [request_payload(c)["variables"]["args"]["match_threshold"] for c in request_calls[:8]]
+        assert thresholds == pytest.approx([0.7 - i * 0.05 for i in range(8)])
             
-        # 3. Then we should try semantic variations with original threshold
-        semantic_calls = request_calls[8:10]  # Check semantic variation calls
-        for call in semantic_calls:
-            threshold = float(call.kwargs["json"]["variables"]["args"]["match_threshold"])
-            assert abs(threshold - 0.7) < 1e-10  # Should use original threshold
-
-    def test_adaptive_threshold(self, os, mock_requests, mock_openai):
-        """Test adaptive threshold search."""
-        # Mock a sequence of results with different thresholds
-        mock_requests.return_value.json.side_effect = [
-            # First try with threshold=0.7 (no results)
-            {"data": {"search_memories": []}},
-            # Second try with threshold=0.65 (no results)
-            {"data": {"search_memories": []}},
-            # Third try with threshold=0.6 (found results)
-            {
-                "data": {
-                    "search_memories": [
-                        {**TEST_MEMORY, "id": "1", "similarity": 0.62},
-                        {**TEST_MEMORY, "id": "2", "similarity": 0.61},
-                        {**TEST_MEMORY, "id": "3", "similarity": 0.60}
-                    ]
-                }
-            }
-        ] * 2  # Repeat sequence to avoid StopIteration
+        # 2. Then both semantic variations are searched at the original threshold in one request
+        assert len(request_calls) == 9
+        batch = request_payload(request_calls[8])
+        assert [o["variables"]["args"]["match_threshold"] for o in batch] == pytest.approx([0.7, 0.7])
+        assert mock_openai.embeddings.create.call_args.kwargs["input"] == [
+            "alternative programming syntax", "coding language"
+        ]
 
-        memories = os.recall(
-            query="test query",
-            threshold=0.7,
-            min_results=3,
-            adaptive_threshold=True,
-            use_semantic_expansion=False  # Disable expansion for this test
+    def test_semantic_expansion_batch_error(self, os, mock_requests, mock_openai):
+        """Test that a request-level error for the batched search raises GraphQLError."""
+        mock_requests.return_value.json.side_effect = SEMANTIC_EXPANSION_RESPONSES[:-1] + (
+            {"errors": [{"message": "access-denied"}]},
         )
+        mock_openai.chat.completions.create.return_value = VARIATIONS_RESPONSE
+        mock_openai.embeddings.create.return_value = VARIATION_EMBEDDINGS_RESPONSE
 
-        # Verify we got results after lowering threshold
-        assert len(memories) == 3
-        assert all(0.6 <= m.similarity <= 0.7 for m in memories)
-        
-        # Verify multiple search attempts were made
-        assert mock_requests.call_count == 3
-        
-        # Verify thresholds in the requests
-        request_calls = []
-        for call in mock_requests.mock_calls:
-            if isinstance(call, unittest.mock._Call):
-                if hasattr(call, "kwargs") and "json" in call.kwargs:
-                    request_calls.append(call)
-        
-        assert len(request_calls) == 3
-        assert abs(float(request_calls[0].kwargs["json"]["variables"]["args"]["match_threshold"]) - 0.7) < 1e-10
-        assert abs(float(request_calls[1].kwargs["json"]["variables"]["args"]["match_threshold"]) - 0.65) < 1e-10
-        assert abs(float(request_calls[2].kwargs["json"]["variables"]["args"]["match_threshold"]) - 0.6) < 1e-10
-
-    def test_combined_semantic_and_adaptive(self, os, mock_requests, mock_openai):
-        """Test combination of semantic expansion and adaptive threshold."""
-        # Mock a sequence of results
-        responses = [
-            # Original query, first threshold (0.7)
-            {"data": {"search_memories": []}},
-            # Original query, lowered threshold (0.65)
-            {
-                "data": {
-                    "search_memories": [
-                        {**TEST_MEMORY, "id": "1", "similarity": 0.65}
-                    ]
-                }
-            }
-        ]
-        mock_requests.return_value.json.side_effect = responses * 3  # Ensure enough responses
+        with pytest.raises(GraphQLError, match="access-denied"):
+            os.recall(query="programming language", use_semantic_expansion=True, threshold=0.7, min_results=1)
 
-        memories = os.recall(
-            query="programming language",
-            threshold=0.7,
-            min_results=1,  # Only need one result
-            adaptive_threshold=True,
-            use_semantic_expansion=True
-        )
+        # The error came from the batched variation search
+        assert isinstance(request_payload(mock_requests.call_args_list[-1]), list)
 
-        # Verify results - we should get the result from adaptive threshold
-        # before even trying semantic expansion
-        assert len(memories) == 1
-        assert abs(memories[0].similarity - 0.65) < 1e-10  # Best match
-        
-        # Verify semantic expansion was NOT used since we found results with just adaptive threshold
+    @pytest.mark.parametrize("scenario", [
+        pytest.param(RecallScenario(
+            responses=((), (), ("1", "2", "3")),
+            recall_kwargs=dict(min_results=3, adaptive_threshold=True, use_semantic_expansion=False),
+            expected_ids=["1", "2", "3"],
+            expected_thresholds=[0.7, 0.65, 0.6]
+        ), id="adaptive_threshold"),
+        pytest.param(RecallScenario(
+            # Adaptive threshold finds a result before semantic expansion is tried
+            responses=((), ("4",)),
+            recall_kwargs=dict(min_results=1, adaptive_threshold=True, use_semantic_expansion=True),
+            expected_ids=["4"],
+            expected_thresholds=[0.7, 0.65]
+        ), id="combined_semantic_and_adaptive"),
+    ])
+    def test_recall_threshold_steps(self, os, mock_requests, mock_openai, scenario):
+        """Test that recall lowers the threshold until it has enough results."""
+        queue_responses(mock_requests, *(
+            {"search_memories": [RECALL_HITS[memory_id] for memory_id in ids]}
+            for ids in scenario.responses
+        ))
+
+        memories = os.recall(query="programming language", threshold=0.7, **scenario.recall_kwargs)
+
+        assert [m.id for m in memories] == scenario.expected_ids
+        assert [m.similarity for m in memories] == pytest.approx(
+            [RECALL_HITS[memory_id]["similarity"] for memory_id in scenario.expected_ids]
+        )
+        thresholds = [
+            request_payload(c)["variables"]["args"]["match_threshold"]
+            for c in mock_requests.call_args_list
+        ]
+        assert thresholds == pytest.approx(scenario.expected_thresholds)
+        # Semantic expansion is never needed once a lower threshold finds results
         assert mock_openai.chat.completions.create.call_count == 0
-        assert mock_requests.call_count == 2  # Initial try + one threshold reduction
     
-    def test_forget(self, os, mock_requests):
-        """Test deleting a memory."""
+    def test_recall_cache(self, os, mock_requests, mock_openai):
+        """Test that repeated recalls are cached until a mutation or expiry."""
         setup_mock_response(mock_requests, {
+            "search_memories": [TOP_HIT],
             "delete_memories_by_pk": {"id": TEST_MEMORY["id"]}
         })
+        kwargs = dict(query="test query", use_semantic_expansion=False, adaptive_threshold=False)
         
-        result = os.forget(TEST_MEMORY["id"])
-        assert result is True
+        first = os.recall(**kwargs)
+        second = os.recall(**kwargs)
+        assert mock_requests.call_count == 1
+        assert [m.id for m in second] == [m.id for m in first]
         
-        # Verify GraphQL mutation
-        verify_graphql_query(mock_requests.mock_calls[0], "mutation Forget")
+        # Different arguments miss the cache
+        os.recall(limit=3, **kwargs)
+        assert mock_requests.call_count == 2
+        
+        # Mutations invalidate cached results
+        os.forget(TEST_MEMORY["id"])
+        os.recall(**kwargs)
+        assert mock_requests.call_count == 4
+        
+        # Expired entries are refreshed
+        with patch.object(MeshOS, "RECALL_CACHE_TTL", 0):
+            os.recall(**kwargs)
+        assert mock_requests.call_count == 5
+
+    def test_recall_include_embedding(self, os, mock_requests, mock_openai):
+        """Test that embeddings are only selected when requested."""
+        memory = {k: v for k, v in TEST_MEMORY.items() if k != "embedding"}
+        setup_mock_response(mock_requests, {"search_memories": [{**memory, "similarity": 0.9}]})
+        kwargs = dict(query="test query", use_semantic_expansion=False, adaptive_threshold=False)
+
+        memories = os.recall(**kwargs)
+        assert memories[0].embedding is None
+        assert "embedding\n" not in last_payload(mock_requests)["query"]
+
+        setup_mock_response(mock_requests, {"search_memories": [TOP_HIT]})
+        memories = os.recall(include_embedding=True, **kwargs)
+        assert memories[0].embedding == list(TEST_EMBEDDING)
+        assert "embedding\n" in last_payload(mock_requests)["query"]
+
+    def test_recall_prefilter(self, os, mock_requests, mock_openai):
+        """Test that selective filters route recall to the exact search."""
+        queue_responses(
+            mock_requests,
+            {"memories_aggregate": {"aggregate": {"count": 12}}},
+            {"search_memories": [TOP_HIT]}
+        )
+        kwargs = dict(query="test query", use_semantic_expansion=False, adaptive_threshold=False)
+
+        memories = os.recall(agent_id=TEST_MEMORY["agent_id"], metadata_filter={"type": "knowledge"}, **kwargs)
+
+        assert len(memories) == 1
+        count_call, search_call = mock_requests.call_args_list
+        assert request_payload(count_call)["variables"]["where"] == {
+            "agent_id": {"_eq": TEST_MEMORY["agent_id"]},
+            "metadata": {"_contains": {"type": "knowledge"}}
+        }
+        assert "search_memories_exact(" in request_payload(search_call)["query"]
+
+        # Unfiltered recalls and explicit choices skip the count
+        mock_requests.reset_mock()
+        mock_requests.return_value.json.side_effect = None
+        setup_mock_response(mock_requests, {"search_memories": []})
+        os.recall(**kwargs)
+        os.recall(agent_id=TEST_MEMORY["agent_id"], prefilter=False, **kwargs)
+        assert mock_requests.call_count == 2
+        assert all("query SearchMemories(" in request_payload(c)["query"] for c in mock_requests.call_args_list)
 
 class TestMemoryEdges:
     """Tests for memory edge operations."""
@@ -656,59 +859,24 @@ class TestMemoryEdges:
         assert edge.relationship == TEST_MEMORY_EDGE["relationship"]
         assert edge.weight == TEST_MEMORY_EDGE["weight"]
     
-    def test_unlink_memories(self, os, mock_requests):
-        """Test removing links between memories."""
-        mock_requests.return_value.json.return_value = {
-            "data": {
-                "delete_memory_edges": {
-                    "affected_rows": 1
-                }
-            }
-        }
+    @pytest.mark.parametrize("relationship", ["related_to", None])
+    def test_unlink_memories(self, os, mock_requests, relationship):
+        """Test removing links between memories, with and without a relationship."""
+        setup_mock_response(mock_requests, {"delete_memory_edges": {"affected_rows": 1}})
         
         result = os.unlink_memories(
             source_memory_id="test-memory-id-1",
             target_memory_id="test-memory-id-2",
-            relationship="related_to"
-        )
-        
-        assert result is True
-        
-        # Test with no relationship specified
-        result = os.unlink_memories(
-            source_memory_id="test-memory-id-1",
-            target_memory_id="test-memory-id-2"
+            relationship=relationship
         )
         
         assert result is True
+        where = last_payload(mock_requests)["variables"]["where"]
+        assert ("relationship" in where) == (relationship is not None)
     
     def test_update_memory(self, os, mock_requests, mock_openai):
         """Test updating a memory with versioning."""
-        # Mock getting the old memory
-        mock_requests.return_value.json.side_effect = [
-            {
-                "data": {
-                    "memories_by_pk": TEST_MEMORY
-                }
-            },
-            {
-                "data": {
-                    "insert_memories_one": {
-                        **TEST_MEMORY,
-                        "id": "test-memory-id-2",
-                        "content": "Updated content"
-                    }
-                }
-            },
-            {
-                "data": {
-                    "insert_memory_edges_one": {
-                        **TEST_MEMORY_EDGE,
-                        "relationship": "version_of"
-                    }
-                }
-            }
-        ]
+        queue_responses(mock_requests, *VERSIONED_UPDATE_RESPONSES)
         
         new_memory = os.update_memory(
             memory_id="test-memory-id",
@@ -721,22 +889,7 @@ class TestMemoryEdges:
         assert new_memory.content == "Updated content"
         
         # Test without version edge
-        mock_requests.return_value.json.side_effect = [
-            {
-                "data": {
-                    "memories_by_pk": TEST_MEMORY
-                }
-            },
-            {
-                "data": {
-                    "insert_memories_one": {
-                        **TEST_MEMORY,
-                        "id": "test-memory-id-3",
-                        "content": "Updated content"
-                    }
-                }
-            }
-        ]
+        queue_responses(mock_requests, *UNVERSIONED_UPDATE_RESPONSES)
         
         new_memory = os.update_memory(
             memory_id="test-memory-id",
@@ -776,27 +929,91 @@ class TestMemoryEdges:
         assert connections[0]["weight"] == 1.0
         assert connections[0]["depth"] == 1
 
+@pytest.mark.usefixtures("reset_mocks")
+class TestClientLifecycle:
+    """Tests for client connection handling."""
+    
+    def test_context_manager_closes_session(self, mock_openai, mock_requests):
+        """Test that the HTTP session is reused and closed on exit."""
+        setup_mock_response(mock_requests, {"agents_by_pk": TEST_AGENT})
+        
+        with patch("requests.Session.post", mock_requests), patch("requests.Session.close") as mock_close:
+            with MeshOS(url="http://test-url", api_key="test-secret", openai_api_key="test-key") as client:
+                client.get_agent(TEST_AGENT["id"])
+                client.get_agent(TEST_AGENT["id"])
+            mock_close.assert_called_once()
+        
+        assert mock_requests.call_count == 2
+        assert mock_requests.call_args.kwargs["timeout"] == MeshOS.REQUEST_TIMEOUT
+
+    def test_injected_session(self, mock_openai, mock_requests):
+        """Test that a passed-in session gets the client's headers and is left open."""
+        setup_mock_response(mock_requests, {"agents_by_pk": TEST_AGENT})
+        session = SimpleNamespace(headers={}, post=mock_requests, close=Mock())
+        
+        with MeshOS(url="http://test-url", api_key="test-secret", openai_api_key="test-key",
+                    session=session) as client:
+            client.get_agent(TEST_AGENT["id"])
+        
+        assert session.headers["x-hasura-admin-secret"] == "test-secret"
+        assert mock_requests.call_args.args == ("http://test-url/v1/graphql",)
+        session.close.assert_not_called()
+
+    def test_retries_and_timeouts(self, mock_openai):
+        """Test that Hasura POSTs are retried and OpenAI calls are bounded."""
+        with patch("openai.OpenAI", return_value=mock_openai) as mock_openai_cls:
+            client = MeshOS(url="http://test-url", api_key="test-secret", openai_api_key="test-key")
+        
+        retry = client._session.get_adapter("http://test-url").max_retries
+        assert retry.total == MeshOS.REQUEST_RETRIES
+        assert "POST" in retry.allowed_methods
+        assert retry.is_retry("POST", 503)
+        # Errors that may follow a committed mutation are never replayed
+        assert retry.read == 0
+        assert not retry.is_retry("POST", 500)
+        assert not retry.is_retry("POST", 504)
+        assert mock_openai_cls.call_args.kwargs["timeout"] == MeshOS.OPENAI_TIMEOUT
+        assert mock_openai_cls.call_args.kwargs["max_retries"] == MeshOS.OPENAI_MAX_RETRIES
+
+    def test_compress_requests(self, mock_openai, mock_requests):
+        """Test that only large request bodies are gzipped when enabled."""
+        setup_mock_response(mock_requests, {"insert_memories_one": TEST_MEMORY, "agents_by_pk": TEST_AGENT})
+        client = MeshOS(url="http://test-url", api_key="test-secret", openai_api_key="test-key",
+                        compress_requests=True, session=SimpleNamespace(headers={}, post=mock_requests))
+        client.openai = mock_openai
+        
+        client.get_agent(TEST_AGENT["id"])
+        assert mock_requests.call_args.kwargs["headers"] is None
+        
+        client.remember(content=TEST_MEMORY["content"], agent_id=TEST_MEMORY["agent_id"])
+        kwargs = mock_requests.call_args.kwargs
+        assert kwargs["headers"] == {"Content-Encoding": "gzip"}
+        assert "mutation Remember" in json.loads(gzip.decompress(kwargs["data"]))["query"]
+
 class TestErrorHandling:
     """Tests for error handling scenarios."""
     
-    def test_invalid_api_key(self, mock_requests):
-        """Test handling of invalid API key."""
+    def test_invalid_api_key(self, mock_requests, reset_mocks):
+        """Test that a 401 from Hasura raises AuthError."""
         mock_requests.return_value.status_code = 401
-        mock_requests.return_value.raise_for_status.side_effect = Exception("Unauthorized")
         
         os = MeshOS(
             api_key="invalid",
-            openai_api_key="test-key"  # Provide OpenAI key to avoid that error
+            openai_api_key="test-key",  # Provide OpenAI key to avoid that error
+            session=SimpleNamespace(headers={}, post=mock_requests)
         )
         
-        with pytest.raises(Exception, match="Unauthorized"):
+        with pytest.raises(requests.HTTPError) as excinfo:
             os.get_agent("any-id")
+        assert isinstance(excinfo.value, AuthError)
+        assert excinfo.value.response is mock_requests.return_value
+        mock_requests.return_value.raise_for_status.assert_not_called()
     
-    def test_missing_openai_key(self):
+    def test_missing_openai_key(self, monkeypatch):
         """Test handling of missing OpenAI key."""
-        with patch.dict(os_module.environ, {}, clear=True):  # Clear env vars
-            with pytest.raises(ValueError, match="OpenAI API key is required"):
-                MeshOS(openai_api_key=None)
+        monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+        with pytest.raises(ValueError, match="OpenAI API key is required"):
+            MeshOS(openai_api_key=None)
     
     def test_failed_embedding(self, os, mock_openai):
         """Test handling of OpenAI embedding failure."""
@@ -0,0 +1,57 @@
+"""
+Benchmarks for client-side overhead in the MeshOS SDK.
+
+Run with: pytest tests/test_sdk_benchmark.py --benchmark-only
+"""
+import json
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from mesh_os import MeshOS
+
+# recall() results as Hasura returns them, without embeddings
+SEARCH_ROWS = [
+    {
+        "id": f"memory-{i}",
+        "agent_id": "test-agent-id",
+        "content": f"Test memory content {i}",
+        "metadata": {"type": "knowledge", "subtype": "dataset", "tags": ["test"], "version": 1},
+        "similarity": 0.9 - i / 1000,
+        "created_at": "2024-01-01T00:00:00Z",
+        "updated_at": "2024-01-01T00:00:00Z",
+        "expires_at": None
+    }
+    for i in range(100)
+]
+SEARCH_BODY = json.dumps({"data": {"search_memories": SEARCH_ROWS}}).encode()
+
+@pytest.fixture
+def client():
+    """MeshOS client whose OpenAI and Hasura calls return canned responses."""
+    openai_client = MagicMock()
+    openai_client.embeddings.create.return_value = SimpleNamespace(
+        data=[SimpleNamespace(embedding=[0.1] * 1536, index=0)]
+    )
+    response = SimpleNamespace(status_code=200, content=SEARCH_BODY, raise_for_status=lambda: None)
+    session = SimpleNamespace(headers={}, post=MagicMock(return_value=response))
+    with patch("openai.OpenAI", return_value=openai_client):
+        yield MeshOS(url="http://test-url", api_key="test-secret", openai_api_key="test-key", session=session)
+
+@pytest.mark.benchmark(group="recall")
+def test_recall_benchmark(benchmark, client):
+    """Time recall() end to end with I/O mocked out, bypassing the result cache."""
+    def setup():
+        client._recall_cache.clear()
+
+    memories = benchmark.pedantic(
+        client.recall,
+        kwargs={"query": "x", "limit": 100, "use_semantic_expansion": False, "adaptive_threshold": False},
+        setup=setup,
+        rounds=50,
+        warmup_rounds=3
+    )
+    assert len(memories) == 100